@@ -0,0 +1,177 @@
+"""JWT authentication backed by a versioned two-tier user cache.
+
+Every user has a version stamp in the shared cache that changes whenever the
+user row is saved or deleted. Users are cached under ``(id, stamp)`` in a
+small per-process LRU and in the shared cache (Redis), so an authenticated
+request costs one cache read for the stamp instead of a ``users_user``
+query, and any change to the user (pause, password, deactivation) takes
+effect on the very next request.
+
+Only the user's non-secret columns are cached; the password hash, MFA secret
+and verification token stay in the database and are loaded on access.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+_local_users: OrderedDict[tuple[str, str], tuple[dict, float]] = OrderedDict()
+_local_lock = threading.Lock()
+
+# Columns never written to the caches; they are deferred on cached users.
+_UNCACHED_FIELDS = frozenset({"password", "mfa_secret", "verification_token"})
+
+
+def _cache():
+    return caches[getattr(settings, "JWT_USER_CACHE_ALIAS", "default")]
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "JWT_USER_CACHE_TTL", 300))
+
+
+def _version_key(user_id) -> str:
+    return f"auth:user-version:{user_id}"
+
+
+def _user_key(user_id, version: str) -> str:
+    return f"auth:user:{user_id}:{version}"
+
+
+def _set_version(user_id) -> None:
+    try:
+        # A random stamp can never repeat, even after the key is evicted.
+        _cache().set(_version_key(user_id), uuid.uuid4().hex, 86400)
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Could not bump user version stamp.", exc_info=True)
+
+
+def bump_user_version(user_id) -> None:
+    """Invalidate cached copies of the user now and once the change commits."""
+    _set_version(user_id)
+    transaction.on_commit(lambda: _set_version(user_id))
+
+
+def _current_version(user_id) -> str:
+    key = _version_key(user_id)
+    version = _cache().get(key)
+    if version is None:
+        _cache().add(key, uuid.uuid4().hex, 86400)
+        version = _cache().get(key)
+    return version
+
+
+def clear_local_users() -> None:
+    """Forget the users held in process memory."""
+    with _local_lock:
+        _local_users.clear()
+
+
+def _local_get(key):
+    with _local_lock:
+        entry = _local_users.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del _local_users[key]
+            return None
+        _local_users.move_to_end(key)
+        return entry[0]
+
+
+def _local_set(key, entry: dict) -> None:
+    max_size = getattr(settings, "JWT_USER_CACHE_SIZE", 1024)
+    with _local_lock:
+        _local_users[key] = (entry, time.monotonic() + _ttl())
+        _local_users.move_to_end(key)
+        while len(_local_users) > max_size:
+            _local_users.popitem(last=False)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that resolves users through the version cache.
+
+    Paused users are rejected like inactive ones.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        try:
+            version = _current_version(user_id)
+        except Exception:  # pragma: no cover - cache backend outage
+            logger.warning("User cache unavailable.", exc_info=True)
+            version = None
+        if version is None:
+            return self._check_paused(super().get_user(validated_token))
+
+        key = (str(user_id), version)
+        entry = _local_get(key)
+        if entry is None:
+            entry = _cache().get(_user_key(user_id, version))
+            if entry is None:
+                # Raises for unknown and inactive users, so only users that
+                # may authenticate are cached.
+                entry = self._cache_entry(super().get_user(validated_token))
+                _cache().set(_user_key(user_id, version), entry, _ttl())
+            _local_set(key, entry)
+        self._check_cached_user(entry, validated_token)
+        # A fresh instance per request, so changes to request.user stay local.
+        return self._check_paused(self._user_from_entry(entry))
+
+    def _cache_entry(self, user) -> dict:
+        fields = {
+            field.attname: getattr(user, field.attname)
+            for field in self.user_model._meta.concrete_fields
+            if field.attname not in _UNCACHED_FIELDS
+        }
+        revoke_hash = None
+        if api_settings.CHECK_REVOKE_TOKEN:
+            revoke_hash = get_md5_hash_password(user.password)
+        return {"fields": fields, "revoke_hash": revoke_hash}
+
+    def _user_from_entry(self, entry: dict):
+        fields = entry["fields"]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model), list(fields), list(fields.values())
+        )
+
+    @staticmethod
+    def _check_cached_user(entry: dict, validated_token) -> None:
+        if api_settings.CHECK_USER_IS_ACTIVE and not entry["fields"]["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+            != entry["revoke_hash"]
+        ):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+
+    @staticmethod
+    def _check_paused(user):
+        if getattr(user, "is_paused", False):
+            raise AuthenticationFailed(_("User is paused."), code="user_paused")
+        return user
@@ -0,0 +1,17 @@
+"""Signal handlers for the authentication app."""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .jwt import bump_user_version
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Saving or deleting a user (pause, password change...) drops its cache."""
+    bump_user_version(instance.pk)
@@ -1,10 +1,21 @@
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
 import json
 import pyotp
 from uuid import uuid4
 
+from authentication.jwt import (
+    CachedJWTAuthentication,
+    _current_version,
+    _user_key,
+    clear_local_users,
+)
+
 User = get_user_model()
 
 
@@ -183,3 +194,62 @@ class LoginInvalidCredentialsTest(TestCase):
         )
         self.assertEqual(response.status_code, 401)
         self.assertEqual(response.json()["detail"], "Invalid credentials.")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_users()
+        self.addCleanup(clear_local_users)
+        self.user = User.objects.create_user(
+            username="cached", email="cached@example.com", password="pass"
+        )  # nosec B106
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.url = reverse("address-list", kwargs={"version": "v1"})
+
+    def _user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return [q for q in queries.captured_queries if '"users_user"' in q["sql"]]
+
+    def test_user_is_loaded_once(self):
+        self.assertEqual(len(self._user_queries()), 1)
+        self.assertEqual(self._user_queries(), [])
+
+    def test_shared_cache_serves_other_processes(self):
+        self._user_queries()
+        clear_local_users()
+        self.assertEqual(self._user_queries(), [])
+
+    def test_save_invalidates_cached_user(self):
+        self._user_queries()
+        self.user.set_password(uuid4().hex)
+        self.user.save()
+        self.assertEqual(len(self._user_queries()), 1)
+
+    def test_paused_and_inactive_users_are_rejected_immediately(self):
+        self._user_queries()
+
+        self.user.is_paused = True
+        self.user.save(update_fields=["is_paused"])
+        self.assertEqual(self.client.get(self.url, **self.auth).status_code, 401)
+
+        self.user.is_paused = False
+        self.user.is_active = False
+        self.user.save(update_fields=["is_paused", "is_active"])
+        self.assertEqual(self.client.get(self.url, **self.auth).status_code, 401)
+
+    def test_secrets_are_not_cached(self):
+        self._user_queries()
+        version = _current_version(self.user.pk)
+        entry = cache.get(_user_key(self.user.pk, version))
+
+        self.assertNotIn("password", entry["fields"])
+        self.assertNotIn("mfa_secret", entry["fields"])
+
+        user = CachedJWTAuthentication().get_user(AccessToken.for_user(self.user))
+        self.assertEqual(user.email, "cached@example.com")
+        self.assertIn("password", user.get_deferred_fields())
+        self.assertTrue(user.check_password("pass"))
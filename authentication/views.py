@@ -3,7 +3,7 @@ from rest_framework import status, viewsets, permissions
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from authentication.jwt import CachedJWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
 from .throttles import LoginRateThrottle
@@ -16,6 +16,7 @@ from backend.serializers.authentication import (
     AddressSerializer,
 )
 from authentication.models import Address
+from cart.guest import merge_guest_cart, token_from_request
 from users.tasks import send_verification_email
 
 # Social login imports
@@ -44,6 +45,14 @@ class UserRegistrationView(APIView):
             {"user": user_serializer.data, "tokens": tokens},
             status=status.HTTP_201_CREATED,
         )
+
+
+def _merge_guest_cart(request, user) -> None:
+    """Fold the shopper's guest cart into their cart; never fail the login."""
+    try:
+        merge_guest_cart(user, token_from_request(request))
+    except Exception:
+        logging.exception(f"Could not merge guest cart for user {user.pk}.")
 
 
 class LoginView(APIView):
@@ -78,6 +87,7 @@ class LoginView(APIView):
                     )
             user_serializer = UserProfileSerializer(user)
             logging.info(f"User '{user.email}' logged in.")
+            _merge_guest_cart(request, user)
             return Response(
                 {"user": user_serializer.data, "tokens": _build_tokens(user)},
                 status=status.HTTP_200_OK,
@@ -96,7 +106,7 @@ class LoginView(APIView):
 
 
 class UserProfileView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
@@ -114,7 +124,7 @@ class UserProfileView(APIView):
 
 class AddressViewSet(viewsets.ModelViewSet):
     serializer_class = AddressSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
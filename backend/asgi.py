@@ -15,16 +15,27 @@ from . import datadog  # noqa: F401,E402
 from . import opentelemetry  # noqa: F401,E402
 
 from django.core.asgi import get_asgi_application  # noqa: E402
+from django.urls import re_path  # noqa: E402
 from channels.auth import AuthMiddlewareStack  # noqa: E402
 from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
 
-import orders.routing  # noqa: E402
-
+# Build the Django app first: it populates the app registry, which the
+# routing modules need to import models and authentication classes.
 django_asgi_app = get_asgi_application()
 
+import notifications.routing  # noqa: E402
+import orders.routing  # noqa: E402
+
 application = ProtocolTypeRouter(
     {
-        "http": django_asgi_app,
+        # Long-lived streams are served by async consumers; everything else
+        # falls through to Django.
+        "http": URLRouter(
+            [
+                *notifications.routing.http_urlpatterns,
+                re_path(r"", django_asgi_app),
+            ]
+        ),
         "websocket": AuthMiddlewareStack(
             URLRouter(orders.routing.websocket_urlpatterns)
         ),
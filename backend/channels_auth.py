@@ -0,0 +1,55 @@
+"""Authentication middleware for Channels consumers."""
+
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+
+def _token_from_scope(scope) -> str | None:
+    headers = dict(scope.get("headers", []))
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    # Browsers' EventSource and WebSocket APIs cannot set headers.
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("token", [None])[0]
+
+
+@database_sync_to_async
+def _user_for_token(raw_token: str):
+    # Imported lazily: this module is loaded by the ASGI routing, and these
+    # imports need a ready app registry.
+    from django.contrib.auth.models import AnonymousUser
+
+    from authentication.jwt import CachedJWTAuthentication
+
+    authentication = CachedJWTAuthentication()
+    try:
+        validated = authentication.get_validated_token(raw_token.encode("latin-1"))
+        return authentication.get_user(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Populate ``scope["user"]`` from a SimpleJWT access token.
+
+    The token is read from an ``Authorization: Bearer`` header or a ``token``
+    query parameter. Without one, the user set by the session middleware
+    below is kept.
+    """
+
+    async def __call__(self, scope, receive, send):
+        token = _token_from_scope(scope)
+        if token:
+            scope = dict(scope, user=await _user_for_token(token))
+        return await super().__call__(scope, receive, send)
+
+
+def JWTAuthMiddlewareStack(inner):
+    return AuthMiddlewareStack(JWTAuthMiddleware(inner))
@@ -1,35 +1,152 @@
 from __future__ import annotations
 
-"""Utilities for currency conversion."""
+"""Utilities for currency conversion.
 
+Rates come from a single table of ``EXCHANGE_RATE_BASE_CURRENCY`` quotes,
+fetched in one request and cached twice: in process memory and in the
+shared Django cache (Redis). A table younger than ``EXCHANGE_RATE_TTL``
+seconds is served as is. An older one is still served for up to
+``EXCHANGE_RATE_STALE_TTL`` more seconds while a Celery task refreshes it in
+the background, so conversions never wait on the rate API once a table has
+been loaded. The ``refresh_exchange_rates`` beat task keeps the table warm.
+"""
+
+import logging
+import threading
+import time
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Any
+from typing import Any, Iterable
 
 import requests  # type: ignore[import]
 from django.conf import settings
+from django.core.cache import caches
 
+logger = logging.getLogger(__name__)
 
 DEFAULT_API = "https://api.exchangerate.host/latest"
 CURRENCY_QUANTIZE = Decimal("0.01")
 
+_local_tables: dict[str, tuple[dict[str, Decimal], float]] = {}
+_local_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, "EXCHANGE_RATE_CACHE_ALIAS", "default")]
+
+
+def _base_currency() -> str:
+    return getattr(settings, "EXCHANGE_RATE_BASE_CURRENCY", "USD").upper()
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "EXCHANGE_RATE_TTL", 3600))
+
+
+def _stale_ttl() -> int:
+    return int(getattr(settings, "EXCHANGE_RATE_STALE_TTL", 86400))
+
+
+def _cache_key(base: str) -> str:
+    return f"currency:rates:{base}"
+
+
+def fetch_rate_table(base: str) -> dict[str, Decimal]:
+    """Fetch every rate quoted against ``base`` with one API request."""
+    url = getattr(settings, "EXCHANGE_RATE_API_URL", DEFAULT_API)
+    response = requests.get(url, params={"base": base}, timeout=5)
+    response.raise_for_status()
+    data: Any = response.json()
+    rates = {
+        code.upper(): Decimal(str(rate))
+        for code, rate in (data.get("rates") or {}).items()
+    }
+    if not rates:
+        raise ValueError("Exchange rate table is empty")
+    rates[base] = Decimal("1")
+    return rates
+
+
+def _store(base: str, rates: dict[str, Decimal], fetched_at: float) -> None:
+    with _local_lock:
+        _local_tables[base] = (rates, fetched_at)
+    try:
+        _cache().set(
+            _cache_key(base),
+            {
+                "rates": {code: str(rate) for code, rate in rates.items()},
+                "fetched_at": fetched_at,
+            },
+            _ttl() + _stale_ttl(),
+        )
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Exchange rate cache unavailable for store.", exc_info=True)
+
+
+def refresh_rate_table(base: str | None = None) -> dict[str, Decimal]:
+    """Fetch the rate table for ``base`` and store it in both cache tiers."""
+    base = (base or _base_currency()).upper()
+    rates = fetch_rate_table(base)
+    _store(base, rates, time.time())
+    return rates
+
+
+def _cached_table(base: str) -> tuple[dict[str, Decimal], float] | None:
+    with _local_lock:
+        entry = _local_tables.get(base)
+    if entry and time.time() - entry[1] < _ttl():
+        return entry
+    try:
+        shared = _cache().get(_cache_key(base))
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Exchange rate cache unavailable for lookup.", exc_info=True)
+        shared = None
+    if shared and (not entry or shared["fetched_at"] > entry[1]):
+        rates = {code: Decimal(rate) for code, rate in shared["rates"].items()}
+        entry = (rates, shared["fetched_at"])
+        with _local_lock:
+            _local_tables[base] = entry
+    return entry
+
+
+def _schedule_refresh(base: str) -> None:
+    # Only one worker needs to refresh a stale table.
+    try:
+        if not _cache().add(f"{_cache_key(base)}:refreshing", True, 60):
+            return
+        from backend.tasks.currency import refresh_exchange_rates
+
+        refresh_exchange_rates.delay([base])
+    except Exception:
+        logger.warning("Could not schedule exchange rate refresh.", exc_info=True)
+
+
+def get_rate_table(base: str | None = None) -> dict[str, Decimal]:
+    """Return the rate table for ``base``, fetching it only when none is cached."""
+    base = (base or _base_currency()).upper()
+    entry = _cached_table(base)
+    if entry is not None:
+        rates, fetched_at = entry
+        age = time.time() - fetched_at
+        if age < _ttl():
+            return rates
+        if age < _ttl() + _stale_ttl():
+            _schedule_refresh(base)
+            return rates
+    return refresh_rate_table(base)
+
 
 def get_exchange_rate(from_currency: str, to_currency: str) -> Decimal:
-    """Fetch exchange rate from `from_currency` to `to_currency` using an external API."""
+    """Return the rate from `from_currency` to `to_currency` using cached rates."""
     from_currency = from_currency.upper()
     to_currency = to_currency.upper()
     if from_currency == to_currency:
         return Decimal("1")
-    url = getattr(settings, "EXCHANGE_RATE_API_URL", DEFAULT_API)
-    response = requests.get(
-        url, params={"base": from_currency, "symbols": to_currency}, timeout=5
-    )
-    response.raise_for_status()
-    data: Any = response.json()
-    rates = data.get("rates", {})
-    rate = rates.get(to_currency)
-    if rate is None:
+    rates = get_rate_table()
+    from_rate = rates.get(from_currency)
+    to_rate = rates.get(to_currency)
+    if from_rate is None or to_rate is None or not from_rate:
         raise ValueError("Exchange rate not available")
-    return Decimal(str(rate))
+    return to_rate / from_rate
 
 
 def _quantize_amount(amount: Decimal) -> Decimal:
@@ -38,8 +155,27 @@ def _quantize_amount(amount: Decimal) -> Decimal:
 
 
 def convert_amount(amount: Decimal, from_currency: str, to_currency: str) -> Decimal:
-    """Convert an amount between currencies using real-time rates."""
+    """Convert an amount between currencies using cached rates."""
     if not isinstance(amount, Decimal):
         amount = Decimal(str(amount))
     rate = get_exchange_rate(from_currency, to_currency)
     return _quantize_amount(amount * rate)
+
+
+def convert_amounts(
+    amounts: Iterable[Decimal], from_currency: str, to_currency: str
+) -> list[Decimal]:
+    """Convert many amounts with a single rate lookup."""
+    rate = get_exchange_rate(from_currency, to_currency)
+    return [
+        _quantize_amount(
+            (amount if isinstance(amount, Decimal) else Decimal(str(amount))) * rate
+        )
+        for amount in amounts
+    ]
+
+
+def clear_local_rates() -> None:
+    """Forget the rate tables held in process memory."""
+    with _local_lock:
+        _local_tables.clear()
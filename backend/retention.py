@@ -0,0 +1,269 @@
+"""Declarative data retention.
+
+Each :class:`RetentionPolicy` names a model, the timestamp column that ages
+its rows and the setting holding the retention window. Expired rows are
+deleted in primary-key batches: ids are read from the primary key index, and
+rows with nothing to cascade to and no delete signals are removed with a
+single ``DELETE ... WHERE pk IN (...)``; everything else goes through the
+ORM so cascades and signals still run. Runs sleep between batches to leave
+the database room for live traffic, save a checkpoint after every batch and
+stop after ``RETENTION_MAX_SECONDS``, so the next run resumes where the last
+one left off.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Iterable
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models.deletion import Collector
+from django.utils import timezone
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+RETENTION_ROWS_DELETED = Counter(
+    "retention_rows_deleted_total",
+    "Rows deleted by retention policies",
+    ["policy"],
+)
+RETENTION_BATCH_DURATION = Histogram(
+    "retention_batch_duration_seconds",
+    "Duration of retention delete batches in seconds",
+    ["policy"],
+)
+RETENTION_RUNS = Counter(
+    "retention_runs_total",
+    "Retention policy runs by outcome",
+    ["policy", "outcome"],
+)
+
+CHECKPOINT_TTL = 7 * 86400
+
+
+@dataclasses.dataclass(frozen=True)
+class RetentionPolicy:
+    """Delete rows of ``model`` whose ``field`` is older than the window.
+
+    ``days_setting`` names the setting with the window in days, falling back
+    to ``default_days``; ``filters`` narrows the rows that may be deleted.
+    """
+
+    name: str
+    model: str
+    field: str
+    days_setting: str | None = None
+    default_days: int = 0
+    filters: dict[str, Any] = dataclasses.field(default_factory=dict)
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+    def cutoff(self):
+        days = self.default_days
+        if self.days_setting:
+            days = getattr(settings, self.days_setting, days)
+        return timezone.now() - timedelta(days=days)
+
+    def queryset(self, cutoff):
+        return self.get_model()._default_manager.filter(
+            **{f"{self.field}__lt": cutoff}, **self.filters
+        )
+
+
+POLICIES: tuple[RetentionPolicy, ...] = (
+    RetentionPolicy("carts", "cart.Cart", "updated_at", "CART_INACTIVITY_DAYS", 30),
+    RetentionPolicy("sessions", "sessions.Session", "expire_date"),
+    RetentionPolicy("user_sessions", "users.UserSession", "expire_date"),
+    RetentionPolicy(
+        "inactive_users",
+        "users.User",
+        "last_login",
+        "PERSONAL_DATA_RETENTION_DAYS",
+        365,
+        {"is_active": False},
+    ),
+    RetentionPolicy(
+        "stripe_webhook_events",
+        "payments.StripeWebhookEvent",
+        "created_at",
+        "WEBHOOK_EVENT_RETENTION_DAYS",
+        90,
+    ),
+    RetentionPolicy(
+        "shipment_webhook_events",
+        "orders.ShipmentWebhookEvent",
+        "received_at",
+        "WEBHOOK_EVENT_RETENTION_DAYS",
+        90,
+    ),
+    RetentionPolicy(
+        "audit_logs", "audit.AuditLog", "timestamp", "AUDIT_LOG_RETENTION_DAYS", 365
+    ),
+    # Unread notifications are kept: they are still counted in the user's
+    # ``NotificationCounter``.
+    RetentionPolicy(
+        "notifications",
+        "notifications.Notification",
+        "created_at",
+        "NOTIFICATION_RETENTION_DAYS",
+        180,
+        {"read_at__isnull": False},
+    ),
+    # Deleting a job removes its file from storage (see ``users.signals``).
+    RetentionPolicy(
+        "data_exports",
+        "users.DataExportJob",
+        "created_at",
+        "DATA_EXPORT_RETENTION_DAYS",
+        7,
+    ),
+    # Undelivered outbox events have no ``processed_at`` and are kept.
+    RetentionPolicy(
+        "order_outbox",
+        "orders.OrderOutboxEvent",
+        "processed_at",
+        "ORDER_OUTBOX_RETENTION_DAYS",
+        7,
+    ),
+)
+
+
+def get_policy(name: str) -> RetentionPolicy:
+    for policy in POLICIES:
+        if policy.name == name:
+            return policy
+    raise ValueError(f"Unknown retention policy: {name}")
+
+
+def _checkpoint_key(policy: RetentionPolicy) -> str:
+    return f"retention:checkpoint:{policy.name}"
+
+
+def _get_checkpoint(policy: RetentionPolicy):
+    try:
+        return cache.get(_checkpoint_key(policy))
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Could not read retention checkpoint.", exc_info=True)
+        return None
+
+
+def _set_checkpoint(policy: RetentionPolicy, last_pk) -> None:
+    try:
+        if last_pk is None:
+            cache.delete(_checkpoint_key(policy))
+        else:
+            cache.set(_checkpoint_key(policy), last_pk, CHECKPOINT_TTL)
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Could not save retention checkpoint.", exc_info=True)
+
+
+def _can_delete_raw(queryset, using: str) -> bool:
+    # The same test Django uses before skipping object collection: no delete
+    # signals and no relations that cascade, set null or protect.
+    return Collector(using=using, origin=queryset).can_fast_delete(queryset)
+
+
+def _raw_delete(policy: RetentionPolicy, using: str, ids: list, cutoff) -> int:
+    model = policy.get_model()
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    column = model._meta.get_field(policy.field).column
+    placeholders = ", ".join(["%s"] * len(ids))
+    # Recheck the cutoff so rows touched since the ids were read survive.
+    sql = (
+        f"DELETE FROM {quote(model._meta.db_table)} "  # nosec B608
+        f"WHERE {quote(model._meta.pk.column)} IN ({placeholders}) "
+        f"AND {quote(column)} < %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*ids, cutoff])
+        return cursor.rowcount
+
+
+def _delete_batch(policy, queryset, using: str, ids: list, cutoff, raw: bool) -> int:
+    if raw:
+        return _raw_delete(policy, using, ids, cutoff)
+    counts = queryset.filter(pk__in=ids).delete()[1]
+    return counts.get(policy.get_model()._meta.label, 0)
+
+
+def apply_policy(
+    policy: RetentionPolicy | str,
+    batch_size: int | None = None,
+    sleep: float | None = None,
+    max_seconds: float | None = None,
+) -> int:
+    """Delete the rows ``policy`` has expired and return how many went.
+
+    Stops early, keeping its checkpoint, once ``max_seconds`` have passed.
+    """
+    if isinstance(policy, str):
+        policy = get_policy(policy)
+    if batch_size is None:
+        batch_size = getattr(settings, "RETENTION_BATCH_SIZE", 1000)
+    if sleep is None:
+        sleep = getattr(settings, "RETENTION_BATCH_SLEEP", 0.5)
+    if max_seconds is None:
+        max_seconds = getattr(settings, "RETENTION_MAX_SECONDS", 600)
+
+    model = policy.get_model()
+    using = router.db_for_write(model)
+    cutoff = policy.cutoff()
+    queryset = policy.queryset(cutoff).using(using)
+    raw = _can_delete_raw(queryset, using)
+    ids_query = queryset.order_by("pk").values_list("pk", flat=True)
+    deadline = time.monotonic() + max_seconds
+
+    deleted = 0
+    last_pk = _get_checkpoint(policy)
+    try:
+        while True:
+            chunk = ids_query if last_pk is None else ids_query.filter(pk__gt=last_pk)
+            ids = list(chunk[:batch_size])
+            if not ids:
+                _set_checkpoint(policy, None)
+                RETENTION_RUNS.labels(policy.name, "completed").inc()
+                break
+
+            started = time.monotonic()
+            count = _delete_batch(policy, queryset, using, ids, cutoff, raw)
+            RETENTION_BATCH_DURATION.labels(policy.name).observe(
+                time.monotonic() - started
+            )
+            RETENTION_ROWS_DELETED.labels(policy.name).inc(count)
+            deleted += count
+            last_pk = ids[-1]
+            _set_checkpoint(policy, last_pk)
+
+            if len(ids) < batch_size:
+                _set_checkpoint(policy, None)
+                RETENTION_RUNS.labels(policy.name, "completed").inc()
+                break
+            if time.monotonic() >= deadline:
+                RETENTION_RUNS.labels(policy.name, "paused").inc()
+                logger.info(
+                    "Retention policy %s paused after %s rows.", policy.name, deleted
+                )
+                break
+            if sleep:
+                time.sleep(sleep)
+    except Exception:
+        RETENTION_RUNS.labels(policy.name, "failed").inc()
+        raise
+
+    logger.info("Retention policy %s deleted %s rows.", policy.name, deleted)
+    return deleted
+
+
+def apply_policies(names: Iterable[str] | None = None, **options) -> dict[str, int]:
+    """Apply the named policies (all of them by default) one after another."""
+    policies = POLICIES if names is None else [get_policy(name) for name in names]
+    return {policy.name: apply_policy(policy, **options) for policy in policies}
@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from notifications.models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ["id", "message", "created_at", "read_at"]
+        read_only_fields = fields
+
+
+class NotificationMarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=1000,
+    )
+
+
+class NotificationBroadcastSerializer(serializers.Serializer):
+    message = serializers.CharField()
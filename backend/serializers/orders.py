@@ -52,6 +52,17 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
 
 
+class OrderListSerializer(serializers.ModelSerializer):
+    """Lean order history row; ``item_count`` must be annotated."""
+
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ["id", "created_at", "status", "total_price", "currency", "item_count"]
+        read_only_fields = fields
+
+
 class OrderCreateSerializer(serializers.Serializer):
     shipping_address_id = serializers.PrimaryKeyRelatedField(
         source="shipping_address",
@@ -36,6 +36,11 @@ TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN", "")
 TWILIO_FROM_NUMBER = os.getenv("TWILIO_FROM_NUMBER", "")
 
 ELASTICSEARCH_URL = os.getenv("ELASTICSEARCH_URL", "http://localhost:9200")
+ELASTICSEARCH_PRODUCT_INDEX = os.getenv("ELASTICSEARCH_PRODUCT_INDEX", "products")
+ELASTICSEARCH_MAX_CONNECTIONS = int(os.getenv("ELASTICSEARCH_MAX_CONNECTIONS", "10"))
+ELASTICSEARCH_TIMEOUT = float(os.getenv("ELASTICSEARCH_TIMEOUT", "5"))
+# Queue incremental reindex tasks when products, categories or reviews change.
+ELASTICSEARCH_AUTO_INDEX = os.getenv("ELASTICSEARCH_AUTO_INDEX", "False") == "True"
 METRICS_AUTH_TOKEN = os.getenv("METRICS_AUTH_TOKEN", "")
 METRICS_ALLOWED_IPS = [
     ip.strip()
@@ -49,6 +54,24 @@ SHIPMENT_WEBHOOK_TOLERANCE = int(os.getenv("SHIPMENT_WEBHOOK_TOLERANCE", "300"))
 # External ERP configuration
 ERP_API_URL = os.getenv("ERP_API_URL", "")
 ERP_API_KEY = os.getenv("ERP_API_KEY", "")
+ERP_TIMEOUT = float(os.getenv("ERP_TIMEOUT", "5"))
+ERP_MAX_CONNECTIONS = int(os.getenv("ERP_MAX_CONNECTIONS", "16"))
+ERP_MAX_RETRIES = int(os.getenv("ERP_MAX_RETRIES", "3"))
+ERP_RETRY_BACKOFF = float(os.getenv("ERP_RETRY_BACKOFF", "0.5"))
+ERP_CIRCUIT_BREAKER_THRESHOLD = int(os.getenv("ERP_CIRCUIT_BREAKER_THRESHOLD", "10"))
+ERP_CIRCUIT_BREAKER_RESET = float(os.getenv("ERP_CIRCUIT_BREAKER_RESET", "30"))
+ERP_SYNC_INTERVAL_MINUTES = int(os.getenv("ERP_SYNC_INTERVAL_MINUTES", "5"))
+ERP_SYNC_OVERLAP_SECONDS = int(os.getenv("ERP_SYNC_OVERLAP_SECONDS", "300"))
+
+# Exchange rates: one table of base-currency quotes, cached in memory and Redis.
+EXCHANGE_RATE_API_URL = os.getenv(
+    "EXCHANGE_RATE_API_URL", "https://api.exchangerate.host/latest"
+)
+EXCHANGE_RATE_BASE_CURRENCY = os.getenv("EXCHANGE_RATE_BASE_CURRENCY", "USD")
+EXCHANGE_RATE_CACHE_ALIAS = os.getenv("EXCHANGE_RATE_CACHE_ALIAS", "default")
+EXCHANGE_RATE_TTL = int(os.getenv("EXCHANGE_RATE_TTL", "3600"))
+EXCHANGE_RATE_STALE_TTL = int(os.getenv("EXCHANGE_RATE_STALE_TTL", "86400"))
+EXCHANGE_RATE_REFRESH_SECONDS = int(os.getenv("EXCHANGE_RATE_REFRESH_SECONDS", "1800"))
 
 # Global API throttle rates
 ANON_THROTTLE_RATE = os.getenv("GLOBAL_ANON_THROTTLE_RATE", "100/day")
@@ -76,6 +99,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
     "channels",
     # Third-party
     "corsheaders",
@@ -111,6 +135,9 @@ SITE_ID = 2
 
 AUTH_USER_MODEL = "users.User"
 
+# Database sessions indexed by user so revocation only touches that user's rows.
+SESSION_ENGINE = "users.session_store"
+
 AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",
     "allauth.account.auth_backends.AuthenticationBackend",
@@ -221,6 +248,19 @@ if CHANNEL_REDIS_URL:
 else:
     CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
 
+# Notification SSE stream: reconnect delay sent to clients, keepalive interval
+# (seconds) and the most events replayed after a Last-Event-ID reconnect.
+NOTIFICATIONS_STREAM_RETRY_MS = int(os.getenv("NOTIFICATIONS_STREAM_RETRY_MS", "3000"))
+NOTIFICATIONS_STREAM_HEARTBEAT = int(os.getenv("NOTIFICATIONS_STREAM_HEARTBEAT", "15"))
+NOTIFICATIONS_STREAM_CATCHUP_LIMIT = int(
+    os.getenv("NOTIFICATIONS_STREAM_CATCHUP_LIMIT", "500")
+)
+# Users per bulk insert when broadcasting, and how long unread counts are cached.
+NOTIFICATIONS_BROADCAST_CHUNK_SIZE = int(
+    os.getenv("NOTIFICATIONS_BROADCAST_CHUNK_SIZE", "5000")
+)
+NOTIFICATIONS_UNREAD_CACHE_TTL = int(os.getenv("NOTIFICATIONS_UNREAD_CACHE_TTL", "300"))
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 IS_TESTING = bool(
     os.getenv("CI")
@@ -253,6 +293,12 @@ else:
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "dummy")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "dummy")
 STRIPE_WEBHOOK_TOLERANCE = int(os.getenv("STRIPE_WEBHOOK_TOLERANCE", "300"))
+CHECKOUT_ASYNC_PAYMENT_INTENT = (
+    os.getenv("CHECKOUT_ASYNC_PAYMENT_INTENT", "False").lower() == "true"
+)
+CHECKOUT_PAYMENT_INTENT_SECRET_TTL = int(
+    os.getenv("CHECKOUT_PAYMENT_INTENT_SECRET_TTL", "3600")
+)
 if STRIPE_SECRET_KEY == "dummy" or STRIPE_WEBHOOK_SECRET == "dummy":  # nosec B105
     warnings.warn(
         "Stripe keys are not set. Use valid keys in production.",
@@ -333,7 +379,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.jwt.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
@@ -375,6 +421,12 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Users resolved from JWTs are cached per process and in Redis, keyed by a
+# version stamp that every save of the user bumps.
+JWT_USER_CACHE_ALIAS = os.getenv("JWT_USER_CACHE_ALIAS", "default")
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", "300"))
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", "1024"))
+
 REST_AUTH = {
     "USE_JWT": True,
     "TOKEN_MODEL": None,
@@ -427,30 +479,99 @@ if CELERY_BROKER_URL.startswith("rediss://"):
     CELERY_BROKER_USE_SSL = ssl_options
     CELERY_REDIS_BACKEND_USE_SSL = ssl_options
 
+# Order outbox relay: polling interval (seconds), events per transaction,
+# delivery attempts and the base retry delay (seconds, doubled per attempt).
+ORDER_OUTBOX_RELAY_INTERVAL = float(os.getenv("ORDER_OUTBOX_RELAY_INTERVAL", "5"))
+ORDER_OUTBOX_BATCH_SIZE = int(os.getenv("ORDER_OUTBOX_BATCH_SIZE", "100"))
+ORDER_OUTBOX_MAX_ATTEMPTS = int(os.getenv("ORDER_OUTBOX_MAX_ATTEMPTS", "8"))
+ORDER_OUTBOX_RETRY_DELAY = int(os.getenv("ORDER_OUTBOX_RETRY_DELAY", "10"))
+ORDER_OUTBOX_RETENTION_DAYS = int(os.getenv("ORDER_OUTBOX_RETENTION_DAYS", "7"))
+
 CELERY_BEAT_SCHEDULE = {
+    # Retention jobs are staggered so their deletes don't compete for I/O.
     "purge-inactive-carts": {
-        "task": "cart.tasks.purge_inactive_carts",
+        "task": "backend.tasks.cart.purge_inactive_carts",
         "schedule": crontab(hour=0, minute=0),
     },
     "cleanup-expired-sessions": {
-        "task": "users.tasks.cleanup_expired_sessions",
-        "schedule": crontab(hour=0, minute=0),
+        "task": "backend.tasks.users.cleanup_expired_sessions",
+        "schedule": crontab(hour=0, minute=20),
     },
     "purge-inactive-users": {
-        "task": "users.tasks.purge_inactive_users",
-        "schedule": crontab(hour=0, minute=0),
+        "task": "backend.tasks.users.purge_inactive_users",
+        "schedule": crontab(hour=0, minute=40),
+    },
+    "apply-retention-policies": {
+        "task": "backend.tasks.retention.apply_retention_policies",
+        "schedule": crontab(hour=1, minute=0),
+        "args": (
+            [
+                "stripe_webhook_events",
+                "shipment_webhook_events",
+                "audit_logs",
+                "notifications",
+                "order_outbox",
+                "data_exports",
+            ],
+        ),
     },
     "auto-cancel-stale-orders": {
         "task": "orders.tasks.auto_cancel_stale_pending_orders",
         "schedule": crontab(minute="*/15"),
     },
+    "relay-order-outbox": {
+        "task": "orders.tasks.relay_order_outbox",
+        "schedule": ORDER_OUTBOX_RELAY_INTERVAL,
+        # Drop ticks queued behind a long relay run instead of piling up.
+        "options": {"expires": ORDER_OUTBOX_RELAY_INTERVAL},
+    },
+    "refresh-exchange-rates": {
+        "task": "backend.tasks.currency.refresh_exchange_rates",
+        "schedule": EXCHANGE_RATE_REFRESH_SECONDS,
+    },
 }
 
+# Shared tasks that don't belong to an installed app's tasks module.
+CELERY_IMPORTS = ("backend.tasks.currency", "backend.tasks.retention")
+
+if ERP_API_URL and ERP_SYNC_INTERVAL_MINUTES > 0:
+    CELERY_BEAT_SCHEDULE["sync-erp-inventory"] = {
+        "task": "backend.tasks.products.sync_erp_inventory",
+        "schedule": ERP_SYNC_INTERVAL_MINUTES * 60,
+    }
+
 CART_INACTIVITY_DAYS = int(os.getenv("CART_INACTIVITY_DAYS", "30"))
+CART_BATCH_MAX_ITEMS = int(os.getenv("CART_BATCH_MAX_ITEMS", "100"))
+# Guest carts live in this cache (Redis hashes) and expire after the TTL.
+GUEST_CART_CACHE_ALIAS = os.getenv("GUEST_CART_CACHE_ALIAS", "default")
+GUEST_CART_TTL = int(os.getenv("GUEST_CART_TTL", str(CART_INACTIVITY_DAYS * 86400)))
 PERSONAL_DATA_RETENTION_DAYS = int(os.getenv("PERSONAL_DATA_RETENTION_DAYS", "365"))
+# GDPR exports: rows fetched per query and lifetime of signed download links.
+DATA_EXPORT_CHUNK_SIZE = int(os.getenv("DATA_EXPORT_CHUNK_SIZE", "500"))
+DATA_EXPORT_LINK_MAX_AGE = int(os.getenv("DATA_EXPORT_LINK_MAX_AGE", "86400"))
+# Unfinished exports older than this many seconds are failed and requeued.
+DATA_EXPORT_STALE_AFTER = int(os.getenv("DATA_EXPORT_STALE_AFTER", "3600"))
+# Retention windows in days for the policies in ``backend.retention``.
+WEBHOOK_EVENT_RETENTION_DAYS = int(os.getenv("WEBHOOK_EVENT_RETENTION_DAYS", "90"))
+AUDIT_LOG_RETENTION_DAYS = int(os.getenv("AUDIT_LOG_RETENTION_DAYS", "365"))
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "180"))
+DATA_EXPORT_RETENTION_DAYS = int(os.getenv("DATA_EXPORT_RETENTION_DAYS", "7"))
+# Rows per delete batch, pause between batches and time budget of one run.
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "1000"))
+RETENTION_BATCH_SLEEP = float(os.getenv("RETENTION_BATCH_SLEEP", "0.5"))
+RETENTION_MAX_SECONDS = int(os.getenv("RETENTION_MAX_SECONDS", "600"))
 ORDER_PENDING_TIMEOUT_MINUTES = int(
     os.getenv("ORDER_PENDING_TIMEOUT_MINUTES", "30")
 )
+# Orders canceled per transaction by the auto-cancel task, and how long its
+# run lock is held if a worker dies mid-run.
+ORDER_AUTO_CANCEL_BATCH_SIZE = int(os.getenv("ORDER_AUTO_CANCEL_BATCH_SIZE", "500"))
+ORDER_AUTO_CANCEL_LOCK_TIMEOUT = int(
+    os.getenv("ORDER_AUTO_CANCEL_LOCK_TIMEOUT", "1800")
+)
+# Internal location the front proxy serves stored invoices from
+# (``X-Accel-Redirect``); empty streams them through Django.
+INVOICE_ACCEL_REDIRECT_PREFIX = os.getenv("INVOICE_ACCEL_REDIRECT_PREFIX", "")
 
 # Cache configuration
 if IS_TESTING:
@@ -485,6 +606,15 @@ else:
             }
         }
 
+CATALOG_CACHE_ALIAS = os.getenv("CATALOG_CACHE_ALIAS", "default")
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_TTL_JITTER = float(os.getenv("CATALOG_CACHE_TTL_JITTER", "0.1"))
+# Seconds a product's price/inventory snapshot serves cart availability checks.
+PRODUCT_AVAILABILITY_TTL = int(os.getenv("PRODUCT_AVAILABILITY_TTL", "30"))
+
+# Full-text backend for the product ``q`` filter: auto, postgres, sqlite or database.
+PRODUCT_SEARCH_BACKEND = os.getenv("PRODUCT_SEARCH_BACKEND", "auto")
+
 # Security settings
 SECURE_SSL_REDIRECT = os.getenv("SECURE_SSL_REDIRECT", "True") == "True"
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
@@ -0,0 +1,20 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from backend.currency import refresh_rate_table
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def refresh_exchange_rates(self, bases: list[str] | None = None) -> None:
+    """Refresh the cached exchange-rate tables for ``bases``."""
+    bases = bases or [getattr(settings, "EXCHANGE_RATE_BASE_CURRENCY", "USD")]
+    for base in bases:
+        try:
+            refresh_rate_table(base)
+        except Exception as exc:
+            logger.warning("Refreshing %s exchange rates failed: %s", base, exc)
+            raise self.retry(exc=exc)
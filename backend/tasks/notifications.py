@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from notifications.services import broadcast_notification
+
+
+@shared_task
+def send_broadcast_notification(message, chunk_size=None):
+    """Fan ``message`` out to every marketing opt-in user."""
+    return broadcast_notification(message, chunk_size=chunk_size)
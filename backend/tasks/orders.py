@@ -1,11 +1,17 @@
 from orders.tasks import (
     auto_cancel_stale_pending_orders,
+    create_order_payment_intent,
+    generate_order_invoice,
+    relay_order_outbox,
     send_order_confirmation_email,
     send_order_status_sms,
 )
 
 __all__ = [
     "auto_cancel_stale_pending_orders",
+    "create_order_payment_intent",
+    "generate_order_invoice",
+    "relay_order_outbox",
     "send_order_confirmation_email",
     "send_order_status_sms",
 ]
@@ -1,12 +1,18 @@
+import logging
 from io import BytesIO
 
 import boto3
 from celery import shared_task
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import send_mail
+from elasticsearch import ApiError, TransportError
 
+from products import search
 from products.models import Product
 
+logger = logging.getLogger(__name__)
+
 
 @shared_task
 def send_low_stock_email(
@@ -40,3 +46,51 @@ def upload_product_image_to_s3(product_id: str, filename: str, content: bytes) -
         product.images.append(url)
         product.save()
 
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def index_products_in_search(self, product_ids: list[int]) -> None:
+    """Refresh the search documents of ``product_ids``, dropping deleted ones."""
+    try:
+        _, failed = search.reindex_products(product_ids)
+    except (ApiError, TransportError) as exc:
+        logger.warning("Search reindex of products %s failed: %s", product_ids, exc)
+        raise self.retry(exc=exc)
+    if failed:
+        logger.warning("%s search documents failed to index.", failed)
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def index_category_in_search(self, category_id: int) -> None:
+    """Refresh the search documents of every product in a category."""
+    try:
+        _, failed = search.bulk_index_products(
+            Product.objects.filter(category_id=category_id)
+        )
+    except (ApiError, TransportError) as exc:
+        logger.warning("Search reindex of category %s failed: %s", category_id, exc)
+        raise self.retry(exc=exc)
+    if failed:
+        logger.warning("%s search documents failed to index.", failed)
+
+
+@shared_task
+def sync_erp_inventory() -> dict | None:
+    """Apply ERP inventory changes since the last sync (delta mode)."""
+    from products.services import sync_inventory_from_erp
+
+    lock_key = "erp-inventory-sync:lock"
+    # Skip this tick if the previous run is still going.
+    if not cache.add(lock_key, True, getattr(settings, "ERP_SYNC_LOCK_TIMEOUT", 900)):
+        logger.info("ERP inventory sync already running; skipping.")
+        return None
+    try:
+        stats = sync_inventory_from_erp()
+    finally:
+        cache.delete(lock_key)
+    return {
+        "mode": stats.mode,
+        "checked": stats.checked,
+        "updated": stats.updated,
+        "failed": stats.failed,
+        "aborted": stats.aborted,
+    }
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from backend.retention import apply_policies
+
+
+@shared_task
+def apply_retention_policies(names: list[str] | None = None) -> dict[str, int]:
+    """Apply the named retention policies, or all of them."""
+    return apply_policies(names)
@@ -1,11 +1,10 @@
-from datetime import timedelta
-
 from celery import shared_task
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.sessions.models import Session
 from django.core.mail import send_mail
-from django.utils import timezone
+
+from backend.retention import apply_policies, apply_policy
+from users.services import run_data_export
 
 
 @shared_task
@@ -22,17 +21,16 @@ def send_verification_email(user_id):
 @shared_task
 def cleanup_expired_sessions():
     """Delete expired user sessions."""
-    Session.objects.filter(expire_date__lt=timezone.now()).delete()
+    apply_policies(["sessions", "user_sessions"])
 
 
 def perform_user_purge() -> int:
-    """Remove inactive users beyond the retention window."""
-    User = get_user_model()
-    retention = getattr(settings, "PERSONAL_DATA_RETENTION_DAYS", 365)
-    cutoff = timezone.now() - timedelta(days=retention)
-    qs = User.objects.filter(is_active=False, last_login__lt=cutoff)
-    deleted, _ = qs.delete()
-    return deleted
+    """Remove inactive users beyond the retention window.
+
+    Returns the number of users deleted; rows removed with them by cascades
+    are not counted.
+    """
+    return apply_policy("inactive_users")
 
 
 @shared_task
@@ -40,3 +38,8 @@ def purge_inactive_users() -> None:
     """Celery task wrapper for inactive user purge."""
     perform_user_purge()
 
+
+@shared_task
+def export_user_data(job_id: str) -> None:
+    """Build a GDPR data export file for the given job."""
+    run_data_export(job_id)
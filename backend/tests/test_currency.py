@@ -1,12 +1,31 @@
 from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
-from django.test import SimpleTestCase
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
 
-from backend.currency import convert_amount, get_exchange_rate
+from backend.currency import (
+    clear_local_rates,
+    convert_amount,
+    convert_amounts,
+    get_exchange_rate,
+)
+from backend.tasks.currency import refresh_exchange_rates
+
+
+def _rates_response(rates):
+    mock_response = MagicMock()
+    mock_response.raise_for_status.return_value = None
+    mock_response.json.return_value = {"rates": rates}
+    return mock_response
 
 
 class CurrencyTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_rates()
+        self.addCleanup(clear_local_rates)
+
     @patch("backend.currency.requests.get")
     def test_get_exchange_rate_returns_decimal(self, mock_get):
         mock_response = MagicMock()
@@ -25,3 +44,67 @@ class CurrencyTests(SimpleTestCase):
         result = convert_amount(Decimal("10.005"), "USD", "EUR")
 
         self.assertEqual(result, Decimal("10.01"))
+
+
+@override_settings(
+    EXCHANGE_RATE_BASE_CURRENCY="USD",
+    EXCHANGE_RATE_TTL=60,
+    EXCHANGE_RATE_STALE_TTL=600,
+)
+class CachedRateProviderTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_rates()
+        self.addCleanup(clear_local_rates)
+        patcher = patch("backend.currency.requests.get")
+        self.mock_get = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_get.return_value = _rates_response({"EUR": "0.5", "GBP": "0.25"})
+
+    def test_one_table_request_serves_every_pair(self):
+        prices = [Decimal("10.00"), Decimal("3.33"), Decimal("0.01")]
+
+        self.assertEqual(
+            convert_amounts(prices, "USD", "EUR"),
+            [Decimal("5.00"), Decimal("1.67"), Decimal("0.01")],
+        )
+        self.assertEqual(get_exchange_rate("EUR", "GBP"), Decimal("0.5"))
+        self.assertEqual(convert_amount(Decimal("1"), "GBP", "USD"), Decimal("4.00"))
+        self.mock_get.assert_called_once()
+        self.assertEqual(self.mock_get.call_args.kwargs["params"], {"base": "USD"})
+
+    def test_shared_cache_is_used_by_other_processes(self):
+        get_exchange_rate("USD", "EUR")
+        clear_local_rates()
+
+        self.assertEqual(get_exchange_rate("USD", "GBP"), Decimal("0.25"))
+        self.mock_get.assert_called_once()
+
+    @patch("backend.currency.time.time")
+    def test_stale_table_is_served_while_refreshing(self, mock_time):
+        mock_time.return_value = 1000.0
+        get_exchange_rate("USD", "EUR")
+        self.mock_get.return_value = _rates_response({"EUR": "0.8"})
+        mock_time.return_value = 1100.0
+
+        with patch("backend.tasks.currency.refresh_exchange_rates.delay") as delay:
+            self.assertEqual(get_exchange_rate("USD", "EUR"), Decimal("0.5"))
+            self.assertEqual(get_exchange_rate("USD", "EUR"), Decimal("0.5"))
+        delay.assert_called_once_with(["USD"])
+
+        refresh_exchange_rates.apply(args=[["USD"]])
+        self.assertEqual(get_exchange_rate("USD", "EUR"), Decimal("0.8"))
+
+    @patch("backend.currency.time.time")
+    def test_expired_table_is_fetched_synchronously(self, mock_time):
+        mock_time.return_value = 1000.0
+        get_exchange_rate("USD", "EUR")
+        self.mock_get.return_value = _rates_response({"EUR": "0.9"})
+        mock_time.return_value = 1000.0 + 60 + 600
+
+        self.assertEqual(get_exchange_rate("USD", "EUR"), Decimal("0.9"))
+        self.assertEqual(self.mock_get.call_count, 2)
+
+    def test_unknown_currency_raises(self):
+        with self.assertRaises(ValueError):
+            get_exchange_rate("USD", "XYZ")
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from audit.models import AuditLog
+from backend.retention import apply_policies, apply_policy
+from cart.models import Cart
+from notifications.models import Notification
+
+
+def _deleted_metric(policy):
+    return (
+        REGISTRY.get_sample_value("retention_rows_deleted_total", {"policy": policy})
+        or 0
+    )
+
+
+@override_settings(RETENTION_BATCH_SLEEP=0, AUDIT_LOG_RETENTION_DAYS=30)
+class RetentionPolicyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.old = timezone.now() - timedelta(days=31)
+
+    def _audit_logs(self, count, timestamp):
+        logs = AuditLog.objects.bulk_create(
+            [AuditLog(path=f"/p/{index}", method="GET") for index in range(count)]
+        )
+        AuditLog.objects.filter(pk__in=[log.pk for log in logs]).update(
+            timestamp=timestamp
+        )
+        return logs
+
+    def test_raw_delete_in_primary_key_batches(self):
+        self._audit_logs(5, self.old)
+        recent = self._audit_logs(1, timezone.now())
+        before = _deleted_metric("audit_logs")
+
+        with CaptureQueriesContext(connection) as queries:
+            deleted = apply_policy("audit_logs", batch_size=2)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(list(AuditLog.objects.all()), recent)
+        deletes = [
+            q["sql"] for q in queries.captured_queries if q["sql"].startswith("DELETE")
+        ]
+        self.assertEqual(len(deletes), 3)
+        self.assertTrue(all(" IN (" in sql for sql in deletes))
+        self.assertEqual(_deleted_metric("audit_logs") - before, 5)
+
+    def test_resumes_from_checkpoint(self):
+        logs = self._audit_logs(4, self.old)
+
+        deleted = apply_policy("audit_logs", batch_size=2, max_seconds=0)
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(cache.get("retention:checkpoint:audit_logs"), logs[1].pk)
+        self.assertEqual(apply_policy("audit_logs", batch_size=2), 2)
+        self.assertFalse(AuditLog.objects.exists())
+        self.assertIsNone(cache.get("retention:checkpoint:audit_logs"))
+
+    def test_cascading_models_are_deleted_through_the_orm(self):
+        user = get_user_model().objects.create_user(
+            username="shopper", password="pass"
+        )  # nosec B106
+        cart = Cart.objects.create(user=user)
+        Cart.objects.filter(pk=cart.pk).update(
+            updated_at=timezone.now() - timedelta(days=60)
+        )
+
+        self.assertEqual(apply_policy("carts"), 1)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_unread_notifications_are_kept(self):
+        user = get_user_model().objects.create_user(
+            username="reader", password="pass"
+        )  # nosec B106
+        read = Notification.objects.create(
+            user=user, message="read", read_at=timezone.now()
+        )
+        unread = Notification.objects.create(user=user, message="unread")
+        Notification.objects.update(created_at=timezone.now() - timedelta(days=365))
+
+        result = apply_policies(["notifications"])
+
+        self.assertEqual(result, {"notifications": 1})
+        self.assertFalse(Notification.objects.filter(pk=read.pk).exists())
+        self.assertTrue(Notification.objects.filter(pk=unread.pk).exists())
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            apply_policy("nope")
@@ -10,7 +10,12 @@ class CartItemInline(admin.TabularInline):
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
-    list_display = ("user", "updated_at")
+    list_display = ("user", "item_count", "subtotal", "updated_at")
     search_fields = ("user__username", "user__email")
     ordering = ("-updated_at",)
     inlines = [CartItemInline]
+    readonly_fields = ("item_count", "subtotal")
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.recalculate_totals()
@@ -1,8 +1,18 @@
 # cart/urls.py
 
 from django.urls import path
-from .views import CartView
+from .views import (
+    CartItemsView,
+    CartSummaryView,
+    CartView,
+    GuestCartMergeView,
+    GuestCartView,
+)
 
 urlpatterns = [
     path("", CartView.as_view(), name="cart"),
+    path("items/", CartItemsView.as_view(), name="cart-items"),
+    path("summary/", CartSummaryView.as_view(), name="cart-summary"),
+    path("guest/", GuestCartView.as_view(), name="cart-guest"),
+    path("guest/merge/", GuestCartMergeView.as_view(), name="cart-guest-merge"),
 ]
@@ -0,0 +1,254 @@
+"""Guest carts kept outside the database.
+
+An anonymous shopper's cart is a Redis hash of ``product_id -> quantity``
+under a random id. Clients hold the id as a signed cart token and send it in
+the ``X-Cart-Token`` header. Every write renews the hash's TTL, so abandoned
+guest carts simply expire and never reach the retention jobs. When the
+shopper authenticates, the hash is claimed (read and deleted atomically)
+and merged into their database cart with one bulk upsert. Adding to a line
+increments it and checks the inventory cap in one script, so concurrent
+adds never lose an increment.
+
+Caches that are not Redis (local development, tests) hold the same mapping
+as a single cache value, without that atomicity.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from products.models import Product
+
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = "cart.guest"
+TOKEN_HEADER = "HTTP_X_CART_TOKEN"
+
+# Read and delete a hash in one step so a cart can only be merged once.
+_CLAIM_SCRIPT = """
+local lines = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return lines
+"""
+
+# Add to a line only if the total stays within the cap. Returns the previous
+# quantity and whether the add was applied, so concurrent adds never lose an
+# increment and never overshoot the cap.
+_ADD_SCRIPT = """
+local previous = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+local quantity = previous + tonumber(ARGV[2])
+if quantity > tonumber(ARGV[3]) then
+    return {previous, 0}
+end
+redis.call('HSET', KEYS[1], ARGV[1], quantity)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {previous, 1}
+"""
+
+
+def _alias() -> str:
+    return getattr(settings, "GUEST_CART_CACHE_ALIAS", "default")
+
+
+def _ttl() -> int:
+    return int(
+        getattr(
+            settings,
+            "GUEST_CART_TTL",
+            getattr(settings, "CART_INACTIVITY_DAYS", 30) * 86400,
+        )
+    )
+
+
+def _key(cart_id: str) -> str:
+    return f"cart:guest:{cart_id}"
+
+
+def _parse(raw: dict) -> dict[int, int]:
+    return {int(product_id): int(quantity) for product_id, quantity in raw.items()}
+
+
+class RedisGuestCartStore:
+    def __init__(self, client):
+        self.client = client
+
+    def lines(self, cart_id: str) -> dict[int, int]:
+        return _parse(self.client.hgetall(_key(cart_id)))
+
+    def set_quantity(self, cart_id: str, product_id: int, quantity: int) -> None:
+        key = _key(cart_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(key, product_id, quantity)
+        pipe.expire(key, _ttl())
+        pipe.execute()
+
+    def add(
+        self, cart_id: str, product_id: int, quantity: int, limit: int
+    ) -> tuple[int, int] | None:
+        previous, applied = self.client.eval(
+            _ADD_SCRIPT, 1, _key(cart_id), product_id, quantity, limit, _ttl()
+        )
+        if not applied:
+            return None
+        return int(previous), int(previous) + quantity
+
+    def remove(self, cart_id: str, product_id: int | None = None) -> None:
+        key = _key(cart_id)
+        if product_id is None:
+            self.client.delete(key)
+            return
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hdel(key, product_id)
+        pipe.expire(key, _ttl())
+        pipe.execute()
+
+    def claim(self, cart_id: str) -> dict[int, int]:
+        raw = self.client.eval(_CLAIM_SCRIPT, 1, _key(cart_id))
+        return _parse(dict(zip(raw[::2], raw[1::2])))
+
+    def restore(self, cart_id: str, lines: dict[int, int]) -> None:
+        key = _key(cart_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(key, mapping=lines)
+        pipe.expire(key, _ttl())
+        pipe.execute()
+
+
+class CacheGuestCartStore:
+    def __init__(self, cache):
+        self.cache = cache
+
+    def lines(self, cart_id: str) -> dict[int, int]:
+        return dict(self.cache.get(_key(cart_id)) or {})
+
+    def set_quantity(self, cart_id: str, product_id: int, quantity: int) -> None:
+        lines = self.lines(cart_id)
+        lines[product_id] = quantity
+        self.cache.set(_key(cart_id), lines, _ttl())
+
+    def add(
+        self, cart_id: str, product_id: int, quantity: int, limit: int
+    ) -> tuple[int, int] | None:
+        lines = self.lines(cart_id)
+        previous = lines.get(product_id, 0)
+        if previous + quantity > limit:
+            return None
+        lines[product_id] = previous + quantity
+        self.cache.set(_key(cart_id), lines, _ttl())
+        return previous, previous + quantity
+
+    def remove(self, cart_id: str, product_id: int | None = None) -> None:
+        if product_id is None:
+            self.cache.delete(_key(cart_id))
+            return
+        lines = self.lines(cart_id)
+        lines.pop(product_id, None)
+        self.cache.set(_key(cart_id), lines, _ttl())
+
+    def claim(self, cart_id: str) -> dict[int, int]:
+        lines = self.lines(cart_id)
+        self.cache.delete(_key(cart_id))
+        return lines
+
+    def restore(self, cart_id: str, lines: dict[int, int]) -> None:
+        self.cache.set(_key(cart_id), dict(lines), _ttl())
+
+
+def guest_cart_store():
+    """Return the store for ``GUEST_CART_CACHE_ALIAS``."""
+    try:
+        from django_redis import get_redis_connection
+
+        return RedisGuestCartStore(get_redis_connection(_alias()))
+    except (ImportError, NotImplementedError):
+        return CacheGuestCartStore(caches[_alias()])
+
+
+def new_cart_token() -> str:
+    return signing.Signer(salt=TOKEN_SALT).sign(uuid.uuid4().hex)
+
+
+def cart_id_for_token(token: str | None) -> str | None:
+    """Return the cart id signed into ``token``, or ``None`` if it is invalid."""
+    if not token:
+        return None
+    try:
+        return signing.Signer(salt=TOKEN_SALT).unsign(token)
+    except signing.BadSignature:
+        return None
+
+
+def token_from_request(request) -> str | None:
+    token = request.META.get(TOKEN_HEADER)
+    if not token and isinstance(request.data, Mapping):
+        token = request.data.get("cart_token")
+    return token
+
+
+def merge_guest_cart(user, token: str | None) -> Cart | None:
+    """Move the guest cart behind ``token`` into ``user``'s cart.
+
+    Quantities of products already in the cart are added together and capped
+    at the available inventory; unavailable products are dropped. Returns the
+    user's cart, or ``None`` when there was nothing to merge.
+    """
+    cart_id = cart_id_for_token(token)
+    if cart_id is None:
+        return None
+    store = guest_cart_store()
+    lines = store.claim(cart_id)
+    if not lines:
+        return None
+
+    try:
+        with transaction.atomic():
+            carts = Cart.objects
+            if connection.features.has_select_for_update:
+                carts = carts.select_for_update()
+            cart, _ = carts.get_or_create(user=user)
+            existing = dict(
+                CartItem.objects.filter(cart=cart).values_list("product_id", "quantity")
+            )
+            products = Product.objects.filter(id__in=list(lines)).only(
+                "id", "price", "inventory", "is_active", "publish_at", "unpublish_at"
+            )
+            merged = []
+            for product in products:
+                if not product.is_published():
+                    continue
+                quantity = min(
+                    existing.get(product.id, 0) + lines[product.id], product.inventory
+                )
+                if quantity <= 0:
+                    continue
+                merged.append(
+                    CartItem(
+                        cart=cart,
+                        product=product,
+                        quantity=quantity,
+                        unit_price=product.price,
+                    )
+                )
+            CartItem.objects.bulk_create(
+                merged,
+                update_conflicts=True,
+                unique_fields=["cart", "product"],
+                update_fields=["quantity", "unit_price", "updated_at"],
+            )
+            cart.recalculate_totals()
+    except Exception:
+        # Put the lines back so a failed merge does not empty the guest cart.
+        store.restore(cart_id, lines)
+        raise
+
+    logger.info("Merged %s guest cart lines for user %s.", len(merged), user.pk)
+    return cart
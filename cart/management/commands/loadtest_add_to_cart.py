@@ -0,0 +1,146 @@
+"""Management command measuring add-to-cart throughput on one product.
+
+Requests go over HTTP to a running server, so the measurement covers the
+server's own worker processes rather than threads sharing this process's
+interpreter. Each shopper thread only waits on its socket.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests  # type: ignore[import-untyped]
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from cart.models import Cart
+from products.models import Product
+
+USERNAME_PREFIX = "loadtest-cart-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer add-to-cart for a single hot product with increasing numbers "
+        "of concurrent shoppers and report throughput per worker count. "
+        "Run it against a server with several worker processes. Throughput "
+        "should grow with workers; a flat line means requests are serializing "
+        "on the product row."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("product", help="Id or slug of the hot product.")
+        parser.add_argument(
+            "--workers",
+            default="1,2,4,8",
+            help="Comma-separated worker counts to measure, e.g. 1,2,4,8.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Add-to-cart requests sent by each worker.",
+        )
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000",
+            help="Scheme and host of the server under test, e.g. "
+            "http://localhost:8000. Use the same database and SECRET_KEY.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=10.0,
+            help="Seconds to wait for each response.",
+        )
+        parser.add_argument(
+            "--cleanup",
+            action="store_true",
+            help="Delete the carts used and the shoppers created by this run.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            workers = [int(value) for value in options["workers"].split(",")]
+        except ValueError as exc:
+            raise CommandError("--workers must be comma-separated integers.") from exc
+        if not workers or min(workers) < 1 or options["requests"] < 1:
+            raise CommandError("--workers and --requests must be positive.")
+
+        lookup = options["product"]
+        product = Product.objects.filter(
+            **({"pk": lookup} if lookup.isdigit() else {"slug": lookup})
+        ).first()
+        if product is None:
+            raise CommandError(f"Product {lookup!r} does not exist.")
+
+        User = get_user_model()
+        users = []
+        created_ids = []
+        for index in range(max(workers)):
+            user, created = User.objects.get_or_create(
+                username=f"{USERNAME_PREFIX}{index}",
+                defaults={"email": f"{USERNAME_PREFIX}{index}@example.com"},
+            )
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=["password"])
+                created_ids.append(user.pk)
+            users.append(user)
+
+        self._url = options["base_url"].rstrip("/") + reverse(
+            "cart", kwargs={"version": "v1"}
+        )
+        self._timeout = options["timeout"]
+        self._lock = threading.Lock()
+
+        self.stdout.write("workers  requests  errors  seconds  req/s  speedup")
+        baseline = None
+        for count in workers:
+            for user in users[:count]:
+                Cart.objects.filter(user=user).delete()
+            self._errors = 0
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=count) as executor:
+                for user in users[:count]:
+                    executor.submit(self._shop, user, product.pk, options["requests"])
+            elapsed = time.perf_counter() - started
+            total = count * options["requests"]
+            rate = total / elapsed if elapsed else 0.0
+            baseline = baseline or rate
+            self.stdout.write(
+                f"{count:>7}  {total:>8}  {self._errors:>6}  {elapsed:>7.2f}  "
+                f"{rate:>5.0f}  {rate / baseline:>6.2f}x"
+            )
+
+        if options["cleanup"]:
+            Cart.objects.filter(user__in=users).delete()
+            # Shoppers left over from earlier runs are not ours to delete.
+            User.objects.filter(pk__in=created_ids).delete()
+
+    def _shop(self, user, product_id: int, count: int) -> None:
+        token = str(RefreshToken.for_user(user).access_token)
+        line = {"product_id": product_id, "quantity": 1}
+        try:
+            with requests.Session() as session:
+                session.headers["Authorization"] = f"Bearer {token}"
+                for _ in range(count):
+                    response = session.post(self._url, json=line, timeout=self._timeout)
+                    if response.status_code == 400:
+                        # The line reached the inventory; start it over.
+                        session.delete(
+                            self._url,
+                            json={"product_id": product_id},
+                            timeout=self._timeout,
+                        )
+                    elif response.status_code not in (200, 201):
+                        with self._lock:
+                            self._errors += 1
+        except Exception as exc:
+            self.stderr.write(self.style.ERROR(f"Worker for {user} failed: {exc}"))
+            with self._lock:
+                self._errors += 1
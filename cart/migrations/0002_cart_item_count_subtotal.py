@@ -0,0 +1,47 @@
+# Generated by Django 4.2.27 on 2026-10-18 10:05
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+
+def backfill_totals(apps, schema_editor):
+    Cart = apps.get_model("cart", "Cart")
+    CartItem = apps.get_model("cart", "CartItem")
+    totals = (
+        CartItem.objects.values("cart_id")
+        .annotate(
+            item_count=Sum("quantity"),
+            subtotal=Sum(
+                ExpressionWrapper(
+                    F("unit_price") * F("quantity"),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            ),
+        )
+        .iterator()
+    )
+    for row in totals:
+        Cart.objects.filter(pk=row["cart_id"]).update(
+            item_count=row["item_count"], subtotal=row["subtotal"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cart",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cart",
+            name="subtotal",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
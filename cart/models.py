@@ -4,6 +4,8 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.db import models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
 
 from products.models import Product
 
@@ -12,6 +14,9 @@ class Cart(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="cart"
     )
+    # Denormalized from the items so summaries never read the lines.
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -20,14 +25,50 @@ class Cart(models.Model):
 
     @property
     def total_price(self) -> Decimal:
-        total = Decimal("0.00")
-        for item in self.items.all():
-            total += item.line_total
-        return total
+        return self.subtotal
 
     def touch(self) -> None:
         self.save(update_fields=["updated_at"])
 
+    def adjust_totals(self, quantity: int, amount: Decimal) -> None:
+        """Add ``quantity`` units worth ``amount`` (either may be negative).
+
+        Counters and ``updated_at`` change in one UPDATE; call it in the
+        transaction that changes the lines, with the cart row locked, so the
+        in-memory values stay exact.
+        """
+        now = timezone.now()
+        Cart.objects.filter(pk=self.pk).update(
+            item_count=F("item_count") + quantity,
+            subtotal=F("subtotal") + amount,
+            updated_at=now,
+        )
+        self.item_count += quantity
+        self.subtotal += amount
+        self.updated_at = now
+
+    def clear(self) -> None:
+        """Delete every line and reset the counters."""
+        self.items.all().delete()
+        self.item_count = 0
+        self.subtotal = Decimal("0.00")
+        self.save(update_fields=["item_count", "subtotal", "updated_at"])
+
+    def recalculate_totals(self) -> None:
+        """Rebuild the counters from the lines, e.g. after admin edits."""
+        totals = self.items.aggregate(
+            item_count=Sum("quantity"),
+            subtotal=Sum(
+                ExpressionWrapper(
+                    F("unit_price") * F("quantity"),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            ),
+        )
+        self.item_count = totals["item_count"] or 0
+        self.subtotal = totals["subtotal"] or Decimal("0.00")
+        self.save(update_fields=["item_count", "subtotal", "updated_at"])
+
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
@@ -1,6 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
 
 from cart.models import Cart, CartItem
+from products import cache as catalog_cache
 from products.models import Product
 
 
@@ -38,16 +40,81 @@ class CartSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Cart
-        fields = ["id", "items", "total_price", "created_at", "updated_at"]
+        fields = [
+            "id",
+            "items",
+            "item_count",
+            "subtotal",
+            "total_price",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class CartSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Cart
+        fields = ["id", "item_count", "subtotal", "updated_at"]
+
+
+class CartMutationSerializer(CartSerializer):
+    """The cart, with ``items`` taken from the lines passed in the context.
+
+    Lets mutations answer with the lines they already hold instead of
+    reading the cart back.
+    """
+
+    items = serializers.SerializerMethodField()
+
+    def get_items(self, cart):
+        return CartItemSerializer(self.context.get("items", []), many=True).data
+
+
+class AvailableProductField(serializers.IntegerField):
+    """An active product's id, resolved to its cached availability snapshot."""
+
+    default_error_messages = {
+        "does_not_exist": 'Invalid pk "{pk_value}" - object does not exist.',
+    }
+
+    def to_internal_value(self, data):
+        product_id = super().to_internal_value(data)
+        product = catalog_cache.get_availability([product_id]).get(product_id)
+        if product is None or not product.is_active:
+            self.fail("does_not_exist", pk_value=product_id)
+        return product
+
+    def to_representation(self, value):
+        return value.pk
 
 
 class CartItemWriteSerializer(serializers.Serializer):
-    product_id = serializers.PrimaryKeyRelatedField(
-        source="product", queryset=Product.objects.filter(is_active=True)
-    )
+    product_id = AvailableProductField(source="product")
     quantity = serializers.IntegerField(min_value=1)
 
 
+class CartItemOperationSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """Set each listed product's quantity; ``0`` removes the line."""
+
+    items = CartItemOperationSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        limit = getattr(settings, "CART_BATCH_MAX_ITEMS", 100)
+        if len(items) > limit:
+            raise serializers.ValidationError(
+                f"At most {limit} items can be changed at once."
+            )
+        product_ids = [item["product_id"] for item in items]
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError("Each product may appear only once.")
+        return items
+
+
 class CartItemDeleteSerializer(serializers.Serializer):
     product_id = serializers.PrimaryKeyRelatedField(
         source="product", queryset=Product.objects.filter(is_active=True)
@@ -55,8 +122,13 @@ class CartItemDeleteSerializer(serializers.Serializer):
 
 
 __all__ = [
+    "CartItemProductSerializer",
     "CartItemSerializer",
     "CartSerializer",
+    "CartSummarySerializer",
+    "CartMutationSerializer",
     "CartItemWriteSerializer",
     "CartItemDeleteSerializer",
+    "CartItemOperationSerializer",
+    "CartBatchSerializer",
 ]
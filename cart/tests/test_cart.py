@@ -1,10 +1,18 @@
+from decimal import Decimal
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 
-from cart.models import CartItem
+from cart.models import Cart, CartItem
 from products.models import Category, Product
+from products.services import reserve_inventory
 
 
 @override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
@@ -37,6 +45,8 @@ class CartApiTests(TestCase):
         )
         self.assertEqual(response.status_code, 201)
         self.assertEqual(len(response.data["items"]), 1)
+        self.assertEqual(response.data["item_count"], 2)
+        self.assertEqual(response.data["subtotal"], "39.98")
         item = CartItem.objects.get(product=self.product)
         self.assertEqual(item.quantity, 2)
 
@@ -59,4 +69,252 @@ class CartApiTests(TestCase):
             self.url, {"product_id": self.product.id}, format="json"
         )
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["items"], [])
+        self.assertEqual(response.data["item_count"], 0)
         self.assertFalse(CartItem.objects.filter(product=self.product).exists())
+
+    def test_counters_follow_line_changes(self):
+        other = Product.objects.create(
+            product_name="Sample Soap",
+            category=self.category,
+            price="5.00",
+            inventory=10,
+        )
+        self.client.post(
+            self.url, {"product_id": self.product.id, "quantity": 1}, format="json"
+        )
+        self.client.post(
+            self.url, {"product_id": self.product.id, "quantity": 1}, format="json"
+        )
+        self.client.post(
+            self.url, {"product_id": other.id, "quantity": 3}, format="json"
+        )
+        response = self.client.put(
+            self.url, {"product_id": other.id, "quantity": 1}, format="json"
+        )
+
+        self.assertEqual(response.data["item_count"], 3)
+        self.assertEqual(response.data["subtotal"], "44.98")
+        self.assertEqual(
+            [line["product"]["id"] for line in response.data["items"]],
+            [other.id, self.product.id],
+        )
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual((cart.item_count, cart.subtotal), (3, Decimal("44.98")))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["total_price"], "44.98")
+        self.assertEqual(len(response.data["items"]), 2)
+
+        response = self.client.delete(self.url)
+        self.assertEqual(
+            (response.data["item_count"], response.data["subtotal"]), (0, "0.00")
+        )
+
+    def test_mutation_does_not_read_the_cart_back(self):
+        self.client.post(
+            self.url, {"product_id": self.product.id, "quantity": 1}, format="json"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                self.url, {"product_id": self.product.id, "quantity": 1}, format="json"
+            )
+        item_reads = [
+            q
+            for q in queries.captured_queries
+            if q["sql"].startswith("SELECT") and "cart_cartitem" in q["sql"]
+        ]
+        # Only the locked read of the lines; no cart refetch.
+        self.assertEqual(len(item_reads), 1)
+
+    def test_summary_is_a_single_read(self):
+        summary_url = reverse("cart-summary", kwargs={"version": "v1"})
+        self.assertEqual(self.client.get(summary_url).data["item_count"], 0)
+        self.client.post(
+            self.url, {"product_id": self.product.id, "quantity": 2}, format="json"
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(summary_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["item_count"], 2)
+        self.assertEqual(response.data["subtotal"], "39.98")
+        cart_queries = [q for q in queries.captured_queries if "cart_cart" in q["sql"]]
+        self.assertEqual(len(cart_queries), 1)
+        self.assertNotIn(
+            "cart_cartitem", " ".join(q["sql"] for q in queries.captured_queries)
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class CartBatchApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="batcher", password="pass"
+        )  # nosec B106
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name="Bath")
+        self.products = [
+            Product.objects.create(
+                product_name=f"Soap {index}",
+                category=category,
+                price="2.50",
+                inventory=5,
+            )
+            for index in range(30)
+        ]
+        self.url = reverse("cart-items", kwargs={"version": "v1"})
+
+    def _patch(self, items):
+        return self.client.patch(self.url, {"items": items}, format="json")
+
+    def test_applies_many_lines_in_constant_queries(self):
+        items = [{"product_id": p.id, "quantity": 2} for p in self.products]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._patch(items)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["items"]), 30)
+        self.assertEqual(response.data["item_count"], 60)
+        self.assertEqual(response.data["subtotal"], "150.00")
+        self.assertLess(len(queries.captured_queries), 15)
+
+    def test_updates_and_removes_existing_lines(self):
+        first, second, third = self.products[:3]
+        self._patch(
+            [
+                {"product_id": first.id, "quantity": 1},
+                {"product_id": second.id, "quantity": 1},
+            ]
+        )
+
+        response = self._patch(
+            [
+                {"product_id": first.id, "quantity": 4},
+                {"product_id": second.id, "quantity": 0},
+                {"product_id": third.id, "quantity": 1},
+            ]
+        )
+
+        quantities = {
+            item["product"]["id"]: item["quantity"] for item in response.data["items"]
+        }
+        self.assertEqual(quantities, {first.id: 4, third.id: 1})
+        self.assertEqual(response.data["item_count"], 5)
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual(cart.subtotal, Decimal("12.50"))
+
+    def test_rejects_batch_atomically(self):
+        response = self._patch(
+            [
+                {"product_id": self.products[0].id, "quantity": 1},
+                {"product_id": self.products[1].id, "quantity": 6},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["product_ids"], [self.products[1].id])
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_rejects_duplicate_products(self):
+        product_id = self.products[0].id
+        response = self._patch(
+            [
+                {"product_id": product_id, "quantity": 1},
+                {"product_id": product_id, "quantity": 2},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class CartAvailabilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="hot", password="pass"
+        )  # nosec B106
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(
+            product_name="Drop Sneaker",
+            category=Category.objects.create(name="Shoes"),
+            price="120.00",
+            inventory=3,
+        )
+        self.url = reverse("cart", kwargs={"version": "v1"})
+
+    def _add(self, quantity=1):
+        return self.client.post(
+            self.url,
+            {"product_id": self.product.id, "quantity": quantity},
+            format="json",
+        )
+
+    def test_add_to_cart_reads_the_cached_snapshot(self):
+        self._add()
+        with CaptureQueriesContext(connection) as queries:
+            response = self._add()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            any("products_product" in q["sql"] for q in queries.captured_queries)
+        )
+
+    def test_snapshot_is_dropped_when_inventory_changes(self):
+        self._add()
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_inventory({self.product.id: 2})
+
+        response = self._add()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["detail"], "Insufficient inventory.")
+
+    def test_inactive_products_are_rejected(self):
+        self.product.is_active = False
+        self.product.save()
+
+        response = self._add()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["field"], "product_id")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LoadTestCommandTests(LiveServerTestCase):
+    def test_reports_throughput_per_worker_count(self):
+        product = Product.objects.create(
+            product_name="Hot Item",
+            category=Category.objects.create(name="Hot"),
+            price="1.00",
+            inventory=2,
+        )
+        User = get_user_model()
+        earlier = User.objects.create_user(
+            username="loadtest-cart-0", email="earlier@example.com"
+        )
+        out = StringIO()
+
+        call_command(
+            "loadtest_add_to_cart",
+            str(product.pk),
+            # The live server shares one SQLite connection across its threads,
+            # so concurrent shoppers need a real database to measure.
+            workers="1",
+            requests=5,
+            base_url=self.live_server_url,
+            cleanup=True,
+            stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[1].split()[:3], ["1", "5", "0"])
+        self.assertFalse(Cart.objects.exists())
+        self.assertEqual(
+            list(User.objects.filter(username__startswith="loadtest-cart-")),
+            [earlier],
+        )
@@ -0,0 +1,152 @@
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from cart.guest import (
+    RedisGuestCartStore,
+    guest_cart_store,
+    merge_guest_cart,
+    new_cart_token,
+)
+from cart.models import Cart, CartItem
+from products.models import Category, Product
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class GuestCartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        category = Category.objects.create(name="Skincare")
+        self.lotion = Product.objects.create(
+            product_name="Sample Lotion", category=category, price="19.99", inventory=5
+        )
+        self.soap = Product.objects.create(
+            product_name="Sample Soap", category=category, price="5.00", inventory=10
+        )
+        self.url = reverse("cart-guest", kwargs={"version": "v1"})
+        self.user = get_user_model().objects.create_user(
+            username="buyer",
+            email="buyer@example.com",
+            password="pass",
+            email_verified=True,
+        )  # nosec B106
+
+    def _add(self, product, quantity, token=None):
+        headers = {"HTTP_X_CART_TOKEN": token} if token else {}
+        return self.client.post(
+            self.url,
+            {"product_id": product.id, "quantity": quantity},
+            format="json",
+            **headers,
+        )
+
+    def test_guest_cart_never_writes_cart_tables(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._add(self.lotion, 2)
+            token = response.data["token"]
+            self._add(self.lotion, 1, token)
+            self._add(self.soap, 1, token)
+            response = self.client.get(self.url, HTTP_X_CART_TOKEN=token)
+
+        self.assertEqual(response.data["token"], token)
+        self.assertEqual(response.data["item_count"], 4)
+        self.assertEqual(response.data["subtotal"], "64.97")
+        self.assertFalse(any("cart_" in q["sql"] for q in queries.captured_queries))
+        self.assertFalse(Cart.objects.exists())
+
+    def test_rejects_quantities_above_inventory(self):
+        token = self._add(self.lotion, 4).data["token"]
+        response = self._add(self.lotion, 2, token)
+        self.assertEqual(response.status_code, 400)
+
+    def test_tampered_token_starts_a_new_cart(self):
+        token = self._add(self.lotion, 1).data["token"]
+        response = self.client.get(self.url, HTTP_X_CART_TOKEN=token[:-1] + "x")
+        self.assertIsNone(response.data["token"])
+        self.assertEqual(response.data["items"], [])
+
+    def test_remove_line(self):
+        token = self._add(self.lotion, 1).data["token"]
+        self._add(self.soap, 1, token)
+        response = self.client.delete(
+            self.url,
+            {"product_id": self.lotion.id},
+            format="json",
+            HTTP_X_CART_TOKEN=token,
+        )
+        self.assertEqual(
+            [item["product"]["id"] for item in response.data["items"]], [self.soap.id]
+        )
+
+    def test_non_object_body_is_rejected(self):
+        token = self._add(self.lotion, 1).data["token"]
+
+        response = self.client.delete(
+            self.url, [self.lotion.id], format="json", HTTP_X_CART_TOKEN=token
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.delete(self.url, [self.lotion.id], format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_redis_add_increments_in_one_script(self):
+        client = MagicMock()
+        store = RedisGuestCartStore(client)
+
+        client.eval.return_value = [2, 1]
+        self.assertEqual(store.add("abc", self.lotion.id, 3, 5), (2, 5))
+        args = client.eval.call_args.args
+        self.assertEqual(args[1:6], (1, "cart:guest:abc", self.lotion.id, 3, 5))
+        client.eval.return_value = [4, 0]
+        self.assertIsNone(store.add("abc", self.lotion.id, 3, 5))
+        client.hset.assert_not_called()
+
+    def test_login_merges_guest_cart(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(
+            cart=cart, product=self.lotion, quantity=3, unit_price="19.99"
+        )
+        token = self._add(self.lotion, 4).data["token"]
+        self._add(self.soap, 2, token)
+
+        response = self.client.post(
+            reverse("login", kwargs={"version": "v1"}),
+            {"email": "buyer@example.com", "password": "pass"},  # nosec B106
+            format="json",
+            HTTP_X_CART_TOKEN=token,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        quantities = dict(cart.items.values_list("product_id", "quantity"))
+        # Summed, then capped at the lotion's inventory of 5.
+        self.assertEqual(quantities, {self.lotion.id: 5, self.soap.id: 2})
+        cart.refresh_from_db()
+        self.assertEqual((cart.item_count, cart.subtotal), (7, Decimal("109.95")))
+        self.assertEqual(guest_cart_store().lines(token.split(":")[0]), {})
+
+    def test_merge_claims_the_guest_cart_once(self):
+        token = self._add(self.soap, 2).data["token"]
+
+        self.assertIsNotNone(merge_guest_cart(self.user, token))
+        self.assertIsNone(merge_guest_cart(self.user, token))
+        self.assertEqual(CartItem.objects.get(product=self.soap).quantity, 2)
+        self.assertIsNone(merge_guest_cart(self.user, new_cart_token()))
+
+    def test_merge_endpoint(self):
+        token = self._add(self.soap, 1).data["token"]
+        self.client.force_authenticate(self.user)
+
+        response = self.client.post(
+            reverse("cart-guest-merge", kwargs={"version": "v1"}),
+            HTTP_X_CART_TOKEN=token,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["item_count"], 1)
@@ -1,20 +1,36 @@
+from decimal import Decimal
+
 from django.db import connection, transaction
-from django.shortcuts import get_object_or_404
+from django.db.models import prefetch_related_objects
+from django.http import Http404
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from cart.guest import (
+    cart_id_for_token,
+    guest_cart_store,
+    merge_guest_cart,
+    new_cart_token,
+    token_from_request,
+)
 from cart.models import Cart, CartItem
 from cart.serializers import (
+    CartBatchSerializer,
     CartItemDeleteSerializer,
+    CartItemProductSerializer,
     CartItemWriteSerializer,
+    CartMutationSerializer,
     CartSerializer,
+    CartSummarySerializer,
 )
-from products.models import Product
+from products import cache as catalog_cache
 
 
-class CartView(APIView):
+class CartBaseView(APIView):
     permission_classes = [IsAuthenticated]
 
     def _for_update(self, queryset):
@@ -22,14 +38,43 @@ class CartView(APIView):
             return queryset.select_for_update()
         return queryset
 
-    def _get_cart(self, user) -> Cart:
-        cart, _ = Cart.objects.get_or_create(user=user)
+    def _get_cart(self, user, lock: bool = False) -> Cart:
+        queryset = self._for_update(Cart.objects) if lock else Cart.objects
+        cart, _ = queryset.get_or_create(user=user)
         return cart
 
     def _serialize_cart(self, cart: Cart) -> Response:
-        cart = Cart.objects.prefetch_related("items__product").get(pk=cart.pk)
+        prefetch_related_objects([cart], "items__product")
         return Response(CartSerializer(cart).data)
 
+
+class CartView(CartBaseView):
+    """Read and change the user's cart.
+
+    Mutations check price and availability against the cached product
+    snapshot instead of locking the product row, so shoppers adding the same
+    product never wait on each other; checkout enforces inventory against
+    the locked rows. Only the user's own cart and line rows are locked. The
+    cart's ``item_count``/``subtotal`` counters are kept in step, and the
+    response is built from the lines read under the lock, with products from
+    the same snapshots, without reading the cart back.
+    """
+
+    def _lines(self, cart: Cart) -> dict[int, CartItem]:
+        """Lock the cart's lines and return them keyed by product id."""
+        return {item.product_id: item for item in self._for_update(cart.items.all())}
+
+    def _mutation_response(
+        self, cart: Cart, lines: dict[int, CartItem], status_code=status.HTTP_200_OK
+    ) -> Response:
+        products = catalog_cache.get_availability(lines)
+        for product_id, item in lines.items():
+            if product_id in products:
+                item.product = products[product_id]
+        items = sorted(lines.values(), key=lambda item: item.added_at, reverse=True)
+        data = CartMutationSerializer(cart, context={"items": items}).data
+        return Response(data, status=status_code)
+
     def get(self, request, *args, **kwargs):
         cart = self._get_cart(request.user)
         return self._serialize_cart(cart)
@@ -41,7 +86,6 @@ class CartView(APIView):
         quantity = serializer.validated_data["quantity"]
 
         with transaction.atomic():
-            product = self._for_update(Product.objects).get(pk=product.pk)
             if not product.is_published():
                 return Response(
                     {"detail": "Product is unavailable."},
@@ -53,27 +97,35 @@ class CartView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            cart = self._get_cart(request.user)
-            item, created = self._for_update(CartItem.objects).get_or_create(
-                cart=cart,
-                product=product,
-                defaults={"quantity": quantity, "unit_price": product.price},
-            )
-            if not created:
+            cart = self._get_cart(request.user, lock=True)
+            lines = self._lines(cart)
+            item = lines.get(product.id)
+            created = item is None
+            if item is None:
+                item = CartItem.objects.create(
+                    cart=cart,
+                    product=product,
+                    quantity=quantity,
+                    unit_price=product.price,
+                )
+                lines[product.id] = item
+                cart.adjust_totals(quantity, item.line_total)
+            else:
                 new_quantity = item.quantity + quantity
                 if new_quantity > product.inventory:
                     return Response(
                         {"detail": "Insufficient inventory."},
                         status=status.HTTP_400_BAD_REQUEST,
                     )
+                previous_total = item.line_total
                 item.quantity = new_quantity
                 item.unit_price = product.price
                 item.save(update_fields=["quantity", "unit_price", "updated_at"])
-            cart.touch()
+                cart.adjust_totals(quantity, item.line_total - previous_total)
 
-        response = self._serialize_cart(cart)
-        response.status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
-        return response
+        return self._mutation_response(
+            cart, lines, status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
 
     def put(self, request, *args, **kwargs):
         serializer = CartItemWriteSerializer(data=request.data)
@@ -82,7 +134,6 @@ class CartView(APIView):
         quantity = serializer.validated_data["quantity"]
 
         with transaction.atomic():
-            product = self._for_update(Product.objects).get(pk=product.pk)
             if not product.is_published():
                 return Response(
                     {"detail": "Product is unavailable."},
@@ -94,14 +145,20 @@ class CartView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            cart = self._get_cart(request.user)
-            item = get_object_or_404(CartItem, cart=cart, product=product)
+            cart = self._get_cart(request.user, lock=True)
+            lines = self._lines(cart)
+            item = lines.get(product.id)
+            if item is None:
+                raise Http404
+            previous_quantity, previous_total = item.quantity, item.line_total
             item.quantity = quantity
             item.unit_price = product.price
             item.save(update_fields=["quantity", "unit_price", "updated_at"])
-            cart.touch()
+            cart.adjust_totals(
+                quantity - previous_quantity, item.line_total - previous_total
+            )
 
-        return self._serialize_cart(cart)
+        return self._mutation_response(cart, lines)
 
     def delete(self, request, *args, **kwargs):
         if request.data:
@@ -111,10 +168,256 @@ class CartView(APIView):
         else:
             product = None
 
-        cart = self._get_cart(request.user)
-        if product:
-            CartItem.objects.filter(cart=cart, product=product).delete()
-        else:
-            cart.items.all().delete()
-        cart.touch()
+        with transaction.atomic():
+            cart = self._get_cart(request.user, lock=True)
+            if product:
+                lines = self._lines(cart)
+                item = lines.pop(product.id, None)
+                if item is not None:
+                    item.delete()
+                    cart.adjust_totals(-item.quantity, -item.line_total)
+            else:
+                cart.clear()
+                lines = {}
+        return self._mutation_response(cart, lines)
+
+
+class CartItemsView(CartBaseView):
+    """Apply many quantity changes to the cart in one transaction.
+
+    Like single-line mutations, availability is checked against the cached
+    product snapshots and only the cart and its lines are locked, in the
+    same order as checkout, so batches never wait on or deadlock with
+    checkouts. Lines are written with one ``bulk_create``, one
+    ``bulk_update`` and one delete.
+    """
+
+    def patch(self, request, *args, **kwargs):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantities = {
+            item["product_id"]: item["quantity"]
+            for item in serializer.validated_data["items"]
+        }
+
+        products = catalog_cache.get_availability(quantities)
+        with transaction.atomic():
+            unavailable = sorted(
+                product_id
+                for product_id, quantity in quantities.items()
+                if quantity
+                and (
+                    product_id not in products
+                    or not products[product_id].is_published()
+                )
+            )
+            if unavailable:
+                return Response(
+                    {"detail": "Product is unavailable.", "product_ids": unavailable},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            short = sorted(
+                product_id
+                for product_id, quantity in quantities.items()
+                if quantity and quantity > products[product_id].inventory
+            )
+            if short:
+                return Response(
+                    {"detail": "Insufficient inventory.", "product_ids": short},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            cart = self._get_cart(request.user, lock=True)
+            lines = {
+                item.product_id: item
+                for item in self._for_update(
+                    CartItem.objects.filter(cart=cart, product_id__in=quantities)
+                )
+            }
+            now = timezone.now()
+            created, updated, removed = [], [], []
+            quantity_delta, amount_delta = 0, Decimal("0.00")
+            for product_id, quantity in quantities.items():
+                item = lines.get(product_id)
+                if item is not None:
+                    quantity_delta -= item.quantity
+                    amount_delta -= item.line_total
+                if quantity == 0:
+                    if item is not None:
+                        removed.append(item.pk)
+                    continue
+                product = products[product_id]
+                if item is None:
+                    item = CartItem(
+                        cart=cart,
+                        product=product,
+                        quantity=quantity,
+                        unit_price=product.price,
+                    )
+                    created.append(item)
+                else:
+                    item.quantity = quantity
+                    item.unit_price = product.price
+                    item.updated_at = now
+                    updated.append(item)
+                quantity_delta += item.quantity
+                amount_delta += item.line_total
+
+            if created:
+                CartItem.objects.bulk_create(created)
+            if updated:
+                CartItem.objects.bulk_update(
+                    updated, ["quantity", "unit_price", "updated_at"]
+                )
+            if removed:
+                CartItem.objects.filter(pk__in=removed).delete()
+            cart.adjust_totals(quantity_delta, amount_delta)
+
         return self._serialize_cart(cart)
+
+
+class CartSummaryView(APIView):
+    """Item count and subtotal for header badges, read from the cart row."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        cart = (
+            Cart.objects.filter(user=request.user)
+            .only("id", "item_count", "subtotal", "updated_at")
+            .first()
+        )
+        return Response(CartSummarySerializer(cart or Cart()).data)
+
+
+class GuestCartView(APIView):
+    """Cart for anonymous shoppers, stored in Redis behind a signed token.
+
+    The token is returned with every response and read back from the
+    ``X-Cart-Token`` header. Products are read through the availability
+    cache, so a warm cache serves guest carts without database queries.
+    """
+
+    authentication_classes: list[type[BaseAuthentication]] = []
+    permission_classes = [AllowAny]
+
+    def _cart_id(self, request, create: bool = False):
+        token = token_from_request(request)
+        cart_id = cart_id_for_token(token)
+        if cart_id is None and create:
+            token = new_cart_token()
+            cart_id = cart_id_for_token(token)
+        return token if cart_id else None, cart_id
+
+    def _response(self, token, lines, status_code=status.HTTP_200_OK) -> Response:
+        products = catalog_cache.get_availability(lines).values()
+        items = []
+        item_count = 0
+        subtotal = Decimal("0.00")
+        for product in products:
+            quantity = lines[product.id]
+            line_total = product.price * quantity
+            items.append(
+                {
+                    "product": CartItemProductSerializer(product).data,
+                    "quantity": quantity,
+                    "unit_price": str(product.price),
+                    "line_total": str(line_total),
+                }
+            )
+            item_count += quantity
+            subtotal += line_total
+        return Response(
+            {
+                "token": token,
+                "items": items,
+                "item_count": item_count,
+                "subtotal": str(subtotal),
+            },
+            status=status_code,
+        )
+
+    def _validate(self, product, quantity):
+        if not product.is_published():
+            return Response(
+                {"detail": "Product is unavailable."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if quantity > product.inventory:
+            return Response(
+                {"detail": "Insufficient inventory."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return None
+
+    def get(self, request, *args, **kwargs):
+        token, cart_id = self._cart_id(request)
+        lines = guest_cart_store().lines(cart_id) if cart_id else {}
+        return self._response(token, lines)
+
+    def post(self, request, *args, **kwargs):
+        serializer = CartItemWriteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        product = serializer.validated_data["product"]
+        quantity = serializer.validated_data["quantity"]
+        error = self._validate(product, quantity)
+        if error:
+            return error
+        token, cart_id = self._cart_id(request, create=True)
+        store = guest_cart_store()
+        added = store.add(cart_id, product.id, quantity, product.inventory)
+        if added is None:
+            return Response(
+                {"detail": "Insufficient inventory."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        previous, _ = added
+        return self._response(
+            token,
+            store.lines(cart_id),
+            status.HTTP_201_CREATED if not previous else status.HTTP_200_OK,
+        )
+
+    def put(self, request, *args, **kwargs):
+        serializer = CartItemWriteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        product = serializer.validated_data["product"]
+        quantity = serializer.validated_data["quantity"]
+        token, cart_id = self._cart_id(request)
+        store = guest_cart_store()
+        lines = store.lines(cart_id) if cart_id else {}
+        if product.id not in lines:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        error = self._validate(product, quantity)
+        if error:
+            return error
+        store.set_quantity(cart_id, product.id, quantity)
+        lines[product.id] = quantity
+        return self._response(token, lines)
+
+    def delete(self, request, *args, **kwargs):
+        token, cart_id = self._cart_id(request)
+        if cart_id is None:
+            return self._response(None, {})
+        store = guest_cart_store()
+        if request.data:
+            serializer = CartItemDeleteSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            store.remove(cart_id, serializer.validated_data["product"].id)
+            lines = store.lines(cart_id)
+        else:
+            store.remove(cart_id)
+            lines = {}
+        return self._response(token, lines)
+
+
+class GuestCartMergeView(APIView):
+    """Merge the guest cart named by ``X-Cart-Token`` into the user's cart."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        merge_guest_cart(request.user, token_from_request(request))
+        cart, _ = Cart.objects.get_or_create(user=request.user)
+        prefetch_related_objects([cart], "items__product")
+        return Response(CartSerializer(cart).data)
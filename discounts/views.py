@@ -4,8 +4,8 @@ from rest_framework import generics, status, viewsets
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from authentication.jwt import CachedJWTAuthentication
 from backend.permissions import IsAdminOrReadOnly
 from discounts.models import Discount, DiscountRedemption
 from discounts.serializers import DiscountPublicSerializer, DiscountSerializer
@@ -24,7 +24,7 @@ class DiscountViewSet(viewsets.ModelViewSet):
 
 
 class DiscountValidateAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
@@ -1,14 +1,179 @@
-"""Client for interacting with the external ERP system."""
+"""Client for interacting with the external ERP system.
+
+All requests go through one shared :class:`requests.Session` whose connection
+pool is sized for concurrent callers and which retries transient failures
+with exponential backoff. A process-wide circuit breaker stops calling the
+ERP for a while after repeated failures so a sync run fails fast instead of
+waiting out thousands of timeouts.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Iterable
 
-from typing import Any
 import requests  # type: ignore[import-untyped]
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.utils.dateparse import parse_datetime
+from requests.adapters import HTTPAdapter  # type: ignore[import-untyped]
+from urllib3.util.retry import Retry
 
 
 class ERPClientError(Exception):
     """Raised when the ERP client encounters an error."""
 
 
+class ERPCircuitOpenError(ERPClientError):
+    """Raised instead of calling the ERP while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Trip after ``failure_threshold`` consecutive failures.
+
+    While open every call is rejected; after ``reset_timeout`` seconds a
+    single trial call is let through and its outcome closes or re-opens the
+    circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+_session: requests.Session | None = None
+_breaker: CircuitBreaker | None = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the shared ERP session, constructing it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                retry = Retry(
+                    total=getattr(settings, "ERP_MAX_RETRIES", 3),
+                    backoff_factor=getattr(settings, "ERP_RETRY_BACKOFF", 0.5),
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=None,
+                    raise_on_status=False,
+                )
+                pool_size = getattr(settings, "ERP_MAX_CONNECTIONS", 16)
+                adapter = HTTPAdapter(
+                    pool_connections=pool_size,
+                    pool_maxsize=pool_size,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                api_key = getattr(settings, "ERP_API_KEY", "")
+                if api_key:
+                    session.headers["Authorization"] = f"Bearer {api_key}"
+                _session = session
+    return _session
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        with _lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    failure_threshold=getattr(
+                        settings, "ERP_CIRCUIT_BREAKER_THRESHOLD", 10
+                    ),
+                    reset_timeout=getattr(settings, "ERP_CIRCUIT_BREAKER_RESET", 30),
+                )
+    return _breaker
+
+
+def reset_client() -> None:
+    """Drop the shared session and circuit breaker."""
+    global _session, _breaker
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _breaker = None
+
+
+def _reset_on_setting_change(*, setting, **kwargs):
+    if setting.startswith("ERP_"):
+        reset_client()
+
+
+setting_changed.connect(_reset_on_setting_change)
+
+
+def _base_url() -> str:
+    base_url = getattr(settings, "ERP_API_URL", "").rstrip("/")
+    if not base_url:
+        raise ERPClientError("ERP_API_URL is not configured")
+    return base_url
+
+
+def _request(method: str, path: str, **kwargs) -> Any:
+    """Send a request through the shared session and circuit breaker."""
+    url = f"{_base_url()}{path}"
+    breaker = get_circuit_breaker()
+    if not breaker.allow():
+        raise ERPCircuitOpenError("ERP circuit breaker is open")
+    try:
+        response = get_session().request(
+            method, url, timeout=getattr(settings, "ERP_TIMEOUT", 5), **kwargs
+        )
+    except requests.RequestException as exc:
+        breaker.record_failure()
+        raise ERPClientError(str(exc)) from exc
+    if response.status_code >= 500 or response.status_code == 429:
+        breaker.record_failure()
+    else:
+        # Client errors such as an unknown SKU don't mean the ERP is down.
+        breaker.record_success()
+    try:
+        response.raise_for_status()
+        return response.json()
+    except (requests.RequestException, ValueError) as exc:
+        raise ERPClientError(str(exc)) from exc
+
+
 def get_inventory(product_id: str) -> int:
     """Fetch inventory level for ``product_id`` from the ERP system.
 
@@ -18,20 +183,58 @@ def get_inventory(product_id: str) -> int:
     Returns:
         The available inventory level for the product.
     """
-    base_url = getattr(settings, "ERP_API_URL", "").rstrip("/")
-    if not base_url:
-        raise ERPClientError("ERP_API_URL is not configured")
+    data = _request("GET", f"/inventory/{product_id}")
+    try:
+        return int(data.get("inventory", 0))
+    except (AttributeError, TypeError, ValueError) as exc:
+        raise ERPClientError(f"Malformed inventory payload: {data!r}") from exc
 
-    url = f"{base_url}/inventory/{product_id}"
-    headers = {}
-    api_key = getattr(settings, "ERP_API_KEY", "")
-    if api_key:
-        headers["Authorization"] = f"Bearer {api_key}"
 
+def _parse_levels(items: Any) -> dict[str, int]:
     try:
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        data: Any = response.json()
-        return int(data.get("inventory", 0))
-    except requests.RequestException as exc:  # pragma: no cover - network issues
-        raise ERPClientError(str(exc)) from exc
+        return {str(item["id"]): int(item["inventory"]) for item in items}
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ERPClientError(f"Malformed inventory payload: {items!r}") from exc
+
+
+def get_inventory_batch(product_ids: Iterable[str]) -> dict[str, int]:
+    """Fetch inventory levels for several products with one request.
+
+    Calls ``POST /inventory/batch`` with ``{"ids": [...]}`` and expects
+    ``{"items": [{"id": ..., "inventory": ...}, ...]}``. Ids the ERP does not
+    know are simply absent from the result.
+    """
+    data = _request("POST", "/inventory/batch", json={"ids": list(product_ids)})
+    return _parse_levels(data.get("items", []) if isinstance(data, dict) else None)
+
+
+def get_inventory_changes(
+    changed_since: datetime | None = None, cursor: str | None = None
+) -> tuple[dict[str, int], str | None, datetime | None]:
+    """Fetch one page of inventory levels changed after ``changed_since``.
+
+    Calls ``GET /inventory?changed_since=<iso>[&cursor=...]`` and returns
+    ``(levels, next_cursor, high_water_mark)``. ``next_cursor`` is ``None`` on
+    the last page; ``high_water_mark`` is the ERP's timestamp to pass as
+    ``changed_since`` on the next run.
+    """
+    params = {}
+    if changed_since is not None:
+        params["changed_since"] = changed_since.isoformat()
+    if cursor:
+        params["cursor"] = cursor
+    data = _request("GET", "/inventory", params=params)
+    if not isinstance(data, dict):
+        raise ERPClientError(f"Malformed inventory payload: {data!r}")
+    high_water_mark = None
+    if data.get("high_water_mark"):
+        high_water_mark = parse_datetime(str(data["high_water_mark"]))
+        if high_water_mark is None:
+            raise ERPClientError(
+                f"Malformed high-water mark: {data['high_water_mark']!r}"
+            )
+    return (
+        _parse_levels(data.get("items", [])),
+        data.get("next_cursor"),
+        high_water_mark,
+    )
@@ -0,0 +1,96 @@
+import asyncio
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.exceptions import StopConsumer
+from channels.generic.http import AsyncHttpConsumer
+from django.conf import settings
+
+from .services import (
+    format_event,
+    missed_notifications,
+    notification_group,
+    parse_last_event_id,
+)
+
+SSE_HEADERS = [
+    (b"Content-Type", b"text/event-stream"),
+    (b"Cache-Control", b"no-cache"),
+    (b"X-Accel-Buffering", b"no"),
+]
+
+
+class NotificationStreamConsumer(AsyncHttpConsumer):
+    """Stream the authenticated user's notifications as Server-Sent Events.
+
+    The stream subscribes to the user's channel-layer group and stays idle
+    until a notification is published to it. Only a reconnect carrying
+    ``Last-Event-ID`` (or ``?last_id=``) queries the database, to replay what
+    was missed in between.
+    """
+
+    group_name = None
+    last_id = None
+    heartbeat = None
+
+    async def handle(self, body):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.send_response(
+                401,
+                b'{"detail": "Authentication credentials were not provided."}',
+                headers=[(b"Content-Type", b"application/json")],
+            )
+            raise StopConsumer()
+
+        headers = dict(self.scope.get("headers", []))
+        query = parse_qs(self.scope.get("query_string", b"").decode("latin-1"))
+        self.last_id = parse_last_event_id(
+            headers.get(b"last-event-id") or query.get("last_id", [None])[0]
+        )
+        # Subscribe before replaying so nothing published in between is lost;
+        # events already replayed are skipped by id.
+        self.group_name = notification_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.send_headers(status=200, headers=SSE_HEADERS)
+        retry = getattr(settings, "NOTIFICATIONS_STREAM_RETRY_MS", 3000)
+        await self.send_body(f"retry: {retry}\n\n".encode(), more_body=True)
+
+        if self.last_id is not None:
+            missed = await database_sync_to_async(missed_notifications)(
+                user.pk, self.last_id
+            )
+            for notification in missed:
+                await self._send_event(notification["id"], notification["message"])
+
+        self.heartbeat = asyncio.ensure_future(self._heartbeat())
+
+    async def http_request(self, message):
+        # The base class closes the consumer once handle() returns; a stream
+        # stays open until the client disconnects.
+        if "body" in message:
+            self.body.append(message["body"])
+        if not message.get("more_body"):
+            await self.handle(b"".join(self.body))
+
+    async def disconnect(self):
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+        if self.group_name is not None:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_created(self, event):
+        if self.last_id is not None and event["id"] <= self.last_id:
+            return
+        await self._send_event(event["id"], event["message"])
+
+    async def _send_event(self, event_id, message):
+        self.last_id = event_id
+        await self.send_body(format_event(event_id, message).encode(), more_body=True)
+
+    async def _heartbeat(self):
+        # Comment lines keep proxies from closing idle connections.
+        interval = getattr(settings, "NOTIFICATIONS_STREAM_HEARTBEAT", 15)
+        while True:
+            await asyncio.sleep(interval)
+            await self.send_body(b": keepalive\n\n", more_body=True)
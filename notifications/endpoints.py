@@ -1,7 +1,12 @@
-from django.urls import path
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
 
-from .views import notifications_stream
+from .views import NotificationViewSet, notifications_stream
+
+router = DefaultRouter()
+router.register(r"", NotificationViewSet, basename="notification")
 
 urlpatterns = [
     path("stream/", notifications_stream, name="notifications-stream"),
+    path("", include(router.urls)),
 ]
@@ -10,6 +10,28 @@ class Notification(models.Model):
     )
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Serves the per-user keyset listing and stream catch-up queries.
+            models.Index(fields=["user", "id"], name="idx_notification_user_id"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return self.message
+
+
+class NotificationCounter(models.Model):
+    """Denormalized count of a user's unread notifications."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="notification_counter",
+    )
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.user_id}: {self.unread}"
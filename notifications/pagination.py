@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NotificationCursorPagination(CursorPagination):
+    """Newest-first keyset pagination over the ``(user, id)`` index.
+
+    ``id`` is unique, so each page is a plain ``id < cursor`` range scan with
+    no OFFSET and no COUNT query.
+    """
+
+    ordering = "-id"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,12 @@
+from django.urls import re_path
+
+from backend.channels_auth import JWTAuthMiddlewareStack
+
+from .consumers import NotificationStreamConsumer
+
+http_urlpatterns = [
+    re_path(
+        r"^api/(?P<version>[^/]+)/notifications/stream/$",
+        JWTAuthMiddlewareStack(NotificationStreamConsumer.as_asgi()),
+    ),
+]
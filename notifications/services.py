@@ -0,0 +1,197 @@
+"""Creating, counting, publishing and replaying notifications.
+
+Each user's open streams subscribe to one channel-layer group. A new
+notification is pushed to that group once its transaction commits, so idle
+streams cost no database queries; the database is only read to replay what
+a reconnecting client missed after its ``Last-Event-ID``.
+
+Unread notifications are counted in :class:`NotificationCounter` rows, kept
+in step with the notifications in the same transaction, and cached per user
+so badge counts are a single cache or primary-key read.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterable
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter
+
+logger = logging.getLogger(__name__)
+
+
+def notification_group(user_id: int) -> str:
+    return f"notifications_{user_id}"
+
+
+def notification_event(notification: Notification) -> dict[str, Any]:
+    """Return the channel-layer message announcing ``notification``."""
+    return {
+        "type": "notification.created",
+        "id": notification.pk,
+        "message": notification.message,
+    }
+
+
+def publish_notification(notification: Notification) -> None:
+    """Push ``notification`` to the streams of its user."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:  # pragma: no cover - channels not configured
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            notification_group(notification.user_id),
+            notification_event(notification),
+        )
+    except Exception:
+        # Streams catch up from the database on reconnect, so a channel layer
+        # outage must not fail the write that created the notification.
+        logger.warning(
+            "Could not publish notification %s.", notification.pk, exc_info=True
+        )
+
+
+def format_event(event_id: int, message: str) -> str:
+    """Format one Server-Sent Event, splitting multi-line messages."""
+    data = "".join(f"data: {line}\n" for line in message.split("\n"))
+    return f"id: {event_id}\n{data}\n"
+
+
+def parse_last_event_id(value: str | bytes | None) -> int | None:
+    if isinstance(value, bytes):
+        value = value.decode("latin-1")
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def missed_notifications(user_id: int, last_id: int) -> list[dict[str, Any]]:
+    """Return the user's notifications after ``last_id`` for a reconnect."""
+    limit = getattr(settings, "NOTIFICATIONS_STREAM_CATCHUP_LIMIT", 500)
+    return list(
+        Notification.objects.filter(user_id=user_id, id__gt=last_id)
+        .order_by("id")
+        .values("id", "message")[:limit]
+    )
+
+
+def _unread_cache_key(user_id: int) -> str:
+    return f"notifications:unread:{user_id}"
+
+
+def _invalidate_unread(user_ids: Iterable[int]) -> None:
+    try:
+        cache.delete_many([_unread_cache_key(user_id) for user_id in user_ids])
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Could not invalidate unread counters.", exc_info=True)
+
+
+def _invalidate_unread_now_and_on_commit(user_ids: list[int]) -> None:
+    _invalidate_unread(user_ids)
+    transaction.on_commit(lambda: _invalidate_unread(user_ids))
+
+
+def increment_unread(user_ids: list[int]) -> None:
+    """Add one unread notification to each user's counter.
+
+    Must run in the transaction that creates the notifications; the cached
+    counts are dropped now and again once it commits.
+    """
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    NotificationCounter.objects.filter(user_id__in=user_ids).update(
+        unread=F("unread") + 1
+    )
+    _invalidate_unread_now_and_on_commit(user_ids)
+
+
+def unread_count(user_id: int) -> int:
+    """Return the user's unread notification count."""
+    key = _unread_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = (
+            NotificationCounter.objects.filter(user_id=user_id)
+            .values_list("unread", flat=True)
+            .first()
+        ) or 0
+        cache.set(key, count, getattr(settings, "NOTIFICATIONS_UNREAD_CACHE_TTL", 300))
+    return count
+
+
+def mark_read(user_id: int, ids: Iterable[int] | None = None) -> int:
+    """Mark the user's notifications (all, or ``ids``) read; return how many."""
+    with transaction.atomic():
+        queryset = Notification.objects.filter(user_id=user_id, read_at__isnull=True)
+        if ids is not None:
+            queryset = queryset.filter(id__in=list(ids))
+        updated = queryset.update(read_at=timezone.now())
+        if updated:
+            NotificationCounter.objects.filter(user_id=user_id).update(
+                unread=Greatest(F("unread") - updated, 0)
+            )
+            _invalidate_unread_now_and_on_commit([user_id])
+    return updated
+
+
+def _publish_many(notifications: list[Notification]) -> None:
+    for notification in notifications:
+        # Backends that don't return ids from bulk inserts leave pk unset;
+        # those notifications reach streams through the reconnect catch-up.
+        if notification.pk is not None:
+            publish_notification(notification)
+
+
+def broadcast_notification(
+    message: str,
+    recipients: QuerySet | None = None,
+    chunk_size: int | None = None,
+) -> int:
+    """Create ``message`` for every recipient and return how many were sent.
+
+    ``recipients`` defaults to active users who opted in to marketing. Their
+    ids are walked in primary-key order in chunks; each chunk is one bulk
+    insert plus two counter statements in its own transaction, so a large
+    broadcast never holds locks or memory for the whole audience.
+    """
+    if recipients is None:
+        recipients = get_user_model().objects.filter(
+            marketing_opt_in=True, is_active=True
+        )
+    if chunk_size is None:
+        chunk_size = getattr(settings, "NOTIFICATIONS_BROADCAST_CHUNK_SIZE", 5000)
+    ids = recipients.order_by("pk").values_list("pk", flat=True)
+
+    sent = 0
+    last_id = None
+    while True:
+        chunk = ids if last_id is None else ids.filter(pk__gt=last_id)
+        user_ids = list(chunk[:chunk_size])
+        if not user_ids:
+            break
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create(
+                [Notification(user_id=user_id, message=message) for user_id in user_ids]
+            )
+            increment_unread(user_ids)
+            transaction.on_commit(
+                lambda notifications=notifications: _publish_many(notifications)
+            )
+        sent += len(user_ids)
+        last_id = user_ids[-1]
+
+    logger.info("Broadcast notification to %s users.", sent)
+    return sent
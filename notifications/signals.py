@@ -0,0 +1,16 @@
+"""Signal handlers for the notifications app."""
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Notification
+from .services import increment_unread, publish_notification
+
+
+@receiver(post_save, sender=Notification)
+def publish_created_notification(sender, instance, created, **kwargs):
+    """Count new notifications and push them to open streams on commit."""
+    if created:
+        increment_unread([instance.user_id])
+        transaction.on_commit(lambda: publish_notification(instance))
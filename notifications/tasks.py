@@ -0,0 +1,3 @@
+from backend.tasks.notifications import send_broadcast_notification
+
+__all__ = ["send_broadcast_notification"]
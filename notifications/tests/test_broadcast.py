@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from rest_framework.test import APIClient
+
+from notifications.models import Notification, NotificationCounter
+from notifications.services import broadcast_notification, mark_read, unread_count
+
+
+def _create_user(username, **extra):
+    return get_user_model().objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password=get_random_string(12),
+        **extra,
+    )
+
+
+class BroadcastTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.opted_in = [
+            _create_user(f"fan{index}", marketing_opt_in=True) for index in range(5)
+        ]
+        self.opted_out = _create_user("quiet")
+        _create_user("gone", marketing_opt_in=True, is_active=False)
+
+    def test_broadcast_bulk_creates_in_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                sent = broadcast_notification("Sale!", chunk_size=2)
+
+        self.assertEqual(sent, 5)
+        self.assertEqual(
+            set(Notification.objects.values_list("user_id", flat=True)),
+            {user.pk for user in self.opted_in},
+        )
+        inserts = [
+            q
+            for q in queries.captured_queries
+            if 'INSERT INTO "notifications_notification"' in q["sql"]
+        ]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(unread_count(self.opted_in[0].pk), 1)
+        self.assertEqual(unread_count(self.opted_out.pk), 0)
+
+    def test_counter_tracks_creates_and_reads(self):
+        user = self.opted_in[0]
+        self.assertEqual(unread_count(user.pk), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = Notification.objects.create(user=user, message="one")
+            Notification.objects.create(user=user, message="two")
+            broadcast_notification("three")
+        self.assertEqual(unread_count(user.pk), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(mark_read(user.pk, [first.pk]), 1)
+            self.assertEqual(mark_read(user.pk, [first.pk]), 0)
+        self.assertEqual(unread_count(user.pk), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(mark_read(user.pk), 2)
+        self.assertEqual(unread_count(user.pk), 0)
+        self.assertEqual(NotificationCounter.objects.get(user=user).unread, 0)
+
+    def test_unread_count_is_served_from_cache(self):
+        user = self.opted_in[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=user, message="hi")
+        unread_count(user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(user.pk), 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class NotificationApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = _create_user("reader", marketing_opt_in=True)
+        self.other = _create_user("other")
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notifications = [
+                Notification.objects.create(user=self.user, message=f"n{index}")
+                for index in range(5)
+            ]
+            Notification.objects.create(user=self.other, message="private")
+        self.url = reverse("notification-list", kwargs={"version": "v1"})
+
+    def test_list_is_keyset_paginated_newest_first(self):
+        response = self.client.get(self.url, {"page_size": 3})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["message"] for item in response.data["results"]],
+            ["n4", "n3", "n2"],
+        )
+        self.assertNotIn("count", response.data)
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [item["message"] for item in response.data["results"]], ["n1", "n0"]
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_mark_read_and_unread_count(self):
+        count_url = reverse("notification-unread-count", kwargs={"version": "v1"})
+        self.assertEqual(self.client.get(count_url).data, {"unread": 5})
+
+        response = self.client.post(
+            reverse("notification-mark-read", kwargs={"version": "v1"}),
+            {"ids": [self.notifications[0].pk, self.notifications[1].pk]},
+            format="json",
+        )
+
+        self.assertEqual(response.data, {"marked": 2, "unread": 3})
+        self.assertEqual(self.client.get(count_url).data, {"unread": 3})
+
+    def test_broadcast_requires_admin(self):
+        url = reverse("notification-broadcast", kwargs={"version": "v1"})
+        response = self.client.post(url, {"message": "Sale"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        admin = get_user_model().objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )  # nosec B106
+        self.client.force_authenticate(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"message": "Sale"}, format="json")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(
+            Notification.objects.filter(user=self.user, message="Sale").exists()
+        )
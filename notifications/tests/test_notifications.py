@@ -1,32 +1,152 @@
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
 from django.contrib.auth import get_user_model
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, TransactionTestCase
 from django.utils.crypto import get_random_string
+from rest_framework_simplejwt.tokens import AccessToken
 
+from backend.asgi import application
 from notifications.models import Notification
+from notifications.services import format_event, notification_group
 from notifications.views import _event_stream, notifications_stream
 
 
+def _create_user(username):
+    return get_user_model().objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password=get_random_string(12),
+    )
+
+
 class NotificationStreamTests(TestCase):
     def setUp(self) -> None:
-        self.user = get_user_model().objects.create_user(
-            username="user",
-            email="user@example.com",
-            password=get_random_string(12),
-        )
+        self.user = _create_user("user")
+        self.other = _create_user("other")
+
+    def test_event_stream_yields_users_notifications_and_ends(self) -> None:
+        first = Notification.objects.create(user=self.user, message="hello")
+        Notification.objects.create(user=self.other, message="not yours")
+        second = Notification.objects.create(user=self.user, message="line\nbreak")
 
-    def test_event_stream_yields_notifications(self) -> None:
-        Notification.objects.create(user=self.user, message="hello")
-        generator = _event_stream(None)
-        self.assertIn("id:", next(generator))
-        self.assertEqual(next(generator), "data: hello\n\n")
+        events = list(_event_stream(self.user.pk, None))
+
+        self.assertTrue(events[0].startswith("retry:"))
+        self.assertEqual(
+            events[1:],
+            [
+                f"id: {first.id}\ndata: hello\n\n",
+                f"id: {second.id}\ndata: line\ndata: break\n\n",
+            ],
+        )
+        self.assertEqual(list(_event_stream(self.user.pk, second.id))[1:], [])
 
     def test_notifications_stream_view(self) -> None:
         Notification.objects.create(user=self.user, message="ping")
         request = RequestFactory().get("/notifications/stream/")
+        request.user = self.user
         response = notifications_stream(request)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response["Content-Type"], "text/event-stream")
         stream = response.streaming_content
-        # Consume id and data lines
+        # Consume the retry directive
         next(stream)
-        self.assertEqual(next(stream).decode(), "data: ping\n\n")
+        self.assertIn(b"data: ping\n\n", next(stream))
+
+    def test_notifications_stream_view_requires_authentication(self) -> None:
+        request = RequestFactory().get("/notifications/stream/")
+        self.assertEqual(notifications_stream(request).status_code, 401)
+
+    def test_created_notification_is_published_to_user_group(self) -> None:
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(
+            notification_group(self.user.pk), channel
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(user=self.user, message="hi")
+
+        event = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(
+            event,
+            {"type": "notification.created", "id": notification.id, "message": "hi"},
+        )
+
+
+class NotificationStreamConsumerTests(TransactionTestCase):
+    def setUp(self) -> None:
+        self.user = _create_user("streamer")
+        self.other = _create_user("bystander")
+
+    def _communicator(self, token=None, last_event_id=None):
+        headers = []
+        if token:
+            headers.append((b"authorization", f"Bearer {token}".encode()))
+        if last_event_id is not None:
+            headers.append((b"last-event-id", str(last_event_id).encode()))
+        return ApplicationCommunicator(
+            application,
+            {
+                "type": "http",
+                "http_version": "1.1",
+                "method": "GET",
+                "path": "/api/v1/notifications/stream/",
+                "query_string": b"",
+                "headers": headers,
+            },
+        )
+
+    async def _open(self, communicator):
+        await communicator.send_input({"type": "http.request", "body": b""})
+        start = await communicator.receive_output(1)
+        retry = await communicator.receive_output(1)
+        self.assertEqual(start["status"], 200)
+        self.assertTrue(retry["body"].startswith(b"retry:"))
+
+    async def _close(self, communicator):
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait(1)
+
+    async def test_stream_requires_authentication(self):
+        communicator = self._communicator()
+        await communicator.send_input({"type": "http.request", "body": b""})
+
+        start = await communicator.receive_output(1)
+        await communicator.receive_output(1)
+
+        self.assertEqual(start["status"], 401)
+        await communicator.wait(1)
+
+    async def test_new_notifications_are_pushed_to_their_user_only(self):
+        communicator = self._communicator(token=str(AccessToken.for_user(self.user)))
+        await self._open(communicator)
+
+        create = database_sync_to_async(Notification.objects.create)
+        await create(user=self.other, message="not yours")
+        notification = await create(user=self.user, message="shipped")
+
+        body = await communicator.receive_output(1)
+        self.assertEqual(
+            body["body"], format_event(notification.id, "shipped").encode()
+        )
+        self.assertTrue(await communicator.receive_nothing(0.1))
+        await self._close(communicator)
+
+    async def test_reconnect_replays_events_after_last_event_id(self):
+        create = database_sync_to_async(Notification.objects.create)
+        seen = await create(user=self.user, message="seen")
+        missed = await create(user=self.user, message="missed")
+        await create(user=self.other, message="not yours")
+
+        communicator = self._communicator(
+            token=str(AccessToken.for_user(self.user)), last_event_id=seen.id
+        )
+        await self._open(communicator)
+
+        body = await communicator.receive_output(1)
+        self.assertEqual(body["body"], format_event(missed.id, "missed").encode())
+        self.assertTrue(await communicator.receive_nothing(0.1))
+        await self._close(communicator)
@@ -1,37 +1,110 @@
 from collections.abc import Iterator
 from typing import Optional
-import time
 
-from django.http import StreamingHttpResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from authentication.jwt import CachedJWTAuthentication
+from backend.serializers.notifications import (
+    NotificationBroadcastSerializer,
+    NotificationMarkReadSerializer,
+    NotificationSerializer,
+)
 
 from .models import Notification
+from .pagination import NotificationCursorPagination
+from .services import (
+    format_event,
+    mark_read,
+    missed_notifications,
+    parse_last_event_id,
+    unread_count,
+)
+from .tasks import send_broadcast_notification
 
 
-def _event_stream(last_id: Optional[int]) -> Iterator[str]:
-    """Yield server-sent events for notifications after ``last_id``."""
+def _event_stream(user_id: int, last_id: Optional[int]) -> Iterator[str]:
+    """Yield server-sent events for the user's notifications after ``last_id``.
 
-    current_id = last_id or 0
-    while True:
-        for notification in Notification.objects.filter(id__gt=current_id).order_by(
-            "id"
-        ):
-            current_id = notification.id
-            yield f"id: {current_id}\n"
-            yield f"data: {notification.message}\n\n"
-        time.sleep(1)
+    The stream ends after one query and tells the client when to reconnect,
+    so a synchronous worker is never held open. Under ASGI the request is
+    routed to :class:`notifications.consumers.NotificationStreamConsumer`,
+    which pushes events as they are created instead.
+    """
 
+    retry = getattr(settings, "NOTIFICATIONS_STREAM_RETRY_MS", 3000)
+    yield f"retry: {retry}\n\n"
+    for notification in missed_notifications(user_id, last_id or 0):
+        yield format_event(notification["id"], notification["message"])
 
-def notifications_stream(request):
-    """Stream notifications to the client using Server-Sent Events."""
 
-    last_id_param = request.GET.get("last_id")
+def _authenticated_user(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user
     try:
-        last_id: Optional[int] = int(last_id_param) if last_id_param else None
-    except ValueError:
-        last_id = None
+        result = CachedJWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
+
+def notifications_stream(request, version=None):
+    """Stream notifications to the client using Server-Sent Events."""
+
+    user = _authenticated_user(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    last_id = parse_last_event_id(
+        request.headers.get("Last-Event-ID") or request.GET.get("last_id")
+    )
 
     response = StreamingHttpResponse(
-        _event_stream(last_id), content_type="text/event-stream"
+        _event_stream(user.pk, last_id), content_type="text/event-stream"
     )
     response["Cache-Control"] = "no-cache"
     return response
+
+
+class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """List the user's notifications and manage their read state."""
+
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationCursorPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_permissions(self):
+        if self.action == "broadcast":
+            return [IsAdminUser()]
+        return [IsAuthenticated()]
+
+    def get_queryset(self):
+        return Notification.objects.filter(user=self.request.user)
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request, *args, **kwargs):
+        return Response({"unread": unread_count(request.user.pk)})
+
+    @action(detail=False, methods=["post"], url_path="mark-read")
+    def mark_read(self, request, *args, **kwargs):
+        serializer = NotificationMarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        marked = mark_read(request.user.pk, serializer.validated_data.get("ids"))
+        return Response({"marked": marked, "unread": unread_count(request.user.pk)})
+
+    @action(detail=False, methods=["post"])
+    def broadcast(self, request, *args, **kwargs):
+        serializer = NotificationBroadcastSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        send_broadcast_notification.delay(serializer.validated_data["message"])
+        return Response(
+            {"detail": "Broadcast queued."}, status=status.HTTP_202_ACCEPTED
+        )
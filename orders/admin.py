@@ -1,7 +1,8 @@
 # orders/admin.py
 
 from django.contrib import admin
-from .models import Order, OrderItem, ShipmentWebhookEvent
+from .models import Order, OrderItem, OrderOutboxEvent, ShipmentWebhookEvent
+from .outbox import dead_letters, retry_events
 
 
 class OrderItemInline(admin.TabularInline):
@@ -24,3 +25,43 @@ class ShipmentWebhookEventAdmin(admin.ModelAdmin):
     list_filter = ("status", "received_at")
     search_fields = ("event_id", "order__id")
     ordering = ("-received_at",)
+
+
+class DeadLetterFilter(admin.SimpleListFilter):
+    title = "dead letter"
+    parameter_name = "dead_letter"
+
+    def lookups(self, request, model_admin):
+        return (("yes", "Yes"),)
+
+    def queryset(self, request, queryset):
+        if self.value() == "yes":
+            return dead_letters(queryset)
+        return queryset
+
+
+@admin.register(OrderOutboxEvent)
+class OrderOutboxEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "order",
+        "effect",
+        "attempts",
+        "available_at",
+        "processed_at",
+        "last_error",
+    )
+    list_filter = (
+        DeadLetterFilter,
+        "effect",
+        ("processed_at", admin.EmptyFieldListFilter),
+    )
+    search_fields = ("order__id",)
+    readonly_fields = ("created_at",)
+    ordering = ("-id",)
+    actions = ["retry"]
+
+    @admin.action(description="Retry selected undelivered events")
+    def retry(self, request, queryset):
+        count = retry_events(queryset)
+        self.message_user(request, f"{count} events queued for delivery.")
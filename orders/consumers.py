@@ -13,3 +13,14 @@ class OrderStatusConsumer(AsyncJsonWebsocketConsumer):
 
     async def status_update(self, event):
         await self.send_json({"status": event["status"]})
+
+    async def payment_intent_ready(self, event):
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated or user.id != event["user_id"]:
+            return
+        await self.send_json(
+            {
+                "payment_intent_id": event["payment_intent_id"],
+                "client_secret": event["client_secret"],
+            }
+        )
@@ -0,0 +1,345 @@
+"""Invoice rendering, storage and delivery.
+
+An invoice is rendered from a plain ``invoice_data`` dict, so the same code
+runs in a Celery worker, in a process pool for bulk exports or inline. The
+PDF is stored in default storage under ``invoices/<order id>/<digest>.pdf``
+where the digest hashes the invoice data and the layout version: an order
+whose invoice-relevant fields have not changed maps to the same file and is
+never rendered twice, and any change yields a new name (and ETag). Files are
+streamed back, or handed to the front proxy with ``X-Accel-Redirect`` when
+``INVOICE_ACCEL_REDIRECT_PREFIX`` is set.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import zipfile
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import IO, Any, cast
+
+import django
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout changes so stored invoices are re-rendered.
+LAYOUT_VERSION = 1
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN = 50
+LINE_HEIGHT = 16
+HEADER_LINES = 6
+FOOTER_LINES = 2
+NAME_LENGTH = 55
+
+
+def _address(address) -> list[str] | None:
+    if address is None:
+        return None
+    region = " ".join(part for part in (address.state, address.zip_code) if part)
+    return [address.street, f"{address.city} {region}".strip(), address.country]
+
+
+def invoice_data(order: Order) -> dict[str, Any]:
+    """Return everything printed on ``order``'s invoice as plain values.
+
+    Select ``user``, ``shipping_address`` and ``billing_address`` and
+    prefetch ``items`` to build it without further queries.
+    """
+    user = order.user
+    return {
+        "order_id": order.id,
+        "created_at": order.created_at.date().isoformat(),
+        "customer": user.get_full_name() or user.username,
+        "email": user.email,
+        "currency": order.currency.upper(),
+        "shipping_address": _address(order.shipping_address),
+        "billing_address": _address(order.billing_address),
+        "items": [
+            {
+                "name": item.product_name,
+                "quantity": item.quantity,
+                "unit_price": str(item.unit_price),
+                "line_total": str(item.unit_price * item.quantity),
+            }
+            for item in order.items.all()
+        ],
+        "shipping_cost": str(order.shipping_cost),
+        "tax_amount": str(order.tax_amount),
+        "discount_code": order.discount_code,
+        "discount_amount": (
+            str(order.discount_amount) if order.discount_amount is not None else None
+        ),
+        "total_price": str(order.total_price),
+    }
+
+
+def invoice_digest(data: dict[str, Any]) -> str:
+    payload = json.dumps({"layout": LAYOUT_VERSION, **data}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def invoice_path(order_id: int, digest: str) -> str:
+    return f"invoices/{order_id}/{digest}.pdf"
+
+
+def _body_lines(data: dict[str, Any]) -> list[tuple]:
+    """Lines below the page header as ``(style, *columns)`` tuples."""
+    lines: list[tuple] = []
+    for title, key in (("Bill to", "billing_address"), ("Ship to", "shipping_address")):
+        if data[key]:
+            lines.append(("bold", title))
+            lines.extend(("text", line) for line in data[key])
+            lines.append(("blank",))
+    lines.append(("columns", "Item", "Qty", "Unit price", "Amount"))
+    for item in data["items"]:
+        name = item["name"]
+        if len(name) > NAME_LENGTH:
+            name = name[: NAME_LENGTH - 1] + "…"
+        lines.append(
+            ("row", name, str(item["quantity"]), item["unit_price"], item["line_total"])
+        )
+    lines.append(("blank",))
+    lines.append(("total", "Shipping", data["shipping_cost"]))
+    lines.append(("total", "Tax", data["tax_amount"]))
+    if data["discount_amount"] is not None:
+        label = (
+            f"Discount ({data['discount_code']})"
+            if data["discount_code"]
+            else "Discount"
+        )
+        lines.append(("total", label, f"-{data['discount_amount']}"))
+    lines.append(("grand", f"Total ({data['currency']})", data["total_price"]))
+    return lines
+
+
+def _draw_line(pdf, y: float, line: tuple) -> None:
+    style, *columns = line
+    if style == "blank":
+        return
+    if style in {"bold", "columns", "grand"}:
+        pdf.setFont("Helvetica-Bold", 10)
+    else:
+        pdf.setFont("Helvetica", 10)
+    if style in {"bold", "text"}:
+        pdf.drawString(MARGIN, y, columns[0])
+    elif style in {"columns", "row"}:
+        name, quantity, unit_price, amount = columns
+        pdf.drawString(MARGIN, y, name)
+        pdf.drawRightString(380, y, quantity)
+        pdf.drawRightString(470, y, unit_price)
+        pdf.drawRightString(PAGE_WIDTH - MARGIN, y, amount)
+    else:
+        label, amount = columns
+        pdf.drawRightString(470, y, label)
+        pdf.drawRightString(PAGE_WIDTH - MARGIN, y, amount)
+
+
+def render_invoice_pdf(data: dict[str, Any]) -> tuple[bytes, int]:
+    """Render ``data`` and return the PDF bytes and its page count.
+
+    Lines flow onto as many pages as needed; every page repeats the header
+    and is numbered.
+    """
+    lines = _body_lines(data)
+    per_page = (
+        int((PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT) - HEADER_LINES - FOOTER_LINES
+    )
+    pages = [
+        lines[start : start + per_page] for start in range(0, len(lines), per_page)
+    ]
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    pdf.setTitle(f"Invoice {data['order_id']}")
+    for number, page in enumerate(pages, start=1):
+        y = PAGE_HEIGHT - MARGIN
+        pdf.setFont("Helvetica-Bold", 16)
+        pdf.drawString(MARGIN, y, f"Invoice for Order #{data['order_id']}")
+        pdf.setFont("Helvetica", 10)
+        y -= LINE_HEIGHT * 1.5
+        pdf.drawString(MARGIN, y, f"Date: {data['created_at']}")
+        y -= LINE_HEIGHT
+        pdf.drawString(MARGIN, y, f"Customer: {data['customer']} <{data['email']}>")
+        y -= LINE_HEIGHT * (HEADER_LINES - 3.5)
+        for line in page:
+            _draw_line(pdf, y, line)
+            y -= LINE_HEIGHT
+        pdf.setFont("Helvetica", 8)
+        pdf.drawRightString(
+            PAGE_WIDTH - MARGIN, MARGIN, f"Page {number} of {len(pages)}"
+        )
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue(), len(pages)
+
+
+def invoice_orders():
+    """Orders with everything :func:`invoice_data` reads loaded up front."""
+    return Order.objects.select_related(
+        "user", "shipping_address", "billing_address"
+    ).prefetch_related("items")
+
+
+def _prune_invoices(order_id: int, keep: str) -> None:
+    directory = f"invoices/{order_id}"
+    try:
+        _, files = default_storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):  # pragma: no cover
+        files = []
+    for name in files:
+        if name != f"{keep}.pdf":
+            default_storage.delete(f"{directory}/{name}")
+
+
+def store_invoice(order: Order) -> tuple[str, str]:
+    """Store ``order``'s invoice unless it is already stored.
+
+    Returns ``(path, digest)``. Rendering only happens when no invoice exists
+    for the current digest. Invoices stored for earlier versions of the order
+    are removed afterwards, but only once the order is re-read and still has
+    this digest, so a worker holding a stale order never deletes the invoice
+    another worker stored for a newer version.
+    """
+    data = invoice_data(order)
+    digest = invoice_digest(data)
+    path = invoice_path(order.id, digest)
+    if default_storage.exists(path):
+        return path, digest
+
+    content, pages = render_invoice_pdf(data)
+    saved = default_storage.save(path, ContentFile(content))
+    if saved != path:
+        # Another worker stored the same invoice first.
+        default_storage.delete(saved)
+    logger.info("Rendered %s-page invoice for order %s.", pages, order.id)
+
+    current = invoice_orders().filter(pk=order.id).first()
+    if current is not None and invoice_digest(invoice_data(current)) == digest:
+        _prune_invoices(order.id, keep=digest)
+    return path, digest
+
+
+@dataclass
+class ExportStats:
+    invoices: int = 0
+    pages: int = 0
+    bytes: int = 0
+
+
+def _render_entry(data: dict[str, Any]) -> tuple[str, bytes, int]:
+    pdf, pages = render_invoice_pdf(data)
+    return f"invoice_{data['order_id']}.pdf", pdf, pages
+
+
+def render_invoices(
+    snapshots: Iterable[dict[str, Any]], workers: int = 1
+) -> Iterator[tuple[str, bytes, int]]:
+    """Yield ``(filename, pdf, pages)`` for each snapshot, in order.
+
+    With several workers, rendering runs in a process pool (reportlab holds
+    the GIL). Only a few snapshots per worker are in flight at a time, so
+    memory does not grow with the number of invoices.
+    """
+    if workers <= 1:
+        for data in snapshots:
+            yield _render_entry(data)
+        return
+
+    window = workers * 4
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending: deque = deque()
+        for data in snapshots:
+            pending.append(pool.submit(_render_entry, data))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class _ZipStream:
+    """Write-only file object whose contents are drained after each entry."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_invoices(
+    orders: Iterable[Order], *, workers: int = 1, stats: ExportStats | None = None
+) -> Iterator[bytes]:
+    """Yield a ZIP archive of the invoices of ``orders`` piece by piece.
+
+    ``orders`` should come from :func:`invoice_orders`, ideally through
+    ``iterator()``. Each piece holds one invoice, so the archive can be
+    streamed to a response or a file without building it in memory.
+    ``stats`` is updated as invoices are written.
+    """
+    stats = stats if stats is not None else ExportStats()
+    stream = _ZipStream()
+    # Page streams are already compressed; deflating them again only costs CPU.
+    with zipfile.ZipFile(
+        cast(IO[bytes], stream), "w", compression=zipfile.ZIP_STORED
+    ) as archive:
+        snapshots = (invoice_data(order) for order in orders)
+        for filename, pdf, pages in render_invoices(snapshots, workers):
+            archive.writestr(filename, pdf)
+            stats.invoices += 1
+            stats.pages += pages
+            chunk = stream.drain()
+            stats.bytes += len(chunk)
+            yield chunk
+    chunk = stream.drain()
+    stats.bytes += len(chunk)
+    yield chunk
+
+
+def etag_matches(request, digest: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return f'"{digest}"' in tags or "*" in tags
+
+
+def invoice_response(path: str, order_id: int, digest: str) -> HttpResponse:
+    """Serve a stored invoice, through the front proxy when configured."""
+    filename = f"invoice_{order_id}.pdf"
+    prefix = getattr(settings, "INVOICE_ACCEL_REDIRECT_PREFIX", "")
+    if prefix:
+        response = HttpResponse(content_type="application/pdf")
+        response["X-Accel-Redirect"] = f"{prefix.rstrip('/')}/{path}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(
+            default_storage.open(path, "rb"),
+            as_attachment=True,
+            filename=filename,
+            content_type="application/pdf",
+        )
+    response["ETag"] = f'"{digest}"'
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,125 @@
+"""Management command exporting the invoices of many orders as one ZIP."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders.invoices import ExportStats, export_invoices, invoice_orders
+from orders.models import Order
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError as exc:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD.") from exc
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the invoices of the orders placed in a date range into a ZIP "
+        "archive. Orders are streamed from the database and rendered in a "
+        "process pool, so memory stays flat however many orders match."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the ZIP file to write.")
+        parser.add_argument(
+            "--from",
+            dest="since",
+            help="First order date to include (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--to",
+            dest="until",
+            help="Last order date to include (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=Order.Status.values,
+            help="Only export orders in this status; may be repeated.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Rendering processes; 1 renders in this process.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Orders fetched from the database per query.",
+        )
+        parser.add_argument(
+            "--storage",
+            action="store_true",
+            help="Save the archive to default storage under OUTPUT instead of "
+            "the local filesystem.",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--workers and --chunk-size must be positive.")
+        self.verbosity = options["verbosity"]
+
+        orders = invoice_orders().order_by("id")
+        if options["since"]:
+            since = datetime.combine(_parse_date(options["since"]), datetime.min.time())
+            orders = orders.filter(created_at__gte=timezone.make_aware(since))
+        if options["until"]:
+            until = datetime.combine(
+                _parse_date(options["until"]) + timedelta(days=1),
+                datetime.min.time(),
+            )
+            orders = orders.filter(created_at__lt=timezone.make_aware(until))
+        if options["status"]:
+            orders = orders.filter(status__in=options["status"])
+
+        stats = ExportStats()
+        started = time.perf_counter()
+        chunks = export_invoices(
+            orders.iterator(chunk_size=options["chunk_size"]),
+            workers=options["workers"],
+            stats=stats,
+        )
+        if options["storage"]:
+            with tempfile.TemporaryFile() as archive:
+                self._write(archive, chunks, stats)
+                archive.seek(0)
+                location = default_storage.save(options["output"], File(archive))
+        else:
+            with open(options["output"], "wb") as archive:
+                self._write(archive, chunks, stats)
+            location = options["output"]
+        elapsed = time.perf_counter() - started
+
+        rate = stats.pages / elapsed if elapsed else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {stats.invoices} invoices ({stats.pages} pages, "
+                f"{stats.bytes / 1_048_576:.1f} MB) to {location} in "
+                f"{elapsed:.1f}s: {rate:.1f} pages/s."
+            )
+        )
+
+    def _write(self, archive, chunks, stats: ExportStats) -> None:
+        started = time.perf_counter()
+        reported = 0
+        for chunk in chunks:
+            archive.write(chunk)
+            if self.verbosity > 1 and stats.invoices - reported >= 1000:
+                reported = stats.invoices
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{stats.invoices} invoices, {stats.pages / elapsed:.1f} pages/s"
+                )
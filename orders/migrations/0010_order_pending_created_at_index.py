@@ -0,0 +1,22 @@
+# Generated by Django 4.2.27 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0008_alter_order_discount_amount_and_more"),
+        ("orders", "0009_order_preferred_delivery_date"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["created_at"],
+                name="idx_order_pending_created_at",
+            ),
+        ),
+    ]
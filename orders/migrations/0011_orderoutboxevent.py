@@ -0,0 +1,68 @@
+# Generated by Django 4.2.27 on 2026-10-18 15:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0010_order_pending_created_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderOutboxEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "effect",
+                    models.CharField(
+                        choices=[
+                            ("release_inventory", "Release inventory"),
+                            ("status_sms", "Status SMS"),
+                            ("status_websocket", "Status websocket"),
+                            ("invoice", "Invoice"),
+                            ("confirmation_email", "Confirmation email"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("payload", models.JSONField(blank=True, default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="outbox_events",
+                        to="orders.order",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("processed_at__isnull", True)),
+                        fields=["available_at"],
+                        name="idx_order_outbox_pending",
+                    )
+                ],
+            },
+        ),
+    ]
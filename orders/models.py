@@ -3,6 +3,7 @@
 from django.db import models
 from django.conf import settings
 from django.db.models import Q
+from django.utils import timezone
 from authentication.models import Address  # Adjust import if Address is elsewhere
 
 
@@ -69,6 +70,7 @@ class Order(models.Model):
     )
     is_gift = models.BooleanField(default=False)
     gift_message = models.CharField(max_length=500, blank=True)
+    preferred_delivery_date = models.DateField(blank=True, null=True)
     is_deleted = models.BooleanField(default=False)
 
     objects = ActiveOrderManager()
@@ -80,7 +82,13 @@ class Order(models.Model):
                 fields=["user", "-created_at"],
                 name="idx_order_user_created_at",
                 condition=Q(is_deleted=False),
-            )
+            ),
+            # Stale pending orders are claimed for auto-cancellation by age.
+            models.Index(
+                fields=["created_at"],
+                name="idx_order_pending_created_at",
+                condition=Q(status="pending"),
+            ),
         ]
 
     def __str__(self):
@@ -124,3 +132,38 @@ class ShipmentWebhookEvent(models.Model):
 
     def __str__(self):
         return f"ShipmentWebhookEvent {self.event_id} for order {self.order_id}"
+
+
+class OrderOutboxEvent(models.Model):
+    """A side effect of an order change, stored in the change's transaction."""
+
+    class Effect(models.TextChoices):
+        RELEASE_INVENTORY = "release_inventory", "Release inventory"
+        STATUS_SMS = "status_sms", "Status SMS"
+        STATUS_WEBSOCKET = "status_websocket", "Status websocket"
+        INVOICE = "invoice", "Invoice"
+        CONFIRMATION_EMAIL = "confirmation_email", "Confirmation email"
+
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="outbox_events"
+    )
+    effect = models.CharField(max_length=32, choices=Effect.choices)
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The relay only ever scans undelivered events.
+            models.Index(
+                fields=["available_at"],
+                name="idx_order_outbox_pending",
+                condition=Q(processed_at__isnull=True),
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_effect_display()} for order #{self.order_id}"
@@ -0,0 +1,236 @@
+"""Transactional outbox for order side effects.
+
+Placing an order or changing its status stores the effects it implies as
+``OrderOutboxEvent`` rows in the same transaction, so the request or webhook
+only pays for one INSERT and no effect is lost if the process dies right
+after commit. ``relay_outbox`` (the ``relay_order_outbox`` beat task) claims
+due events with ``SELECT ... FOR UPDATE SKIP LOCKED``, dispatches them and
+records the outcome. Failed events are retried with exponential backoff up
+to ``ORDER_OUTBOX_MAX_ATTEMPTS`` times; events that exhaust their attempts
+are dead letters, counted in ``order_outbox_dead_letters_total`` and listed
+by the admin's "Dead letter" filter, from where they can be retried.
+
+Inventory releases of a batch are applied with one UPDATE in the transaction
+that marks their events processed, so they happen exactly once. Messages
+(SMS, email, websocket) and invoices are delivered at least once.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from prometheus_client import Counter
+
+from orders.models import Order, OrderItem, OrderOutboxEvent
+from orders.tasks import (
+    generate_order_invoice,
+    send_order_confirmation_email,
+    send_order_status_sms,
+)
+from products.services import release_inventory
+
+logger = logging.getLogger(__name__)
+
+ORDER_OUTBOX_DEAD_LETTERS = Counter(
+    "order_outbox_dead_letters_total",
+    "Order outbox events given up on after ORDER_OUTBOX_MAX_ATTEMPTS",
+    ["effect"],
+)
+
+Effect = OrderOutboxEvent.Effect
+
+_RELEASING_STATUSES = {Order.Status.CANCELED, Order.Status.FAILED}
+
+
+def _status_events(
+    order_id: int, status: str, phone_number: str | None
+) -> list[OrderOutboxEvent]:
+    events = [
+        OrderOutboxEvent(
+            order_id=order_id,
+            effect=Effect.STATUS_WEBSOCKET,
+            payload={"status": status},
+        )
+    ]
+    if phone_number:
+        events.append(
+            OrderOutboxEvent(
+                order_id=order_id,
+                effect=Effect.STATUS_SMS,
+                payload={"status": status, "phone_number": phone_number},
+            )
+        )
+    return events
+
+
+def record_status_change(order: Order, previous_status: str, new_status: str) -> None:
+    """Store the effects of ``order`` moving from ``previous_status``."""
+    events = _status_events(
+        order.id, new_status, getattr(order.user, "phone_number", None)
+    )
+    if previous_status not in _RELEASING_STATUSES and new_status in _RELEASING_STATUSES:
+        events.append(
+            OrderOutboxEvent(order_id=order.id, effect=Effect.RELEASE_INVENTORY)
+        )
+    if new_status == Order.Status.PROCESSING:
+        events.append(OrderOutboxEvent(order_id=order.id, effect=Effect.INVOICE))
+    OrderOutboxEvent.objects.bulk_create(events)
+
+
+def record_status_changes(
+    orders: Iterable[tuple[int, str | None]], new_status: str
+) -> None:
+    """Store status notifications for many ``(order id, phone)`` pairs.
+
+    Used by batch operations that apply inventory changes themselves.
+    """
+    events = []
+    for order_id, phone_number in orders:
+        events.extend(_status_events(order_id, new_status, phone_number))
+    OrderOutboxEvent.objects.bulk_create(events)
+
+
+def record_order_placed(order: Order, email: str) -> None:
+    if email:
+        OrderOutboxEvent.objects.create(
+            order=order,
+            effect=Effect.CONFIRMATION_EMAIL,
+            payload={"email": email},
+        )
+
+
+def _dispatch(event: OrderOutboxEvent) -> None:
+    payload = event.payload
+    if event.effect == Effect.STATUS_SMS:
+        send_order_status_sms.delay(
+            event.order_id, payload["status"], payload["phone_number"]
+        )
+    elif event.effect == Effect.STATUS_WEBSOCKET:
+        async_to_sync(get_channel_layer().group_send)(
+            f"order_{event.order_id}",
+            {"type": "status.update", "status": payload["status"]},
+        )
+    elif event.effect == Effect.INVOICE:
+        generate_order_invoice.delay(event.order_id)
+    elif event.effect == Effect.CONFIRMATION_EMAIL:
+        send_order_confirmation_email.delay(event.order_id, payload["email"])
+    else:
+        raise ValueError(f"Unknown outbox effect {event.effect!r}.")
+
+
+def _release_inventory(order_ids: list[int]) -> None:
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids, product__isnull=False)
+        .values("product_id")
+        .annotate(quantity=Sum("quantity"))
+    )
+    release_inventory({row["product_id"]: row["quantity"] for row in rows})
+
+
+def _max_attempts() -> int:
+    return int(getattr(settings, "ORDER_OUTBOX_MAX_ATTEMPTS", 8))
+
+
+def dead_letters(events=None):
+    """Return the undelivered events (of ``events``) that ran out of attempts."""
+    if events is None:
+        events = OrderOutboxEvent.objects.all()
+    return events.filter(processed_at__isnull=True, attempts__gte=_max_attempts())
+
+
+def retry_events(events) -> int:
+    """Make undelivered ``events`` due again with a fresh set of attempts."""
+    return events.filter(processed_at__isnull=True).update(
+        attempts=0, available_at=timezone.now()
+    )
+
+
+def _fail(event: OrderOutboxEvent, exc: Exception, now) -> None:
+    max_attempts = _max_attempts()
+    delay = int(getattr(settings, "ORDER_OUTBOX_RETRY_DELAY", 10))
+    event.attempts += 1
+    event.last_error = f"{type(exc).__name__}: {exc}"
+    event.available_at = now + timedelta(seconds=delay * 2 ** (event.attempts - 1))
+    if event.attempts >= max_attempts:
+        ORDER_OUTBOX_DEAD_LETTERS.labels(effect=event.effect).inc()
+        logger.error(
+            "Giving up on outbox event %s (%s) for order %s: %s",
+            event.pk,
+            event.effect,
+            event.order_id,
+            event.last_error,
+        )
+    else:
+        logger.warning(
+            "Outbox event %s (%s) failed, retrying: %s",
+            event.pk,
+            event.effect,
+            event.last_error,
+        )
+
+
+def relay_outbox(batch_size: int | None = None) -> int:
+    """Dispatch due outbox events until none are left; return how many.
+
+    Each batch is claimed, dispatched and marked in one transaction, so
+    concurrent relays never handle the same event.
+    """
+    if batch_size is None:
+        batch_size = int(getattr(settings, "ORDER_OUTBOX_BATCH_SIZE", 100))
+    max_attempts = _max_attempts()
+    started = timezone.now()
+    due = OrderOutboxEvent.objects.filter(
+        processed_at__isnull=True,
+        attempts__lt=max_attempts,
+        available_at__lte=started,
+    ).order_by("id")
+    if connection.features.has_select_for_update:
+        due = due.select_for_update(
+            skip_locked=connection.features.has_select_for_update_skip_locked
+        )
+
+    delivered = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            events = list(due.filter(id__gt=last_id)[:batch_size])
+            if not events:
+                break
+            last_id = events[-1].id
+            now = timezone.now()
+
+            releases = [e for e in events if e.effect == Effect.RELEASE_INVENTORY]
+            if releases:
+                try:
+                    with transaction.atomic():
+                        _release_inventory([event.order_id for event in releases])
+                except Exception as exc:
+                    for event in releases:
+                        _fail(event, exc, now)
+                else:
+                    for event in releases:
+                        event.processed_at = now
+
+            for event in events:
+                if event.effect == Effect.RELEASE_INVENTORY:
+                    continue
+                try:
+                    _dispatch(event)
+                except Exception as exc:
+                    _fail(event, exc, now)
+                else:
+                    event.processed_at = now
+
+            OrderOutboxEvent.objects.bulk_update(
+                events, ["processed_at", "attempts", "available_at", "last_error"]
+            )
+        delivered += sum(1 for event in events if event.processed_at)
+    return delivered
@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """Newest-first keyset pagination over ``idx_order_user_created_at``.
+
+    The cursor seeks on ``created_at`` within the user's live orders, the
+    partial index's exact key, so deep pages cost the same as the first one
+    and no COUNT query is issued. ``id`` breaks ties between orders placed in
+    the same instant.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -3,25 +3,29 @@
 from __future__ import annotations
 
 from decimal import Decimal, ROUND_HALF_UP
-from io import BytesIO
 import logging
 from typing import Any
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 import stripe
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
 from django.conf import settings
+from django.core.cache import cache
 from django.db import connection, transaction
-from django.db.models import F
+from django.db.models import F, Sum
 from django.utils import timezone
 
 from cart.models import Cart, CartItem
 from discounts.models import Discount, DiscountRedemption
 from orders.models import Order, OrderItem
-from orders.tasks import send_order_status_sms
+from orders.outbox import (
+    record_order_placed,
+    record_status_change,
+    record_status_changes,
+)
+from orders.tasks import create_order_payment_intent
 from products.models import Product
+from products.services import release_inventory, reserve_inventory
 
 
 logger = logging.getLogger(__name__)
@@ -132,15 +136,32 @@ def _resolve_discount(
     return discount, discount_amount
 
 
-def _create_payment_intent(
-    amount: int, currency: str, user_id: int, idempotency_key: str | None
-):
+def _stripe_secret_key() -> str:
     stripe_secret = getattr(settings, "STRIPE_SECRET_KEY", None)
     if not stripe_secret or stripe_secret == "dummy":
         raise ValueError("Stripe configuration is missing.")
+    return stripe_secret
+
+
+def _async_payment_intents_enabled() -> bool:
+    return bool(getattr(settings, "CHECKOUT_ASYNC_PAYMENT_INTENT", False))
+
+
+def _payment_intent_secret_cache_key(order_id: int) -> str:
+    return f"orders:payment-intent-secret:{order_id}"
 
-    stripe.api_key = stripe_secret
+
+def _create_payment_intent(
+    amount: int,
+    currency: str,
+    user_id: int,
+    idempotency_key: str | None,
+    order_id: int | None = None,
+):
+    stripe.api_key = _stripe_secret_key()
     metadata = {"user_id": str(user_id)}
+    if order_id is not None:
+        metadata["order_id"] = str(order_id)
     if idempotency_key:
         metadata["idempotency_key"] = idempotency_key
 
@@ -174,7 +195,9 @@ def create_order_from_cart(user, data) -> Order:
             user=user, idempotency_key=idempotency_key
         ).first()
         if existing:
-            if not existing.payment_intent_id:
+            if not existing.payment_intent_id and _async_payment_intents_enabled():
+                create_order_payment_intent.delay(existing.id)
+            elif not existing.payment_intent_id:
                 amount = _to_stripe_amount(existing.total_price)
                 payment_intent = _create_payment_intent(
                     amount, existing.currency, user.id, idempotency_key
@@ -218,9 +241,16 @@ def create_order_from_cart(user, data) -> Order:
             raise ValueError("Order total must be greater than zero.")
     amount = _to_stripe_amount(total)
 
-    payment_intent = _create_payment_intent(
-        amount, resolved_currency, user.id, idempotency_key
-    )
+    # In async mode the PaymentIntent is created by a Celery task once the
+    # order exists, keeping Stripe latency out of the request thread.
+    async_payment_intent = _async_payment_intents_enabled()
+    payment_intent = None
+    if async_payment_intent:
+        _stripe_secret_key()
+    else:
+        payment_intent = _create_payment_intent(
+            amount, resolved_currency, user.id, idempotency_key
+        )
 
     try:
         with transaction.atomic():
@@ -262,7 +292,7 @@ def create_order_from_cart(user, data) -> Order:
                 total_price=total,
                 shipping_cost=shipping_cost,
                 tax_amount=tax_amount,
-                payment_intent_id=payment_intent.id,
+                payment_intent_id=payment_intent.id if payment_intent else None,
                 currency=resolved_currency,
                 shipping_address=data.get("shipping_address"),
                 billing_address=data.get("billing_address"),
@@ -289,10 +319,12 @@ def create_order_from_cart(user, data) -> Order:
                 )
 
             OrderItem.objects.bulk_create(order_items)
+            quantities: dict[int, int] = {}
             for item in items:
-                Product.objects.filter(id=item.product_id).update(
-                    inventory=F("inventory") - item.quantity
+                quantities[item.product_id] = (
+                    quantities.get(item.product_id, 0) + item.quantity
                 )
+            reserve_inventory(quantities)
 
             if discount:
                 DiscountRedemption.objects.create(
@@ -302,46 +334,108 @@ def create_order_from_cart(user, data) -> Order:
                     times_used=F("times_used") + 1
                 )
 
-            cart.items.all().delete()
-            cart.touch()
+            cart.clear()
+            record_order_placed(order, user.email)
+
+            if async_payment_intent:
+                order_id = order.id
+                transaction.on_commit(
+                    lambda: create_order_payment_intent.delay(order_id)
+                )
     except Exception:
-        try:
-            stripe.PaymentIntent.cancel(payment_intent.id)
-        except stripe.error.StripeError:
-            logger.warning("Failed to cancel Stripe PaymentIntent %s", payment_intent.id)
+        if payment_intent is not None:
+            try:
+                stripe.PaymentIntent.cancel(payment_intent.id)
+            except stripe.error.StripeError:
+                logger.warning(
+                    "Failed to cancel Stripe PaymentIntent %s", payment_intent.id
+                )
         raise
 
-    _update_payment_intent_metadata(
-        payment_intent.id,
-        {
-            "user_id": str(user.id),
-            "order_id": str(order.id),
-        },
-    )
+    if payment_intent is not None:
+        _update_payment_intent_metadata(
+            payment_intent.id,
+            {
+                "user_id": str(user.id),
+                "order_id": str(order.id),
+            },
+        )
 
     order._created = True
     return order
 
 
-def release_reserved_inventory(order: Order) -> None:
-    items = order.items.select_related("product")
-    for item in items:
-        if item.product_id:
-            Product.objects.filter(id=item.product_id).update(
-                inventory=F("inventory") + item.quantity
-            )
+def attach_payment_intent(order_id: int) -> Order | None:
+    """Create and attach the Stripe PaymentIntent for an async checkout order.
 
+    The order id is part of the PaymentIntent metadata from the start, and the
+    idempotency key is derived from the order so task retries reuse the same
+    PaymentIntent. Once attached, the client secret is cached for polling and
+    pushed to the order's websocket group.
+    """
+    order = Order.objects.filter(id=order_id).first()
+    if not order or order.status != Order.Status.PENDING:
+        return None
+    if order.payment_intent_id:
+        return order
 
-def _send_status_notifications(
-    order_id: int, status: str, phone_number: str | None
-) -> None:
-    if phone_number:
-        send_order_status_sms.delay(order_id, status, phone_number)
+    payment_intent = _create_payment_intent(
+        _to_stripe_amount(order.total_price),
+        order.currency,
+        order.user_id,
+        order.idempotency_key or f"order-{order.id}",
+        order_id=order.id,
+    )
+    updated = Order.objects.filter(id=order.id, payment_intent_id__isnull=True).update(
+        payment_intent_id=payment_intent.id
+    )
+    if not updated:
+        order.refresh_from_db(fields=["payment_intent_id"])
+        return order
+    order.payment_intent_id = payment_intent.id
+
+    client_secret = getattr(payment_intent, "client_secret", None)
+    if client_secret:
+        cache.set(
+            _payment_intent_secret_cache_key(order.id),
+            client_secret,
+            getattr(settings, "CHECKOUT_PAYMENT_INTENT_SECRET_TTL", 3600),
+        )
     channel_layer = get_channel_layer()
     async_to_sync(channel_layer.group_send)(
-        f"order_{order_id}",
-        {"type": "status.update", "status": status},
+        f"order_{order.id}",
+        {
+            "type": "payment_intent.ready",
+            "user_id": order.user_id,
+            "payment_intent_id": payment_intent.id,
+            "client_secret": client_secret,
+        },
     )
+    return order
+
+
+def get_payment_intent_client_secret(order: Order) -> str | None:
+    """Return the client secret for ``order``'s PaymentIntent, if attached."""
+    if not order.payment_intent_id:
+        return None
+    cache_key = _payment_intent_secret_cache_key(order.id)
+    client_secret = cache.get(cache_key)
+    if client_secret:
+        return client_secret
+    stripe.api_key = _stripe_secret_key()
+    try:
+        payment_intent = stripe.PaymentIntent.retrieve(order.payment_intent_id)
+    except stripe.error.StripeError as exc:
+        logger.error("Stripe PaymentIntent retrieval failed: %s", exc)
+        raise ValueError("Payment processing is unavailable.") from exc
+    client_secret = getattr(payment_intent, "client_secret", None)
+    if client_secret:
+        cache.set(
+            cache_key,
+            client_secret,
+            getattr(settings, "CHECKOUT_PAYMENT_INTENT_SECRET_TTL", 3600),
+        )
+    return client_secret
 
 
 def transition_order_status(
@@ -361,52 +455,50 @@ def transition_order_status(
     if not update_fields:
         return order
 
-    order.save(update_fields=update_fields)
-
-    if not status_changed:
-        return order
-
-    phone_number = getattr(order.user, "phone_number", None)
-
-    def _after_commit():
-        if previous_status not in {
-            Order.Status.CANCELED,
-            Order.Status.FAILED,
-        } and new_status in {
-            Order.Status.CANCELED,
-            Order.Status.FAILED,
-        }:
-            release_reserved_inventory(order)
-        _send_status_notifications(order.id, new_status, phone_number)
-
-    transaction.on_commit(_after_commit)
+    with transaction.atomic():
+        order.save(update_fields=update_fields)
+        if status_changed:
+            # Side effects are relayed from the outbox after commit.
+            record_status_change(order, previous_status, new_status)
     return order
 
 
-def generate_invoice_pdf(order: Order) -> bytes:
-    """Generate a simple PDF invoice for the given order."""
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    y = 750
-    p.setFont("Helvetica", 12)
-    p.drawString(50, y, f"Invoice for Order #{order.id}")
-    y -= 25
-    p.drawString(50, y, f"Customer: {order.user.username}")
-    y -= 40
-    p.drawString(50, y, "Items:")
-    y -= 20
-    for item in order.items.all():
-        p.drawString(
-            60,
-            y,
-            f"{item.product_name} (x{item.quantity}) - ${item.unit_price}",
+def cancel_stale_pending_orders(cutoff, *, batch_size: int = 500) -> int:
+    """Cancel pending orders created before ``cutoff`` and return how many.
+
+    Orders are claimed in id order, ``batch_size`` at a time, with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` so rows a payment webhook is
+    working on are left for the next run. Each batch commits on its own:
+    one UPDATE flips the statuses, one UPDATE returns the reserved inventory
+    of every product in the batch, and one INSERT queues the status
+    notifications in the outbox.
+    """
+    stale = Order.objects.filter(
+        status=Order.Status.PENDING, created_at__lt=cutoff
+    ).order_by("id")
+    if connection.features.has_select_for_update:
+        stale = stale.select_for_update(
+            skip_locked=connection.features.has_select_for_update_skip_locked
         )
-        y -= 20
-    y -= 20
-    p.drawString(50, y, f"Total: ${order.total_price}")
-    p.showPage()
-    p.save()
-    pdf = buffer.getvalue()
-    buffer.close()
-    return pdf
+
+    canceled = 0
+    while True:
+        with transaction.atomic():
+            order_ids = list(stale.values_list("id", flat=True)[:batch_size])
+            if not order_ids:
+                break
+            Order.objects.filter(id__in=order_ids).update(status=Order.Status.CANCELED)
+            rows = (
+                OrderItem.objects.filter(order_id__in=order_ids, product__isnull=False)
+                .values("product_id")
+                .annotate(quantity=Sum("quantity"))
+            )
+            release_inventory({row["product_id"]: row["quantity"] for row in rows})
+            record_status_changes(
+                Order.objects.filter(id__in=order_ids).values_list(
+                    "id", "user__phone_number"
+                ),
+                str(Order.Status.CANCELED),
+            )
+        canceled += len(order_ids)
+    return canceled
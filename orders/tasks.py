@@ -2,13 +2,11 @@ from celery import shared_task
 from datetime import timedelta
 import logging
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import send_mail
-from django.db import transaction
 from django.utils import timezone
 from twilio.rest import Client
 
-from orders.models import Order
-
 logger = logging.getLogger(__name__)
 
 @shared_task
@@ -33,36 +31,64 @@ def send_order_status_sms(order_id, status, to_phone):
     client.messages.create(body=message, from_=from_number, to=to_phone)
 
 
+@shared_task(bind=True, max_retries=5, default_retry_delay=10)
+def create_order_payment_intent(self, order_id):
+    """Create the Stripe PaymentIntent for an order placed in async checkout mode."""
+    from orders.services import attach_payment_intent
+
+    try:
+        attach_payment_intent(order_id)
+    except ValueError as exc:
+        logger.warning("PaymentIntent creation for order %s failed: %s", order_id, exc)
+        raise self.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def generate_order_invoice(self, order_id):
+    """Render and store the invoice PDF for an order if it changed."""
+    from orders.invoices import invoice_orders, store_invoice
+
+    order = invoice_orders().filter(pk=order_id).first()
+    if order is None:
+        return None
+    try:
+        path, _ = store_invoice(order)
+    except OSError as exc:
+        logger.warning("Invoice generation for order %s failed: %s", order_id, exc)
+        raise self.retry(exc=exc)
+    return path
+
+
+@shared_task
+def relay_order_outbox() -> int:
+    """Dispatch the side effects queued in the order outbox."""
+    from orders.outbox import relay_outbox
+
+    return relay_outbox()
+
+
 @shared_task
 def auto_cancel_stale_pending_orders() -> int:
-    from orders.services import transition_order_status
+    from orders.services import cancel_stale_pending_orders
 
     timeout_minutes = int(getattr(settings, "ORDER_PENDING_TIMEOUT_MINUTES", 30))
     if timeout_minutes <= 0:
         return 0
 
-    cutoff = timezone.now() - timedelta(minutes=timeout_minutes)
-    stale_ids = list(
-        Order.objects.filter(
-            status=Order.Status.PENDING,
-            created_at__lt=cutoff,
-        ).values_list("id", flat=True)
-    )
-
-    canceled = 0
-    for order_id in stale_ids:
-        with transaction.atomic():
-            order = (
-                Order.objects.select_for_update()
-                .select_related("user")
-                .prefetch_related("items")
-                .filter(id=order_id)
-                .first()
-            )
-            if not order or order.status != Order.Status.PENDING:
-                continue
-            transition_order_status(order, Order.Status.CANCELED)
-            canceled += 1
+    lock_key = "orders:auto-cancel:lock"
+    # Skip this tick if the previous run is still going.
+    if not cache.add(
+        lock_key, True, getattr(settings, "ORDER_AUTO_CANCEL_LOCK_TIMEOUT", 1800)
+    ):
+        logger.info("Stale order auto-cancel already running; skipping.")
+        return 0
+    try:
+        canceled = cancel_stale_pending_orders(
+            timezone.now() - timedelta(minutes=timeout_minutes),
+            batch_size=int(getattr(settings, "ORDER_AUTO_CANCEL_BATCH_SIZE", 500)),
+        )
+    finally:
+        cache.delete(lock_key)
 
     if canceled:
         logger.info("Auto-canceled %s stale pending orders.", canceled)
@@ -71,6 +97,9 @@ def auto_cancel_stale_pending_orders() -> int:
 
 __all__ = [
     "auto_cancel_stale_pending_orders",
+    "create_order_payment_intent",
+    "generate_order_invoice",
+    "relay_order_outbox",
     "send_order_confirmation_email",
     "send_order_status_sms",
 ]
@@ -2,6 +2,7 @@ from types import SimpleNamespace
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
@@ -10,6 +11,7 @@ from authentication.models import Address
 from cart.models import Cart, CartItem
 from discounts.models import Discount, DiscountRedemption
 from orders.models import Order
+from orders.tasks import create_order_payment_intent
 from products.models import Category, Product
 
 
@@ -129,3 +131,97 @@ class CheckoutTests(TestCase):
         self.assertTrue(
             DiscountRedemption.objects.filter(discount=discount, order=order).exists()
         )
+
+
+class _StubPaymentIntent:
+    """Local stand-in for ``stripe.PaymentIntent`` recording every call."""
+
+    created: list[dict] = []
+    modified: list[str] = []
+
+    @classmethod
+    def reset(cls):
+        cls.created = []
+        cls.modified = []
+
+    @classmethod
+    def create(cls, **params):
+        cls.created.append(params)
+        number = len(cls.created)
+        return SimpleNamespace(id=f"pi_stub_{number}", client_secret=f"secret_{number}")
+
+    @classmethod
+    def modify(cls, payment_intent_id, **params):
+        cls.modified.append(payment_intent_id)
+
+    @classmethod
+    def retrieve(cls, payment_intent_id):
+        return SimpleNamespace(id=payment_intent_id, client_secret="secret_retrieved")
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    ALLOWED_HOSTS=["testserver"],
+    STRIPE_SECRET_KEY="sk_test_dummy",
+    CHECKOUT_ASYNC_PAYMENT_INTENT=True,
+)
+@patch("orders.services.stripe.PaymentIntent", _StubPaymentIntent)
+class AsyncCheckoutTests(TestCase):
+    def setUp(self):
+        _StubPaymentIntent.reset()
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="asyncbuyer", password="pass"
+        )  # nosec B106
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name="Flash Sale")
+        self.product = Product.objects.create(
+            product_name="Limited Print",
+            category=category,
+            price="25.00",
+            inventory=3,
+        )
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(
+            cart=cart, product=self.product, quantity=1, unit_price=self.product.price
+        )
+        self.url = reverse("order-list", kwargs={"version": "v1"})
+
+    def test_checkout_defers_payment_intent_until_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(self.url, {}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data["payment_intent_id"])
+        self.assertEqual(_StubPaymentIntent.created, [])
+        self.assertTrue(callbacks)
+
+        order_id = response.data["id"]
+        poll_url = reverse(
+            "order-payment-intent", kwargs={"version": "v1", "pk": order_id}
+        )
+        self.assertEqual(self.client.get(poll_url).status_code, 202)
+
+        for callback in callbacks:
+            callback()
+
+        order = Order.objects.get(id=order_id)
+        self.assertEqual(order.payment_intent_id, "pi_stub_1")
+        params = _StubPaymentIntent.created[0]
+        self.assertEqual(params["amount"], 2500)
+        self.assertEqual(params["metadata"]["order_id"], str(order_id))
+        self.assertEqual(_StubPaymentIntent.modified, [])
+
+        poll = self.client.get(poll_url)
+        self.assertEqual(poll.status_code, 200)
+        self.assertEqual(poll.data["client_secret"], "secret_1")
+
+    def test_payment_intent_task_is_idempotent(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {}, format="json")
+
+        create_order_payment_intent(response.data["id"])
+
+        self.assertEqual(len(_StubPaymentIntent.created), 1)
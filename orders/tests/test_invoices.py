@@ -0,0 +1,212 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orders.invoices import (
+    ExportStats,
+    export_invoices,
+    invoice_data,
+    invoice_orders,
+    render_invoice_pdf,
+    store_invoice,
+)
+from orders.models import Order, OrderItem
+from orders.outbox import relay_outbox
+from orders.services import transition_order_status
+from orders.tasks import generate_order_invoice
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class InvoiceTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = get_user_model().objects.create_user(
+            username="invoiced", email="invoiced@example.com", password="pass"
+        )  # nosec B106
+        self.order = Order.objects.create(user=self.user, total_price=120)
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=self.order,
+                    product_name=f"Item {index}",
+                    quantity=2,
+                    unit_price=1,
+                )
+                for index in range(60)
+            ]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse(
+            "order-invoice", kwargs={"version": "v1", "pk": self.order.pk}
+        )
+
+    def _store(self):
+        return store_invoice(invoice_orders().get(pk=self.order.pk))
+
+    def test_long_orders_span_several_numbered_pages(self):
+        order = invoice_orders().get(pk=self.order.pk)
+
+        pdf, pages = render_invoice_pdf(invoice_data(order))
+
+        self.assertEqual(pages, 2)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+    @patch("orders.outbox.async_to_sync", side_effect=lambda func: func)
+    @patch("orders.outbox.get_channel_layer")
+    def test_processing_transition_stores_the_invoice(self, *_mocks):
+        transition_order_status(self.order, Order.Status.PROCESSING)
+        relay_outbox()
+
+        _, files = default_storage.listdir(f"invoices/{self.order.pk}")
+        self.assertEqual(len(files), 1)
+
+    def test_unchanged_order_is_not_rendered_again(self):
+        path, digest = self._store()
+
+        with patch("orders.invoices.render_invoice_pdf") as render:
+            self.assertEqual(generate_order_invoice(self.order.pk), path)
+            self.assertEqual(self._store(), (path, digest))
+        render.assert_not_called()
+
+    def test_changed_order_replaces_the_invoice(self):
+        old_path, old_digest = self._store()
+        Order.objects.filter(pk=self.order.pk).update(tax_amount=5)
+
+        path, digest = self._store()
+
+        self.assertNotEqual(digest, old_digest)
+        self.assertTrue(default_storage.exists(path))
+        self.assertFalse(default_storage.exists(old_path))
+
+    def test_stale_order_does_not_remove_the_newer_invoice(self):
+        stale = invoice_orders().get(pk=self.order.pk)
+        Order.objects.filter(pk=self.order.pk).update(tax_amount=5)
+        path, _ = self._store()
+
+        stale_path, _ = store_invoice(stale)
+
+        self.assertNotEqual(stale_path, path)
+        self.assertTrue(default_storage.exists(path))
+
+    def test_download_renders_again_when_the_file_was_pruned(self):
+        stored = []
+
+        def pruned_by_another_worker(order):
+            path, digest = store_invoice(order)
+            if not stored:
+                default_storage.delete(path)
+            stored.append(path)
+            return path, digest
+
+        with patch(
+            "orders.views.store_invoice", side_effect=pruned_by_another_worker
+        ):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        self.assertEqual(len(stored), 2)
+
+    def test_download_streams_with_etag_and_revalidates(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        etag = response["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    @override_settings(INVOICE_ACCEL_REDIRECT_PREFIX="/protected-media/")
+    def test_download_is_handed_to_the_proxy(self):
+        path, digest = self._store()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{path}")
+        self.assertEqual(response["ETag"], f'"{digest}"')
+        self.assertEqual(response.content, b"")
+
+    def test_other_users_cannot_download(self):
+        other = get_user_model().objects.create_user(
+            username="other", password="pass"
+        )  # nosec B106
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class ExportInvoicesTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username="finance", password="pass"
+        )  # nosec B106
+        self.orders = []
+        for index, status in enumerate(["processing", "shipped", "pending"]):
+            order = Order.objects.create(user=user, total_price=10, status=status)
+            OrderItem.objects.create(
+                order=order, product_name="Item", quantity=1, unit_price=10
+            )
+            self.orders.append(order)
+        Order.objects.filter(pk=self.orders[2].pk).update(
+            created_at=timezone.now() - timedelta(days=40)
+        )
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.output = os.path.join(directory, "invoices.zip")
+
+    def test_streams_one_piece_per_invoice(self):
+        stats = ExportStats()
+        chunks = list(
+            export_invoices(invoice_orders().order_by("id").iterator(), stats=stats)
+        )
+
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual((stats.invoices, stats.pages), (3, 3))
+        self.assertEqual(stats.bytes, sum(len(chunk) for chunk in chunks))
+
+    def test_command_filters_and_reports_pages_per_second(self):
+        today = timezone.localdate().isoformat()
+        out = StringIO()
+
+        call_command(
+            "export_invoices",
+            self.output,
+            "--from",
+            today,
+            "--to",
+            today,
+            "--status",
+            "processing",
+            "--status",
+            "pending",
+            "--workers",
+            "2",
+            stdout=out,
+        )
+
+        with zipfile.ZipFile(self.output) as archive:
+            self.assertEqual(archive.namelist(), [f"invoice_{self.orders[0].pk}.pdf"])
+            self.assertTrue(archive.read(archive.namelist()[0]).startswith(b"%PDF"))
+        self.assertIn("Exported 1 invoices (1 pages", out.getvalue())
+        self.assertIn("pages/s", out.getvalue())
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orders.models import Order, OrderItem
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class OrderListTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username="b2b", password="pass"
+        )  # nosec B106
+        other = User.objects.create_user(
+            username="other", password="pass"
+        )  # nosec B106
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        now = timezone.now()
+        self.orders = []
+        for index in range(5):
+            order = Order.objects.create(user=self.user, total_price=10 + index)
+            OrderItem.objects.bulk_create(
+                [
+                    OrderItem(
+                        order=order, product_name="Item", quantity=1, unit_price=1
+                    )
+                    for _ in range(index)
+                ]
+            )
+            self.orders.append(order)
+        # Two orders share a timestamp to exercise the id tiebreak.
+        for offset, order in zip([4, 3, 3, 2, 1], self.orders):
+            Order.objects.filter(pk=order.pk).update(
+                created_at=now - timedelta(hours=offset)
+            )
+        Order.objects.create(user=other, total_price=99)
+        self.orders[0].delete()
+        self.url = reverse("order-list", kwargs={"version": "v1"})
+
+    def test_lean_rows_newest_first_with_item_counts(self):
+        response = self.client.get(self.url, {"page_size": 10})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        rows = response.data["results"]
+        self.assertEqual(
+            [row["id"] for row in rows],
+            [
+                self.orders[4].pk,
+                self.orders[3].pk,
+                self.orders[2].pk,
+                self.orders[1].pk,
+            ],
+        )
+        self.assertEqual(
+            set(rows[0]),
+            {"id", "created_at", "status", "total_price", "currency", "item_count"},
+        )
+        self.assertEqual([row["item_count"] for row in rows], [4, 3, 2, 1])
+
+    def test_cursor_pages_do_not_repeat_or_skip(self):
+        seen = []
+        url, params = self.url, {"page_size": 1}
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url, params)
+                seen.extend(row["id"] for row in response.data["results"])
+                url, params = response.data["next"], None
+
+        self.assertEqual(seen, [order.pk for order in reversed(self.orders[1:])])
+        # One query per page: no COUNT and no item prefetch.
+        self.assertEqual(len(queries.captured_queries), 4)
+
+    def test_retrieve_keeps_the_full_payload(self):
+        order = self.orders[2]
+        response = self.client.get(
+            reverse("order-detail", kwargs={"version": "v1", "pk": order.pk})
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["items"]), 2)
+        self.assertIn("shipping_address", response.data)
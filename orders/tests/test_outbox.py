@@ -0,0 +1,118 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from orders.models import Order, OrderOutboxEvent
+from orders.outbox import (
+    dead_letters,
+    record_order_placed,
+    record_status_changes,
+    relay_outbox,
+    retry_events,
+)
+
+Effect = OrderOutboxEvent.Effect
+
+
+def _dead_letters_metric():
+    return (
+        REGISTRY.get_sample_value(
+            "order_outbox_dead_letters_total", {"effect": Effect.STATUS_SMS}
+        )
+        or 0
+    )
+
+
+@override_settings(ORDER_OUTBOX_RETRY_DELAY=10, ORDER_OUTBOX_MAX_ATTEMPTS=3)
+class OrderOutboxRelayTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="outbox", email="outbox@example.com", password="pass"
+        )  # nosec B106
+        self.order = Order.objects.create(user=self.user, total_price=10)
+
+    def _sms_event(self):
+        record_status_changes([(self.order.pk, "+15555555555")], "shipped")
+        return OrderOutboxEvent.objects.get(effect=Effect.STATUS_SMS)
+
+    @patch("orders.outbox.async_to_sync", side_effect=lambda func: func)
+    @patch("orders.outbox.get_channel_layer")
+    @patch("orders.outbox.send_order_status_sms")
+    def test_failed_events_are_retried_with_backoff(self, mock_sms, *_mocks):
+        event = self._sms_event()
+        mock_sms.delay.side_effect = ConnectionError("broker down")
+
+        self.assertEqual(relay_outbox(), 1)  # the websocket event
+
+        event.refresh_from_db()
+        self.assertIsNone(event.processed_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, "ConnectionError: broker down")
+        self.assertGreater(event.available_at, timezone.now() + timedelta(seconds=5))
+        # Not due yet.
+        self.assertEqual(relay_outbox(), 0)
+
+        mock_sms.delay.side_effect = None
+        OrderOutboxEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+        self.assertEqual(relay_outbox(), 1)
+        event.refresh_from_db()
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(mock_sms.delay.call_count, 2)
+
+    @override_settings(ORDER_OUTBOX_MAX_ATTEMPTS=1)
+    @patch("orders.outbox.async_to_sync", side_effect=lambda func: func)
+    @patch("orders.outbox.get_channel_layer")
+    @patch("orders.outbox.send_order_status_sms")
+    def test_gives_up_after_max_attempts(self, mock_sms, *_mocks):
+        event = self._sms_event()
+        mock_sms.delay.side_effect = ConnectionError("broker down")
+
+        relay_outbox()
+        OrderOutboxEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+        relay_outbox()
+
+        self.assertEqual(mock_sms.delay.call_count, 1)
+        event.refresh_from_db()
+        self.assertIsNone(event.processed_at)
+
+    @override_settings(ORDER_OUTBOX_MAX_ATTEMPTS=1)
+    @patch("orders.outbox.async_to_sync", side_effect=lambda func: func)
+    @patch("orders.outbox.get_channel_layer")
+    @patch("orders.outbox.send_order_status_sms")
+    def test_exhausted_events_are_dead_letters_until_retried(self, mock_sms, *_):
+        event = self._sms_event()
+        mock_sms.delay.side_effect = ConnectionError("broker down")
+        before = _dead_letters_metric()
+
+        relay_outbox()
+
+        self.assertEqual(_dead_letters_metric(), before + 1)
+        self.assertEqual(list(dead_letters()), [event])
+
+        mock_sms.delay.side_effect = None
+        self.assertEqual(retry_events(OrderOutboxEvent.objects.all()), 1)
+        self.assertEqual(relay_outbox(), 1)
+        self.assertFalse(dead_letters().exists())
+
+    @patch("orders.outbox.async_to_sync", side_effect=lambda func: func)
+    @patch("orders.outbox.get_channel_layer")
+    def test_relays_every_due_event_in_batches(self, mock_get_layer, _mock_async):
+        orders = [self.order] + [
+            Order.objects.create(user=self.user, total_price=10) for _ in range(4)
+        ]
+        record_status_changes([(order.pk, None) for order in orders], "shipped")
+
+        self.assertEqual(relay_outbox(batch_size=2), 5)
+        self.assertEqual(mock_get_layer.return_value.group_send.call_count, 5)
+
+    @patch("orders.outbox.send_order_confirmation_email")
+    def test_confirmation_email_is_relayed(self, mock_email):
+        record_order_placed(self.order, self.user.email)
+
+        relay_outbox()
+
+        mock_email.delay.assert_called_once_with(self.order.pk, "outbox@example.com")
@@ -4,8 +4,10 @@ from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.test import TestCase
 
-from orders.models import Order
+from orders.models import Order, OrderItem, OrderOutboxEvent
+from orders.outbox import relay_outbox
 from orders.services import transition_order_status
+from products.models import Category, Product
 
 
 class OrderStatusTransitionTests(TestCase):
@@ -24,11 +26,19 @@ class OrderStatusTransitionTests(TestCase):
             status=Order.Status.PENDING,
         )
 
-    @patch("orders.services.async_to_sync", side_effect=lambda func: func)
-    @patch("orders.services.get_channel_layer")
-    @patch("orders.services.send_order_status_sms")
-    def test_transition_schedules_notifications_on_commit(
-        self, mock_sms, mock_get_layer, _mock_async
+    def _effects(self):
+        return set(
+            OrderOutboxEvent.objects.filter(order=self.order).values_list(
+                "effect", flat=True
+            )
+        )
+
+    @patch("orders.outbox.generate_order_invoice")
+    @patch("orders.outbox.async_to_sync", side_effect=lambda func: func)
+    @patch("orders.outbox.get_channel_layer")
+    @patch("orders.outbox.send_order_status_sms")
+    def test_transition_records_effects_in_the_outbox(
+        self, mock_sms, mock_get_layer, _mock_async, mock_invoice
     ):
         layer = Mock()
         mock_get_layer.return_value = layer
@@ -36,11 +46,20 @@ class OrderStatusTransitionTests(TestCase):
         with self.captureOnCommitCallbacks(execute=False) as callbacks:
             with transaction.atomic():
                 transition_order_status(self.order, Order.Status.PROCESSING)
-                mock_sms.delay.assert_not_called()
-                layer.group_send.assert_not_called()
 
-        self.assertEqual(len(callbacks), 1)
-        callbacks[0]()
+        self.assertEqual(len(callbacks), 0)
+        mock_sms.delay.assert_not_called()
+        layer.group_send.assert_not_called()
+        self.assertEqual(
+            self._effects(),
+            {
+                OrderOutboxEvent.Effect.STATUS_SMS,
+                OrderOutboxEvent.Effect.STATUS_WEBSOCKET,
+                OrderOutboxEvent.Effect.INVOICE,
+            },
+        )
+
+        self.assertEqual(relay_outbox(), 3)
 
         mock_sms.delay.assert_called_once_with(
             self.order.id,
@@ -51,44 +70,46 @@ class OrderStatusTransitionTests(TestCase):
             f"order_{self.order.id}",
             {"type": "status.update", "status": Order.Status.PROCESSING},
         )
+        mock_invoice.delay.assert_called_once_with(self.order.id)
+        self.assertFalse(
+            OrderOutboxEvent.objects.filter(processed_at__isnull=True).exists()
+        )
 
         self.order.refresh_from_db()
         self.assertEqual(self.order.status, Order.Status.PROCESSING)
 
-    @patch("orders.services.async_to_sync", side_effect=lambda func: func)
-    @patch("orders.services.get_channel_layer")
-    @patch("orders.services.send_order_status_sms")
-    def test_transition_same_status_no_callbacks(
-        self, mock_sms, mock_get_layer, _mock_async
-    ):
-        layer = Mock()
-        mock_get_layer.return_value = layer
-
-        with self.captureOnCommitCallbacks(execute=False) as callbacks:
-            with transaction.atomic():
-                transition_order_status(self.order, Order.Status.PENDING)
+    def test_transition_same_status_records_nothing(self):
+        transition_order_status(self.order, Order.Status.PENDING)
 
-        self.assertEqual(len(callbacks), 0)
-        mock_sms.delay.assert_not_called()
-        mock_get_layer.assert_not_called()
-        layer.group_send.assert_not_called()
+        self.assertEqual(self._effects(), set())
 
-    @patch("orders.services.release_reserved_inventory")
-    @patch("orders.services.async_to_sync", side_effect=lambda func: func)
-    @patch("orders.services.get_channel_layer")
-    @patch("orders.services.send_order_status_sms")
-    def test_transition_to_canceled_releases_inventory_after_commit(
-        self, mock_sms, mock_get_layer, _mock_async, mock_release
+    @patch("orders.outbox.async_to_sync", side_effect=lambda func: func)
+    @patch("orders.outbox.get_channel_layer")
+    @patch("orders.outbox.send_order_status_sms")
+    def test_transition_to_canceled_releases_inventory_once(
+        self, mock_sms, mock_get_layer, _mock_async
     ):
-        layer = Mock()
-        mock_get_layer.return_value = layer
+        product = Product.objects.create(
+            product_name="Cable",
+            price=10,
+            inventory=3,
+            category=Category.objects.create(name="Accessories"),
+        )
+        OrderItem.objects.create(
+            order=self.order,
+            product=product,
+            product_name=product.product_name,
+            quantity=2,
+            unit_price=product.price,
+        )
 
-        with self.captureOnCommitCallbacks(execute=False) as callbacks:
-            with transaction.atomic():
-                transition_order_status(self.order, Order.Status.CANCELED)
-                mock_release.assert_not_called()
+        transition_order_status(self.order, Order.Status.CANCELED)
+        product.refresh_from_db()
+        self.assertEqual(product.inventory, 3)
+        self.assertIn(OrderOutboxEvent.Effect.RELEASE_INVENTORY, self._effects())
 
-        self.assertEqual(len(callbacks), 1)
-        callbacks[0]()
+        relay_outbox()
+        relay_outbox()
 
-        mock_release.assert_called_once_with(self.order)
+        product.refresh_from_db()
+        self.assertEqual(product.inventory, 5)
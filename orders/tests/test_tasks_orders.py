@@ -1,10 +1,13 @@
 from datetime import timedelta
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from unittest.mock import patch
 
-from orders.models import Order, OrderItem
+from orders.models import Order, OrderItem, OrderOutboxEvent
 from orders.tasks import (
     auto_cancel_stale_pending_orders,
     send_order_confirmation_email,
@@ -120,3 +123,73 @@ class AutoCancelStaleOrdersTest(TestCase):
         self.assertEqual(canceled, 0)
         self.assertEqual(order.status, Order.Status.PENDING)
 
+    def _stale_order(self, quantity):
+        order = Order.objects.create(
+            user=self.user,
+            total_price=10 * quantity,
+            status=Order.Status.PENDING,
+        )
+        OrderItem.objects.create(
+            order=order,
+            product=self.product,
+            product_name=self.product.product_name,
+            quantity=quantity,
+            unit_price=self.product.price,
+        )
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+        return order
+
+    @override_settings(ORDER_AUTO_CANCEL_BATCH_SIZE=2)
+    def test_cancels_in_batches_with_set_based_updates(self):
+        self.user.phone_number = "+15555555555"
+        self.user.save(update_fields=["phone_number"])
+        orders = [self._stale_order(quantity) for quantity in (1, 2, 3, 4, 5)]
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                canceled = auto_cancel_stale_pending_orders()
+
+        self.assertEqual(canceled, 5)
+        self.assertEqual(
+            set(Order.objects.values_list("status", flat=True)),
+            {Order.Status.CANCELED},
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.inventory, 5 + 15)
+        inventory_updates = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "products_product"')
+        ]
+        self.assertEqual(len(inventory_updates), 3)
+        outbox_inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "orders_orderoutboxevent"')
+        ]
+        self.assertEqual(len(outbox_inserts), 3)
+        # Inventory was returned in the batch; only notifications are queued.
+        self.assertEqual(
+            sorted(
+                OrderOutboxEvent.objects.filter(
+                    effect=OrderOutboxEvent.Effect.STATUS_SMS
+                ).values_list("order_id", flat=True)
+            ),
+            [order.pk for order in orders],
+        )
+        self.assertFalse(
+            OrderOutboxEvent.objects.filter(
+                effect=OrderOutboxEvent.Effect.RELEASE_INVENTORY
+            ).exists()
+        )
+
+    def test_skips_while_a_run_holds_the_lock(self):
+        order = self._stale_order(1)
+        cache.add("orders:auto-cancel:lock", True)
+        self.addCleanup(cache.delete, "orders:auto-cancel:lock")
+
+        self.assertEqual(auto_cancel_stale_pending_orders(), 0)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.Status.PENDING)
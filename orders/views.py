@@ -8,27 +8,41 @@ from rest_framework.decorators import (
     authentication_classes,
     permission_classes,
 )
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from authentication.jwt import CachedJWTAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
 from django.conf import settings
 from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.dateparse import parse_datetime
 import hashlib
 import hmac
 import logging
 import time
 
-from .tasks import send_order_confirmation_email
 from .services import (
     create_order_from_cart,
-    generate_invoice_pdf,
+    get_payment_intent_client_secret,
     transition_order_status,
 )
 
-from orders.models import Order, ShipmentWebhookEvent  # Django ORM
-from backend.serializers.orders import OrderCreateSerializer, OrderSerializer
+from orders.invoices import (
+    etag_matches,
+    invoice_data,
+    invoice_digest,
+    invoice_orders,
+    invoice_response,
+    store_invoice,
+)
+from orders.models import Order, OrderItem, ShipmentWebhookEvent  # Django ORM
+from orders.pagination import OrderCursorPagination
+from backend.serializers.orders import (
+    OrderCreateSerializer,
+    OrderListSerializer,
+    OrderSerializer,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -39,19 +53,34 @@ class OrderViewSet(viewsets.ViewSet):
     The backend validates cart contents and pricing.
     """
 
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def list(self, request, *args, **kwargs):
-        """List all orders for current user."""
+        """List the current user's orders, newest first, one page at a time.
+
+        Rows carry only summary columns and an item count; the full nested
+        order is served by ``retrieve``.
+        """
+        item_count = (
+            OrderItem.objects.filter(order=OuterRef("pk"))
+            .order_by()
+            .values("order")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
         orders = (
-            Order.objects.filter(user=request.user)
-            .select_related("shipping_address", "billing_address")
-            .prefetch_related("items")
-            .order_by("-created_at")
+            Order.objects.filter(user=request.user).only(
+                "id", "created_at", "status", "total_price", "currency"
+            )
+            # A correlated count is evaluated for the page's rows only, unlike
+            # a join with GROUP BY over the user's whole history.
+            .annotate(item_count=Coalesce(Subquery(item_count), 0))
         )
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        paginator = OrderCursorPagination()
+        page = paginator.paginate_queryset(orders, request, view=self)
+        serializer = OrderListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def retrieve(self, request, pk=None, *args, **kwargs):
         """Get a specific order by ID (must belong to user)."""
@@ -67,17 +96,50 @@ class OrderViewSet(viewsets.ViewSet):
 
     @action(detail=True, methods=["get"], url_path="invoice")
     def invoice(self, request, pk=None, *args, **kwargs):
-        """Download the invoice for the order as a PDF."""
+        """Download the invoice for the order as a PDF.
 
-        order = get_object_or_404(
-            Order.objects.prefetch_related("items"), pk=pk, user=request.user
-        )
-        pdf_bytes = generate_invoice_pdf(order)
-        response = HttpResponse(pdf_bytes, content_type="application/pdf")
-        response["Content-Disposition"] = (
-            f'attachment; filename="invoice_{order.id}.pdf"'
+        Invoices are stored per order version, usually by the task queued when
+        the order reaches processing; a missing one is rendered here once.
+        """
+
+        order = get_object_or_404(invoice_orders(), pk=pk, user=request.user)
+        digest = invoice_digest(invoice_data(order))
+        if etag_matches(request, digest):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            response["ETag"] = f'"{digest}"'
+            return response
+        path, digest = store_invoice(order)
+        try:
+            return invoice_response(path, order.id, digest)
+        except FileNotFoundError:
+            # Pruned by a concurrent render of another version; store it again.
+            path, digest = store_invoice(order)
+            return invoice_response(path, order.id, digest)
+
+    @action(detail=True, methods=["get"], url_path="payment-intent")
+    def payment_intent(self, request, pk=None, *args, **kwargs):
+        """Poll for the Stripe client secret of an async checkout order."""
+
+        order = get_object_or_404(Order.objects, pk=pk, user=request.user)
+        if not order.payment_intent_id:
+            return Response(
+                {"order_id": order.id, "status": "pending"},
+                status=status.HTTP_202_ACCEPTED,
+            )
+        try:
+            client_secret = get_payment_intent_client_secret(order)
+        except ValueError as exc:
+            return Response(
+                {"detail": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return Response(
+            {
+                "order_id": order.id,
+                "status": "ready",
+                "payment_intent_id": order.payment_intent_id,
+                "client_secret": client_secret,
+            }
         )
-        return response
 
     def create(self, request, *args, **kwargs):
         """Checkout: Create an order from user's cart."""
@@ -101,8 +163,6 @@ class OrderViewSet(viewsets.ViewSet):
             .get(pk=order.pk)
         )
         serializer = OrderSerializer(order)
-        if created:
-            send_order_confirmation_email.delay(order.id, request.user.email)
         return Response(
             serializer.data,
             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
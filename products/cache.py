@@ -0,0 +1,378 @@
+"""Versioned read cache for the product catalog API.
+
+List pages are stored under a key derived from the normalized query
+parameters and a global list version. Detail pages are validated against a
+per-product version (keyed by slug, so it can be read before the database)
+and the version of the product's category. Writers bump the relevant
+versions immediately and again once their transaction commits, so entries
+rebuilt from pre-commit data in between are discarded as well, without ever
+having to enumerate cache keys.
+
+Cart mutations check availability against short-lived per-product snapshots
+instead of locking the product row; they are dropped whenever the product or
+its inventory changes. Cached list pages take their ``inventory`` values from
+the same snapshots when served, so stock changes from checkouts and ERP syncs
+do not invalidate every list page.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import random
+import time
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_REQUESTS = Counter(
+    "catalog_cache_requests_total",
+    "Catalog cache lookups by endpoint and result",
+    ["endpoint", "result"],
+)
+
+# Version keys share a hash tag so they live on a single RedisCluster slot.
+_LIST_VERSION_KEY = "{catalog}:list:version"
+
+# Product columns cached for cart availability checks.
+AVAILABILITY_FIELDS = (
+    "id",
+    "product_name",
+    "slug",
+    "price",
+    "currency",
+    "inventory",
+    "is_active",
+    "publish_at",
+    "unpublish_at",
+)
+
+
+def _cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def _timeout() -> int:
+    """Return the entry TTL with random jitter so warmed keys don't expire together."""
+    ttl = int(getattr(settings, "CATALOG_CACHE_TTL", 300))
+    jitter = float(getattr(settings, "CATALOG_CACHE_TTL_JITTER", 0.1))
+    if jitter <= 0:
+        return ttl
+    return int(ttl * random.uniform(1 - jitter, 1 + jitter))  # nosec B311
+
+
+def _product_version_key(slug: str) -> str:
+    return f"{{catalog}}:product:{slug}:version"
+
+
+def _category_version_key(category_id: int) -> str:
+    return f"{{catalog}}:category:{category_id}:version"
+
+
+def _detail_key(slug: str, is_staff: bool) -> str:
+    return f"catalog:detail:{int(is_staff)}:{slug}"
+
+
+def _record(endpoint: str, hit: bool) -> None:
+    CATALOG_CACHE_REQUESTS.labels(
+        endpoint=endpoint, result="hit" if hit else "miss"
+    ).inc()
+
+
+def _get_version(key: str) -> int:
+    """Return the current value of a version key, seeding it if missing.
+
+    Missing keys are seeded with a timestamp rather than zero so that an
+    evicted version never matches entries written under an earlier seed.
+    """
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        seed = time.time_ns()
+        cache.add(key, seed, None)
+        version = cache.get(key, seed)
+    return version
+
+
+def _bump(keys: Iterable[str]) -> None:
+    cache = _cache()
+    for key in keys:
+        try:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), None)
+        except Exception:  # pragma: no cover - cache backend outage
+            logger.exception("Failed to invalidate catalog cache key %s", key)
+
+
+def get_list(params: dict[str, Any]) -> tuple[str | None, Any | None]:
+    """Return ``(cache_key, data)`` for a product list page.
+
+    ``data`` is ``None`` on a miss; the key should then be passed to
+    :func:`set_list` with the freshly rendered payload.
+    """
+    try:
+        key = _list_key(params)
+        data = _cache().get(key)
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Catalog cache unavailable for list lookup.", exc_info=True)
+        return None, None
+    _record("list", data is not None)
+    return key, data
+
+
+def _list_key(params: dict[str, Any]) -> str:
+    version = _get_version(_LIST_VERSION_KEY)
+    digest = hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return f"catalog:list:{version}:{digest}"
+
+
+def is_list_fresh(params: dict[str, Any]) -> bool:
+    """Return whether a list page is cached, without recording metrics."""
+    try:
+        return _cache().get(_list_key(params)) is not None
+    except Exception:  # pragma: no cover - cache backend outage
+        return False
+
+
+def set_list(key: str | None, data: Any) -> None:
+    """Store a list page and warm the availability snapshots it is served with.
+
+    Like detail pages, the entry expires no later than the next scheduled
+    ``publish_at``/``unpublish_at`` among the page's rows. Products scheduled
+    to be published that are not on the page yet appear once the entry
+    expires, within ``CATALOG_CACHE_TTL``.
+    """
+    if key is None:
+        return
+    timeout = _list_timeout(data)
+    if timeout <= 0:
+        return
+    try:
+        _cache().set(key, data, timeout)
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Catalog cache unavailable for list store.", exc_info=True)
+        return
+    get_availability(row["id"] for row in _list_rows(data))
+
+
+def _page_rows(data: Any) -> list[dict[str, Any]]:
+    return data.get("results", []) if isinstance(data, dict) else data
+
+
+def _list_rows(data: Any) -> list[dict[str, Any]]:
+    return [row for row in _page_rows(data) if "id" in row and "inventory" in row]
+
+
+def _list_timeout(data: Any) -> int:
+    timeout = _timeout()
+    now = timezone.now()
+    for row in _page_rows(data):
+        for field in ("publish_at", "unpublish_at"):
+            moment = parse_datetime(row.get(field) or "")
+            if moment is not None and moment > now:
+                timeout = min(timeout, int((moment - now).total_seconds()))
+    return timeout
+
+
+def with_live_inventory(data: Any) -> Any:
+    """Return a cached list page with ``inventory`` read from the snapshots."""
+    rows = _list_rows(data)
+    if rows:
+        snapshots = get_availability(row["id"] for row in rows)
+        for row in rows:
+            if row["id"] in snapshots:
+                row["inventory"] = snapshots[row["id"]].inventory
+    return data
+
+
+def _lookup_detail(slug: str, is_staff: bool) -> tuple[int, Any | None]:
+    product_version = _get_version(_product_version_key(slug))
+    entry = _cache().get(_detail_key(slug, is_staff))
+    if entry and entry["product_version"] == product_version:
+        category_key = _category_version_key(entry["category_id"])
+        if entry["category_version"] == _get_version(category_key):
+            return product_version, entry["data"]
+    return product_version, None
+
+
+def get_detail(slug: str, is_staff: bool) -> tuple[int | None, Any | None]:
+    """Return ``(product_version, data)`` for a product detail page."""
+    try:
+        product_version, data = _lookup_detail(slug, is_staff)
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Catalog cache unavailable for detail lookup.", exc_info=True)
+        return None, None
+    _record("detail", data is not None)
+    return product_version, data
+
+
+def is_detail_fresh(slug: str, is_staff: bool = False) -> bool:
+    """Return whether a valid detail entry exists, without recording metrics."""
+    try:
+        return _lookup_detail(slug, is_staff)[1] is not None
+    except Exception:  # pragma: no cover - cache backend outage
+        return False
+
+
+def set_detail(
+    slug: str, is_staff: bool, product_version: int | None, product, data: Any
+) -> None:
+    """Store a rendered product detail tagged with the versions it was built from."""
+    if product_version is None:
+        return
+    timeout = _timeout()
+    if not is_staff and product.unpublish_at:
+        remaining = (product.unpublish_at - timezone.now()).total_seconds()
+        timeout = min(timeout, max(int(remaining), 0))
+    if timeout <= 0:
+        return
+    try:
+        category_version = _get_version(_category_version_key(product.category_id))
+        _cache().set(
+            _detail_key(slug, is_staff),
+            {
+                "product_version": product_version,
+                "category_id": product.category_id,
+                "category_version": category_version,
+                "data": data,
+            },
+            timeout,
+        )
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Catalog cache unavailable for detail store.", exc_info=True)
+
+
+def _availability_key(product_id: int) -> str:
+    return f"{{catalog}}:availability:{product_id}"
+
+
+def get_availability(product_ids: Iterable[int]) -> dict[int, Any]:
+    """Return read-only ``Product`` snapshots for availability checks.
+
+    Snapshots carry only :data:`AVAILABILITY_FIELDS` and are cached for
+    ``PRODUCT_AVAILABILITY_TTL`` seconds; misses are read in one query
+    without locking. Inventory may lag behind concurrent checkouts, which
+    enforce it against the locked rows. Unknown ids are left out.
+    """
+    from products.models import Product
+
+    keys = {product_id: _availability_key(product_id) for product_id in product_ids}
+    try:
+        cached = _cache().get_many(list(keys.values()))
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.warning("Catalog cache unavailable for availability.", exc_info=True)
+        cached = {}
+
+    rows = {
+        product_id: cached[key] for product_id, key in keys.items() if key in cached
+    }
+    missing = [product_id for product_id in keys if product_id not in rows]
+    _record("availability", not missing)
+    if missing:
+        fetched = {
+            row["id"]: row
+            for row in Product.objects.filter(id__in=missing).values(
+                *AVAILABILITY_FIELDS
+            )
+        }
+        rows.update(fetched)
+        try:
+            _cache().set_many(
+                {keys[product_id]: row for product_id, row in fetched.items()},
+                int(getattr(settings, "PRODUCT_AVAILABILITY_TTL", 30)),
+            )
+        except Exception:  # pragma: no cover - cache backend outage
+            logger.warning("Catalog cache unavailable for availability.", exc_info=True)
+    return {product_id: Product(**row) for product_id, row in rows.items()}
+
+
+def _drop_availability(product_ids: list[int]) -> None:
+    try:
+        _cache().delete_many(
+            [_availability_key(product_id) for product_id in product_ids]
+        )
+    except Exception:  # pragma: no cover - cache backend outage
+        logger.exception("Failed to invalidate product availability.")
+
+
+def _drop_availability_now_and_on_commit(product_ids: list[int]) -> None:
+    _drop_availability(product_ids)
+    transaction.on_commit(lambda: _drop_availability(product_ids))
+
+
+def _bump_now_and_on_commit(keys: list[str]) -> None:
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_product(product, previous_slug: str | None = None) -> None:
+    """Invalidate ``product``'s detail pages and all list pages.
+
+    Pass ``previous_slug`` when the slug changed so the detail pages cached
+    under the old one are invalidated as well.
+    """
+    keys = [_LIST_VERSION_KEY, _product_version_key(product.slug)]
+    if previous_slug and previous_slug != product.slug:
+        keys.append(_product_version_key(previous_slug))
+    _bump_now_and_on_commit(keys)
+    if product.pk is not None:
+        _drop_availability_now_and_on_commit([product.pk])
+
+
+def invalidate_products(product_ids: Iterable[int], *, listed: bool = True) -> None:
+    """Invalidate cached pages for products changed through ``QuerySet.update``.
+
+    Only the list version and availability snapshots are invalidated straight
+    away; resolving the slugs of the detail entries costs a query, so it is
+    deferred until after commit to keep it out of checkout's locked section.
+    Pass ``listed=False`` for inventory-only changes: list pages read stock
+    from the availability snapshots, so their version is left alone.
+    """
+    ids = list(product_ids)
+    if not ids:
+        return
+    list_keys = [_LIST_VERSION_KEY] if listed else []
+
+    def _invalidate():
+        from products.models import Product
+
+        slugs = Product.objects.filter(id__in=ids).values_list("slug", flat=True)
+        _bump([*list_keys, *(_product_version_key(slug) for slug in slugs)])
+
+    _bump(list_keys)
+    _drop_availability_now_and_on_commit(ids)
+    transaction.on_commit(_invalidate)
+
+
+def invalidate_category(category_id: int) -> None:
+    """Invalidate detail pages of products in a category and all list pages."""
+    _bump_now_and_on_commit([_LIST_VERSION_KEY, _category_version_key(category_id)])
+
+
+__all__ = [
+    "AVAILABILITY_FIELDS",
+    "CATALOG_CACHE_REQUESTS",
+    "get_availability",
+    "get_detail",
+    "get_list",
+    "invalidate_category",
+    "invalidate_product",
+    "invalidate_products",
+    "is_detail_fresh",
+    "is_list_fresh",
+    "set_detail",
+    "set_list",
+    "with_live_inventory",
+]
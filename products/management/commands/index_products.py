@@ -0,0 +1,50 @@
+"""Management command to bulk-index the catalog into Elasticsearch."""
+
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products import search
+
+
+class Command(BaseCommand):
+    help = "Stream every product into the Elasticsearch product index."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Documents sent per bulk request.",
+        )
+        parser.add_argument(
+            "--recreate",
+            action="store_true",
+            help="Drop and recreate the index before indexing.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        client = search.get_client()
+        search.ensure_index(client, recreate=options["recreate"])
+
+        started = time.perf_counter()
+        indexed, failed = search.bulk_index_products(
+            chunk_size=chunk_size, client=client
+        )
+        elapsed = time.perf_counter() - started
+
+        rate = indexed / elapsed if elapsed else 0.0
+        message = (
+            f"Indexed {indexed} products into '{search.index_name()}' in "
+            f"{elapsed:.2f}s ({rate:.1f}/s); failed {failed}."
+        )
+        if failed:
+            self.stderr.write(self.style.ERROR(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
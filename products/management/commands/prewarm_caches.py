@@ -1,34 +1,227 @@
-from django.core.management.base import BaseCommand
+"""Management command to populate the catalog cache ahead of traffic."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, time as dt_time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework.test import APIRequestFactory
+
+from products import cache as catalog_cache
+from products.models import Category, Product
 from products.views import ProductViewSet
-from products.models import Product
-from discounts.views import CategoryListCreateAPIView
+
+
+def _parse_since(value: str) -> datetime:
+    parsed = parse_datetime(value)
+    if parsed is None:
+        parsed_date = parse_date(value)
+        if parsed_date is None:
+            raise CommandError("--since must be an ISO date or datetime.")
+        parsed = datetime.combine(parsed_date, dt_time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _default_base_url() -> str:
+    for host in getattr(settings, "ALLOWED_HOSTS", []):
+        if host and not host.startswith(".") and host != "*":
+            return f"https://{host}"
+    return "https://localhost"
 
 
 class Command(BaseCommand):
-    help = "Pre-warm caches for frequently accessed endpoints."
+    help = (
+        "Warm the catalog cache by rendering product detail, product list and "
+        "per-category list payloads in parallel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Number of worker threads rendering payloads.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Products streamed from the database and rendered per task.",
+        )
+        parser.add_argument(
+            "--only-stale",
+            action="store_true",
+            help="Skip products whose cached detail payload is still valid.",
+        )
+        parser.add_argument(
+            "--since",
+            help="Only warm products updated at or after this ISO date/datetime.",
+        )
+        parser.add_argument(
+            "--list-pages",
+            type=int,
+            default=1,
+            help="Number of product list pages to warm, overall and per category.",
+        )
+        parser.add_argument(
+            "--base-url",
+            default=None,
+            help="Public scheme and host the API is served from, e.g. "
+            "https://api.example.com. List pages are cached per host.",
+        )
 
     def handle(self, *args, **options):
-        factory = APIRequestFactory()
-
-        # Warm product list cache
-        request = factory.get("/products/")
-        list_view = ProductViewSet.as_view({"get": "list"})
-        response = list_view(request)
-        response.render()
-        self.stdout.write(self.style.SUCCESS("Warmed product list cache"))
-
-        # Warm individual product caches
-        detail_view = ProductViewSet.as_view({"get": "retrieve"})
-        for product in Product.objects.all():
-            request = factory.get(f"/products/{product.slug}/")
-            response = detail_view(request, slug=product.slug)
+        concurrency = options["concurrency"]
+        chunk_size = options["chunk_size"]
+        if concurrency < 1 or chunk_size < 1:
+            raise CommandError("--concurrency and --chunk-size must be positive.")
+
+        base_url = urlsplit(options["base_url"] or _default_base_url())
+        self._host = base_url.netloc
+        self._secure = base_url.scheme == "https"
+        self._factory = APIRequestFactory()
+        self._detail_view = ProductViewSet.as_view({"get": "retrieve"})
+        self._list_view = ProductViewSet.as_view({"get": "list"})
+        self._only_stale = options["only_stale"]
+        self._lock = threading.Lock()
+        self._stats = {"warmed": 0, "cached": 0, "skipped": 0, "failed": 0}
+
+        queryset = Product.objects.published().order_by("pk")
+        if options["since"]:
+            queryset = queryset.filter(updated_at__gte=_parse_since(options["since"]))
+        slugs = queryset.values_list("slug", flat=True).iterator(chunk_size=chunk_size)
+
+        list_params = [{}]
+        categories = Category.objects.filter(is_active=True).values_list(
+            "slug", flat=True
+        )
+        list_params.extend({"category": slug} for slug in categories)
+
+        started = time.perf_counter()
+        if concurrency == 1:
+            for chunk in self._chunks(slugs, chunk_size):
+                self._warm_details(chunk)
+            self._warm_lists(list_params, options["list_pages"])
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                pending: set = set()
+                for chunk in self._chunks(slugs, chunk_size):
+                    # Bound in-flight chunks so a huge catalog is never
+                    # materialized in memory at once.
+                    if len(pending) >= concurrency * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    pending.add(
+                        executor.submit(self._in_worker, self._warm_details, chunk)
+                    )
+                pending.add(
+                    executor.submit(
+                        self._in_worker,
+                        self._warm_lists,
+                        list_params,
+                        options["list_pages"],
+                    )
+                )
+                for future in wait(pending).done:
+                    future.result()
+        elapsed = time.perf_counter() - started
+
+        stats = self._stats
+        rate = stats["warmed"] / elapsed if elapsed else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed {stats['warmed']} payloads in {elapsed:.2f}s "
+                f"({rate:.1f}/s); already cached {stats['cached']}, "
+                f"skipped {stats['skipped']}, failed {stats['failed']}."
+            )
+        )
+
+    @staticmethod
+    def _chunks(iterable, size):
+        chunk = []
+        for item in iterable:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _in_worker(func, *args):
+        try:
+            func(*args)
+        finally:
+            # Worker threads open their own connections; release them per task.
+            connection.close()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _request(self, path: str, params=None):
+        return self._factory.get(
+            path, params or {}, HTTP_HOST=self._host, secure=self._secure
+        )
+
+    def _render(self, view, path: str, params=None, **kwargs) -> int | None:
+        request = self._request(path, params)
+        try:
+            response = view(request, version="v1", **kwargs)
             response.render()
-        self.stdout.write(self.style.SUCCESS("Warmed product detail caches"))
-
-        # Warm category list cache
-        request = factory.get("/categories/")
-        category_view = CategoryListCreateAPIView.as_view()
-        response = category_view(request)
-        response.render()
-        self.stdout.write(self.style.SUCCESS("Warmed category list cache"))
+        except Exception as exc:
+            self.stderr.write(self.style.ERROR(f"Failed to warm {path}: {exc}"))
+            self._count("failed")
+            return None
+        if response.status_code == 200:
+            self._count("warmed")
+        elif response.status_code != 404 or not params or "page" not in params:
+            self.stderr.write(
+                self.style.ERROR(f"Failed to warm {path}: HTTP {response.status_code}")
+            )
+            self._count("failed")
+        return response.status_code
+
+    def _warm_details(self, slugs: list[str]) -> None:
+        for slug in slugs:
+            if self._only_stale and catalog_cache.is_detail_fresh(slug):
+                self._count("skipped")
+                continue
+            path = reverse("product-detail", kwargs={"version": "v1", "slug": slug})
+            self._render(self._detail_view, path, slug=slug)
+
+    def _list_is_cached(self, path: str, params: dict) -> bool:
+        view = ProductViewSet(
+            action_map={"get": "list"}, action="list", kwargs={"version": "v1"}
+        )
+        request = view.initialize_request(self._request(path, params))
+        request.version, request.versioning_scheme = view.determine_version(
+            request, version="v1"
+        )
+        view.request = request
+        cache_params = view._catalog_cache_params()
+        return cache_params is not None and catalog_cache.is_list_fresh(cache_params)
+
+    def _warm_lists(self, list_params: list[dict], pages: int) -> None:
+        path = reverse("product-list", kwargs={"version": "v1"})
+        for params in list_params:
+            for page in range(1, pages + 1):
+                query = {**params, "page": page} if page > 1 else params
+                if self._list_is_cached(path, query):
+                    self._count("cached")
+                    continue
+                # Stop at the first missing page; categories differ in depth.
+                if self._render(self._list_view, path, query) != 200:
+                    break
@@ -1,26 +1,57 @@
 """Management command to sync product inventory from the ERP system."""
 
-from django.core.management.base import BaseCommand
-from products.models import Product
-from products.services import sync_product_inventory
-from erp.client import ERPClientError
+from django.core.management.base import BaseCommand, CommandError
+
+from products.services import sync_inventory_from_erp
 
 
 class Command(BaseCommand):
     help = "Sync product inventory from the external ERP system."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Number of parallel ERP requests.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Products fetched and written back per batch.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Fetch every product instead of only those changed since the "
+            "last successful sync.",
+        )
+
     def handle(self, *args, **options):
-        for product in Product.objects.all():
-            try:
-                inventory = sync_product_inventory(product)
-                external_id = product.erp_id or str(product.id)
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Synced inventory for product {external_id}: {inventory}"
-                    )
-                )
-            except ERPClientError as exc:
-                external_id = product.erp_id or str(product.id)
-                self.stderr.write(
-                    self.style.ERROR(f"Failed to sync product {external_id}: {exc}")
-                )
+        concurrency = options["concurrency"]
+        batch_size = options["batch_size"]
+        if concurrency < 1 or batch_size < 1:
+            raise CommandError("--concurrency and --batch-size must be positive.")
+
+        stats = sync_inventory_from_erp(
+            concurrency=concurrency, batch_size=batch_size, full=options["full"]
+        )
+
+        summary = (
+            f"{stats.mode.capitalize()} sync checked {stats.checked} products with "
+            f"{stats.requests} requests in {stats.elapsed:.2f}s "
+            f"({stats.rate:.1f}/s); updated {stats.updated}, unchanged "
+            f"{stats.unchanged}, unmatched {stats.unmatched}, failed "
+            f"{stats.failed}, skipped {stats.skipped}."
+        )
+        if stats.failed or stats.aborted:
+            self.stderr.write(self.style.ERROR(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
+        for error, count in stats.errors.most_common():
+            self.stderr.write(self.style.ERROR(f"  {error}: {count}"))
+        if stats.aborted:
+            self.stderr.write(
+                self.style.ERROR("Sync aborted; the high-water mark was not advanced.")
+            )
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_product_publish_at_product_unpublish_at"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="product",
+            name="idx_product_name",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="idx_product_price",
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["product_name", "id"], name="idx_product_name_id"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["price", "id"], name="idx_product_price_id"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["created_at", "id"], name="idx_product_created_id"
+            ),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.2.27 on 2026-10-18 05:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION products_product_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.product_name, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B')
+            || setweight(to_tsvector('english', CASE
+                WHEN jsonb_typeof(NEW.tags) = 'array' THEN (
+                    SELECT coalesce(string_agg(tag, ' '), '')
+                    FROM jsonb_array_elements_text(NEW.tags) AS tag
+                )
+                ELSE ''
+            END), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER products_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF product_name, description, tags
+    ON products_product
+    FOR EACH ROW EXECUTE FUNCTION products_product_search_vector_update()
+    """,
+    # Touch every row so the trigger backfills existing products.
+    "UPDATE products_product SET product_name = product_name",
+    "CREATE INDEX idx_product_search_vector ON products_product "
+    "USING gin (search_vector)",
+    "CREATE INDEX idx_product_name_trgm ON products_product "
+    "USING gin (product_name gin_trgm_ops)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS idx_product_name_trgm",
+    "DROP INDEX IF EXISTS idx_product_search_vector",
+    "DROP TRIGGER IF EXISTS products_product_search_vector_trigger "
+    "ON products_product",
+    "DROP FUNCTION IF EXISTS products_product_search_vector_update()",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE products_product_fts USING fts5(
+        product_name, description, tags,
+        content='products_product', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER products_product_fts_insert AFTER INSERT ON products_product
+    BEGIN
+        INSERT INTO products_product_fts(rowid, product_name, description, tags)
+        VALUES (new.id, new.product_name, new.description, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_delete AFTER DELETE ON products_product
+    BEGIN
+        INSERT INTO products_product_fts(
+            products_product_fts, rowid, product_name, description, tags
+        )
+        VALUES ('delete', old.id, old.product_name, old.description, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_update
+    AFTER UPDATE OF product_name, description, tags ON products_product
+    BEGIN
+        INSERT INTO products_product_fts(
+            products_product_fts, rowid, product_name, description, tags
+        )
+        VALUES ('delete', old.id, old.product_name, old.description, old.tags);
+        INSERT INTO products_product_fts(rowid, product_name, description, tags)
+        VALUES (new.id, new.product_name, new.description, new.tags);
+    END
+    """,
+    "INSERT INTO products_product_fts(products_product_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS products_product_fts_update",
+    "DROP TRIGGER IF EXISTS products_product_fts_delete",
+    "DROP TRIGGER IF EXISTS products_product_fts_insert",
+    "DROP TABLE IF EXISTS products_product_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0003_product_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_REVERSE, "sqlite": SQLITE_REVERSE}),
+        ),
+    ]
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 from django.utils.text import slugify
 
+from products import cache as catalog_cache
+from products import search
+
 
 def _build_unique_slug(
     instance: models.Model,
@@ -35,6 +39,16 @@ class ProductQuerySet(models.QuerySet):
         )
 
 
+class ProductManager(models.Manager):
+    def get_queryset(self) -> ProductQuerySet:
+        # The tsvector is only read inside search filters and ranks, which
+        # reference the column in SQL; never load it into instances.
+        return ProductQuerySet(self.model, using=self._db).defer("search_vector")
+
+    def published(self, now=None) -> models.QuerySet:
+        return self.get_queryset().published(now)
+
+
 class Category(models.Model):
     name = models.CharField(max_length=120, unique=True)
     slug = models.SlugField(max_length=140, unique=True, blank=True)
@@ -53,6 +67,12 @@ class Category(models.Model):
         if not self.slug:
             self.slug = _build_unique_slug(self, self.name, Category.objects, 140)
         super().save(*args, **kwargs)
+        catalog_cache.invalidate_category(self.pk)
+        search.queue_category_reindex(self.pk)
+
+    def delete(self, *args, **kwargs):
+        catalog_cache.invalidate_category(self.pk)
+        return super().delete(*args, **kwargs)
 
 
 class Product(models.Model):
@@ -75,14 +95,18 @@ class Product(models.Model):
     erp_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL; see products.search_backends.
+    search_vector = SearchVectorField(null=True, editable=False)
 
-    objects = ProductQuerySet.as_manager()
+    objects = ProductManager()
 
     class Meta:
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["product_name"], name="idx_product_name"),
-            models.Index(fields=["price"], name="idx_product_price"),
+            # Composite with id so keyset pagination can seek on each ordering.
+            models.Index(fields=["product_name", "id"], name="idx_product_name_id"),
+            models.Index(fields=["price", "id"], name="idx_product_price_id"),
+            models.Index(fields=["created_at", "id"], name="idx_product_created_id"),
         ]
 
     def __str__(self) -> str:
@@ -104,10 +128,38 @@ class Product(models.Model):
                 {"unpublish_at": "Unpublish time must be after publish time."}
             )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored slug so a rename invalidates the old detail pages.
+        instance._loaded_slug = instance.__dict__.get("slug")
+        return instance
+
     def save(self, *args, **kwargs) -> None:
         if not self.slug:
             self.slug = _build_unique_slug(self, self.product_name, Product.objects, 255)
         super().save(*args, **kwargs)
+        catalog_cache.invalidate_product(
+            self, previous_slug=getattr(self, "_loaded_slug", None)
+        )
+        self._loaded_slug = self.slug
+        search.queue_reindex([self.pk])
+
+    def delete(self, *args, **kwargs):
+        catalog_cache.invalidate_product(self)
+        search.queue_reindex([self.pk])
+        return super().delete(*args, **kwargs)
+
+
+class ERPSyncCheckpoint(models.Model):
+    """High-water mark of the last successful ERP sync, one row per feed."""
+
+    name = models.CharField(max_length=50, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.high_water_mark}"
 
 
-__all__ = ["Category", "Product"]
+__all__ = ["Category", "ERPSyncCheckpoint", "Product"]
@@ -1,7 +1,175 @@
-from rest_framework.pagination import PageNumberPagination
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class CustomProductPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class ProductCursorPagination(BasePagination):
+    """Keyset pagination over ``(ordering field, id)`` for product listings.
+
+    Pages are selected with a ``WHERE (field, id) > (value, last_id)`` style
+    predicate instead of OFFSET, and no COUNT query is issued, so every page
+    costs the same regardless of depth. Cursors are opaque base64 tokens that
+    carry the ordering they were issued for.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering_fields = ("created_at", "price", "product_name")
+    default_ordering = "-created_at"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def _get_ordering(self, request) -> str:
+        ordering = request.query_params.get("ordering")
+        if ordering and ordering.lstrip("-") in self.ordering_fields:
+            return ordering
+        return self.default_ordering
+
+    @staticmethod
+    def _serialize_value(value) -> str:
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _parse_value(field: str, raw: str):
+        if field == "created_at":
+            value = parse_datetime(raw)
+            if value is None:
+                raise ValueError(raw)
+            return value
+        if field == "price":
+            return Decimal(raw)
+        return raw
+
+    def encode_cursor(self, ordering: str, instance, reverse: bool) -> str:
+        field = ordering.lstrip("-")
+        payload = {
+            "o": ordering,
+            "v": self._serialize_value(getattr(instance, field)),
+            "id": instance.pk,
+            "r": int(reverse),
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def decode_cursor(self, encoded: str):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            ordering = payload["o"]
+            field = ordering.lstrip("-")
+            if field not in self.ordering_fields:
+                raise ValueError(ordering)
+            value = self._parse_value(field, payload["v"])
+            return ordering, value, int(payload["id"]), bool(payload["r"])
+        except (
+            binascii.Error,
+            InvalidOperation,
+            KeyError,
+            TypeError,
+            UnicodeEncodeError,
+            ValueError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        ordering = self._get_ordering(request)
+        value, last_id, reverse = None, None, False
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            ordering, value, last_id, reverse = self.decode_cursor(encoded)
+        self.ordering = ordering
+
+        field = ordering.lstrip("-")
+        descending = ordering.startswith("-")
+        # Walking backwards flips the sort so the page nearest the cursor comes
+        # first; results are reversed back into display order below.
+        scan_descending = descending != reverse
+        prefix = "-" if scan_descending else ""
+        queryset = queryset.order_by(f"{prefix}{field}", f"{prefix}id")
+        if value is not None:
+            lookup = "lt" if scan_descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{lookup}": value})
+                | Q(**{field: value, f"id__{lookup}": last_id})
+            )
+
+        rows = list(queryset[: self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[: self.page_size_value]
+        if reverse:
+            rows.reverse()
+            self.has_next = value is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = value is not None
+        self.page = rows
+        return rows
+
+    def _link(self, instance, reverse: bool) -> str:
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.ordering, instance, reverse)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -1,13 +1,189 @@
+"""Elasticsearch-backed product search utilities.
+
+Products are mirrored into the ``ELASTICSEARCH_PRODUCT_INDEX`` index by the
+``index_products`` management command (full rebuild) and, when
+``ELASTICSEARCH_AUTO_INDEX`` is enabled, by Celery tasks queued whenever a
+product, category or review changes. The client is built on first use and
+shared by all threads; it keeps a pool of persistent connections per node.
+"""
+
 from __future__ import annotations
 
-"""Elasticsearch-backed product search utilities."""
+import threading
+from typing import Any, Iterable, Iterator, List
 
-from typing import Any, List
-from elasticsearch import Elasticsearch
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from elasticsearch import Elasticsearch, helpers
+
+_client: Elasticsearch | None = None
+_client_lock = threading.Lock()
+
+INDEX_MAPPINGS = {
+    "properties": {
+        "product_name": {"type": "text"},
+        "slug": {"type": "keyword"},
+        "description": {"type": "text"},
+        "tags": {"type": "text"},
+        "category": {"type": "text"},
+        "category_id": {"type": "integer"},
+        "price": {"type": "scaled_float", "scaling_factor": 100},
+        "average_rating": {"type": "float"},
+        "is_active": {"type": "boolean"},
+        "created_at": {"type": "date"},
+    }
+}
+
+SEARCH_FIELDS = ["product_name^3", "tags^2", "description", "category"]
+
+
+def get_client() -> Elasticsearch:
+    """Return the shared client, constructing it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Elasticsearch(
+                    settings.ELASTICSEARCH_URL,
+                    connections_per_node=getattr(
+                        settings, "ELASTICSEARCH_MAX_CONNECTIONS", 10
+                    ),
+                    request_timeout=getattr(settings, "ELASTICSEARCH_TIMEOUT", 5),
+                    retry_on_timeout=True,
+                    max_retries=2,
+                )
+    return _client
+
+
+def reset_client() -> None:
+    """Drop the shared client so the next call rebuilds it from settings."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+def _reset_on_setting_change(*, setting, **kwargs):
+    if setting.startswith("ELASTICSEARCH_"):
+        reset_client()
+
+
+setting_changed.connect(_reset_on_setting_change)
+
+
+def index_name() -> str:
+    return getattr(settings, "ELASTICSEARCH_PRODUCT_INDEX", "products")
+
+
+def ensure_index(client: Elasticsearch | None = None, recreate: bool = False) -> None:
+    """Create the product index with its mappings if it does not exist."""
+    client = client or get_client()
+    name = index_name()
+    if recreate:
+        client.indices.delete(index=name, ignore_unavailable=True)
+    if not client.indices.exists(index=name):
+        client.indices.create(index=name, mappings=INDEX_MAPPINGS)
+
+
+def product_document(product) -> dict[str, Any]:
+    return {
+        "product_name": product.product_name,
+        "slug": product.slug,
+        "description": product.description,
+        "tags": [str(tag) for tag in product.tags or []],
+        "category": product.category.name,
+        "category_id": product.category_id,
+        "price": float(product.price),
+        "average_rating": float(product.average_rating),
+        "is_active": product.is_active,
+        "created_at": product.created_at.isoformat(),
+    }
+
+
+def _index_actions(products: Iterable) -> Iterator[dict[str, Any]]:
+    name = index_name()
+    for product in products:
+        yield {
+            "_op_type": "index",
+            "_index": name,
+            "_id": product.pk,
+            "_source": product_document(product),
+        }
+
+
+def _bulk(client: Elasticsearch, actions: Iterable, chunk_size: int) -> tuple[int, int]:
+    """Send ``actions`` in chunks and return ``(succeeded, failed)`` counts.
+
+    Deleting a document that is already gone counts as a success.
+    """
+    succeeded = failed = 0
+    for ok, item in helpers.streaming_bulk(
+        client, actions, chunk_size=chunk_size, raise_on_error=False, max_retries=3
+    ):
+        if ok or item.get("delete", {}).get("status") == 404:
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
+
 
-# Create a client instance using configured URL
-_es_client = Elasticsearch(settings.ELASTICSEARCH_URL)
+def bulk_index_products(
+    queryset=None, chunk_size: int = 500, client: Elasticsearch | None = None
+) -> tuple[int, int]:
+    """Stream ``queryset`` (default: every product) into the index.
+
+    Rows are read with a server-side iterator and sent in ``chunk_size``
+    bulk requests, so memory use does not grow with the catalog. Returns
+    ``(indexed, failed)`` document counts.
+    """
+    from products.models import Product
+
+    if queryset is None:
+        queryset = Product.objects.all()
+    products = (
+        queryset.select_related("category")
+        .order_by("pk")
+        .iterator(chunk_size=chunk_size)
+    )
+    return _bulk(client or get_client(), _index_actions(products), chunk_size)
+
+
+def reindex_products(
+    product_ids: Iterable[int], client: Elasticsearch | None = None
+) -> tuple[int, int]:
+    """Index the given products, removing ids that no longer exist."""
+    from products.models import Product
+
+    ids = set(product_ids)
+    products = list(Product.objects.select_related("category").filter(id__in=ids))
+    missing = ids - {product.pk for product in products}
+    name = index_name()
+    actions: List[dict[str, Any]] = list(_index_actions(products))
+    actions.extend(
+        {"_op_type": "delete", "_index": name, "_id": product_id}
+        for product_id in sorted(missing)
+    )
+    return _bulk(client or get_client(), actions, chunk_size=500)
+
+
+def search_product_ids(query: str, size: int = 1000) -> list[tuple[int, float]]:
+    """Return ``(product_id, score)`` pairs for ``query``, best match first."""
+    response = get_client().search(
+        index=index_name(),
+        query={
+            "multi_match": {
+                "query": query,
+                "fields": SEARCH_FIELDS,
+                "fuzziness": "AUTO",
+            }
+        },
+        source=False,
+        size=size,
+    )
+    hits = response.get("hits", {}).get("hits", [])
+    return [(int(hit["_id"]), float(hit.get("_score") or 0.0)) for hit in hits]
 
 
 def search_products(query: str) -> List[dict[str, Any]]:
@@ -23,16 +199,49 @@ def search_products(query: str) -> List[dict[str, Any]]:
     list of dict
         A list of product documents returned by Elasticsearch.
     """
-    response = _es_client.search(
-        index="products",
-        body={
-            "query": {
-                "multi_match": {
-                    "query": query,
-                    "fields": ["product_name", "description", "tags", "category"],
-                }
-            }
-        },
+    response = get_client().search(
+        index=index_name(),
+        query={"multi_match": {"query": query, "fields": SEARCH_FIELDS}},
     )
     hits = response.get("hits", {}).get("hits", [])
     return [hit.get("_source", {}) for hit in hits]
+
+
+def _auto_index_enabled() -> bool:
+    return getattr(settings, "ELASTICSEARCH_AUTO_INDEX", False)
+
+
+def queue_reindex(product_ids: Iterable[int]) -> None:
+    """Queue an incremental reindex of ``product_ids`` once the transaction commits."""
+    if not _auto_index_enabled():
+        return
+    ids = sorted(set(product_ids))
+    if not ids:
+        return
+    from products.tasks import index_products_in_search
+
+    transaction.on_commit(lambda: index_products_in_search.delay(ids))
+
+
+def queue_category_reindex(category_id: int) -> None:
+    """Queue a reindex of every product in a category once the transaction commits."""
+    if not _auto_index_enabled():
+        return
+    from products.tasks import index_category_in_search
+
+    transaction.on_commit(lambda: index_category_in_search.delay(category_id))
+
+
+__all__ = [
+    "bulk_index_products",
+    "ensure_index",
+    "get_client",
+    "index_name",
+    "product_document",
+    "queue_category_reindex",
+    "queue_reindex",
+    "reindex_products",
+    "reset_client",
+    "search_product_ids",
+    "search_products",
+]
@@ -0,0 +1,183 @@
+"""Pluggable full-text search backends for the product ``q`` filter.
+
+Each backend narrows a product queryset to the rows matching a free-text
+query and annotates a ``search_rank`` used as the default ordering:
+
+* ``postgres`` matches the trigger-maintained ``search_vector`` column
+  (GIN indexed) and falls back to trigram similarity on ``product_name`` for
+  misspelt names.
+* ``sqlite`` matches the ``products_product_fts`` FTS5 table that mirrors
+  the product rows, ranked with ``bm25``.
+* ``database`` is the portable ``icontains`` scan used when neither index is
+  available.
+* ``es`` asks the Elasticsearch index for ranked ids (see
+  :mod:`products.search`) and falls back to the default backend when the
+  cluster is unreachable.
+
+``PRODUCT_SEARCH_BACKEND`` selects a backend by name; the default ``auto``
+picks one from the database vendor.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, FloatField, QuerySet, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+SQLITE_FTS_TABLE = "products_product_fts"
+
+
+class SearchBackend:
+    name = ""
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(SearchBackend):
+    name = "database"
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        return queryset.filter(
+            Q(product_name__icontains=query) | Q(description__icontains=query)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class PostgresSearchBackend(SearchBackend):
+    name = "postgres"
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            TrigramSimilarity,
+        )
+
+        search_query = SearchQuery(query, search_type="websearch", config="english")
+        return (
+            queryset.annotate(
+                search_rank=SearchRank(F("search_vector"), search_query)
+                + TrigramSimilarity("product_name", query)
+            )
+            .filter(
+                Q(search_vector=search_query) | Q(product_name__trigram_similar=query)
+            )
+            .order_by("-search_rank", "id")
+        )
+
+
+class SQLiteFTSSearchBackend(SearchBackend):
+    name = "sqlite"
+
+    @staticmethod
+    def _match_expression(query: str) -> str:
+        # Quote every token so user input can never be parsed as FTS5 syntax,
+        # and allow prefix matches for search-as-you-type.
+        tokens = re.findall(r"\w+", query)
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        match = self._match_expression(query)
+        if not match:
+            return queryset.none()
+        table = SQLITE_FTS_TABLE
+        product_table = queryset.model._meta.db_table
+        return (
+            queryset.annotate(
+                # bm25() is lower-is-better, negate it to rank like Postgres; the column
+                # weights mirror the A/B/C weights of the tsvector.
+                search_rank=RawSQL(
+                    f"SELECT -bm25({table}, 10.0, 4.0, 1.0) FROM {table} "  # nosec B608
+                    f"WHERE {table} MATCH %s AND rowid = {product_table}.id",
+                    (match,),
+                    output_field=FloatField(),
+                )
+            )
+            .filter(
+                id__in=RawSQL(
+                    f"SELECT rowid FROM {table} WHERE {table} MATCH %s",  # nosec B608
+                    (match,),
+                )
+            )
+            .order_by("-search_rank", "id")
+        )
+
+
+class ElasticsearchSearchBackend(SearchBackend):
+    name = "es"
+    max_results = 1000
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        from elasticsearch import ApiError, TransportError
+
+        from products import search as es_search
+
+        try:
+            hits = es_search.search_product_ids(query, size=self.max_results)
+        except (ApiError, TransportError):
+            logger.warning(
+                "Elasticsearch search failed, using fallback.", exc_info=True
+            )
+            return get_search_backend("auto").search(queryset, query)
+        if not hits:
+            return queryset.none()
+        # Matches are re-read through ``queryset`` so visibility and filters
+        # still come from the database.
+        return (
+            queryset.filter(id__in=[product_id for product_id, _ in hits])
+            .annotate(
+                search_rank=Case(
+                    *(
+                        When(id=product_id, then=Value(score))
+                        for product_id, score in hits
+                    ),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-search_rank", "id")
+        )
+
+
+_BACKENDS: dict[str, type[SearchBackend]] = {
+    backend.name: backend
+    for backend in (
+        DatabaseSearchBackend,
+        PostgresSearchBackend,
+        SQLiteFTSSearchBackend,
+        ElasticsearchSearchBackend,
+    )
+}
+
+
+def register_search_backend(backend: type[SearchBackend]) -> None:
+    _BACKENDS[backend.name] = backend
+
+
+def get_search_backend(name: str | None = None) -> SearchBackend:
+    """Return the backend called ``name`` or the configured default."""
+    backend = name or str(getattr(settings, "PRODUCT_SEARCH_BACKEND", "auto"))
+    if backend == "auto":
+        backend = {"postgresql": "postgres", "sqlite": "sqlite"}.get(
+            connection.vendor, "database"
+        )
+    try:
+        return _BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown product search backend: {backend}")
+
+
+__all__ = [
+    "DatabaseSearchBackend",
+    "ElasticsearchSearchBackend",
+    "PostgresSearchBackend",
+    "SQLiteFTSSearchBackend",
+    "SearchBackend",
+    "get_search_backend",
+    "register_search_backend",
+]
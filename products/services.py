@@ -2,11 +2,31 @@
 
 from __future__ import annotations
 
-from typing import List
+import logging
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Iterable, Iterator, List, Mapping
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.utils import timezone
 
 from orders.models import OrderItem
-from products.models import Product
-from erp.client import get_inventory
+from products import cache as catalog_cache
+from products.models import ERPSyncCheckpoint, Product
+from erp.client import (
+    ERPCircuitOpenError,
+    ERPClientError,
+    get_inventory,
+    get_inventory_batch,
+    get_inventory_changes,
+)
+
+logger = logging.getLogger(__name__)
 
 
 def get_recommended_products(user, limit: int = 5) -> List[Product]:
@@ -49,3 +69,258 @@ def sync_product_inventory(product: Product) -> int:
     product.inventory = inventory
     product.save()
     return inventory
+
+
+INVENTORY_SYNC_CHECKPOINT = "erp-inventory"
+
+
+@dataclass
+class InventorySyncStats:
+    """Counters describing one ERP inventory sync run."""
+
+    mode: str = "full"
+    requests: int = 0
+    checked: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    unmatched: int = 0
+    failed: int = 0
+    skipped: int = 0
+    aborted: bool = False
+    elapsed: float = 0.0
+    errors: Counter = field(default_factory=Counter)
+
+    @property
+    def rate(self) -> float:
+        """SKUs checked per second."""
+        return self.checked / self.elapsed if self.elapsed else 0.0
+
+    def record_error(self, exc: ERPClientError) -> None:
+        if isinstance(exc, ERPCircuitOpenError):
+            self.aborted = True
+        self.errors[type(exc.__cause__ or exc).__name__] += 1
+
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _apply_levels(
+    rows: Iterable[tuple[int, str | None, int]],
+    levels: Mapping[str, int],
+    stats: InventorySyncStats,
+    batch_size: int,
+) -> None:
+    """Write the ERP ``levels`` that differ from the ``rows`` already stored."""
+    changed: dict[int, int] = {}
+    for product_id, erp_id, current in rows:
+        inventory = levels.get(erp_id or str(product_id))
+        if inventory is None:
+            stats.unmatched += 1
+            continue
+        stats.checked += 1
+        inventory = max(inventory, 0)
+        if inventory == current:
+            stats.unchanged += 1
+        else:
+            changed[product_id] = inventory
+    if not changed:
+        return
+    products = [
+        Product(pk=product_id, inventory=inventory)
+        for product_id, inventory in changed.items()
+    ]
+    with transaction.atomic():
+        Product.objects.bulk_update(products, ["inventory"], batch_size=batch_size)
+    catalog_cache.invalidate_products(changed, listed=False)
+    stats.updated += len(changed)
+
+
+def _fetch_batch(batch: list[tuple[int, str | None, int]]):
+    try:
+        return get_inventory_batch(
+            [erp_id or str(product_id) for product_id, erp_id, _ in batch]
+        )
+    except ERPClientError as exc:
+        return exc
+
+
+def _sync_full(
+    queryset, concurrency: int, batch_size: int, stats: InventorySyncStats
+) -> None:
+    rows = (
+        queryset.order_by("pk")
+        .values_list("pk", "erp_id", "inventory")
+        .iterator(chunk_size=batch_size)
+    )
+    in_flight: deque = deque()
+
+    def _collect():
+        batch, future = in_flight.popleft()
+        result = future.result()
+        if isinstance(result, ERPClientError):
+            stats.record_error(result)
+            if isinstance(result, ERPCircuitOpenError):
+                stats.skipped += len(batch)
+            else:
+                stats.requests += 1
+                stats.failed += len(batch)
+            return
+        stats.requests += 1
+        _apply_levels(batch, result, stats, batch_size)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for batch in _chunked(rows, batch_size):
+            if stats.aborted:
+                break
+            in_flight.append((batch, executor.submit(_fetch_batch, batch)))
+            # Keep at most ``concurrency`` requests in flight and write each
+            # batch back as soon as it arrives.
+            if len(in_flight) >= concurrency:
+                _collect()
+        while in_flight:
+            _collect()
+
+
+def _sync_delta(since, batch_size: int, stats: InventorySyncStats):
+    """Apply every page of changes since ``since``; return the new mark."""
+    cursor = None
+    high_water_mark = since
+    while True:
+        try:
+            levels, cursor, page_mark = get_inventory_changes(since, cursor)
+        except ERPClientError as exc:
+            stats.record_error(exc)
+            stats.aborted = True
+            return None
+        stats.requests += 1
+        for chunk in _chunked(levels, batch_size):
+            numeric_ids = [int(key) for key in chunk if key.isdigit()]
+            rows = list(
+                Product.objects.filter(
+                    Q(erp_id__in=chunk)
+                    | Q(pk__in=numeric_ids, erp_id__isnull=True)
+                    | Q(pk__in=numeric_ids, erp_id="")
+                ).values_list("pk", "erp_id", "inventory")
+            )
+            found = {erp_id or str(product_id) for product_id, erp_id, _ in rows}
+            stats.unmatched += len(set(chunk) - found)
+            _apply_levels(rows, levels, stats, batch_size)
+        high_water_mark = page_mark or high_water_mark
+        if not cursor:
+            return high_water_mark
+
+
+def sync_inventory_from_erp(
+    queryset=None, concurrency: int = 8, batch_size: int = 500, full: bool = False
+) -> InventorySyncStats:
+    """Refresh product inventory from the ERP system.
+
+    When a previous run left a high-water mark, only the SKUs the ERP reports
+    as changed since then are fetched (``GET /inventory?changed_since=``).
+    Otherwise, or with ``full=True`` or an explicit ``queryset``, products are
+    streamed from the database and fetched ``batch_size`` ids per
+    ``POST /inventory/batch`` request, with up to ``concurrency`` requests in
+    flight. Only changed levels are written back, with ``bulk_update``.
+
+    The mark only advances after a run that completed without request
+    errors. A run stops once the ERP circuit breaker opens, and the products
+    it did not reach are counted as skipped. ``errors`` counts failed requests
+    by exception type.
+    """
+    stats = InventorySyncStats()
+    started = time.perf_counter()
+    checkpoint, _ = ERPSyncCheckpoint.objects.get_or_create(
+        name=INVENTORY_SYNC_CHECKPOINT
+    )
+    high_water_mark = None
+    if queryset is None and not full and checkpoint.high_water_mark:
+        stats.mode = "delta"
+        high_water_mark = _sync_delta(checkpoint.high_water_mark, batch_size, stats)
+    else:
+        run_started = timezone.now()
+        _sync_full(
+            Product.objects.all() if queryset is None else queryset,
+            concurrency,
+            batch_size,
+            stats,
+        )
+        if queryset is None and not stats.errors:
+            # Overlap the next delta with this run to absorb clock skew
+            # between the ERP and this server.
+            overlap = getattr(settings, "ERP_SYNC_OVERLAP_SECONDS", 300)
+            high_water_mark = run_started - timedelta(seconds=overlap)
+    if high_water_mark is not None and not stats.errors:
+        checkpoint.high_water_mark = high_water_mark
+        checkpoint.save(update_fields=["high_water_mark", "updated_at"])
+    stats.elapsed = time.perf_counter() - started
+    logger.info(
+        "ERP inventory %s sync checked %s products with %s requests in %.2fs "
+        "(%.1f/s): %s updated, %s unchanged, %s unmatched, %s failed, "
+        "%s skipped%s.",
+        stats.mode,
+        stats.checked,
+        stats.requests,
+        stats.elapsed,
+        stats.rate,
+        stats.updated,
+        stats.unchanged,
+        stats.unmatched,
+        stats.failed,
+        stats.skipped,
+        " (aborted)" if stats.aborted else "",
+    )
+    return stats
+
+
+def _inventory_case(quantities: Mapping[int, int], sign: int) -> Case:
+    return Case(
+        *[
+            When(id=product_id, then=F("inventory") + sign * quantity)
+            for product_id, quantity in quantities.items()
+        ],
+        default=F("inventory"),
+        output_field=PositiveIntegerField(),
+    )
+
+
+def reserve_inventory(quantities: Mapping[int, int]) -> None:
+    """Decrement inventory for several products with a single UPDATE.
+
+    ``quantities`` maps product ids to the number of units to reserve. Each
+    row is only updated when it still holds enough stock, and the number of
+    updated rows is checked so that no product can go negative. Callers must
+    run inside a transaction so a failed reservation is rolled back as a whole.
+    """
+    quantities = {pid: qty for pid, qty in quantities.items() if qty}
+    if not quantities:
+        return
+
+    guard = Q()
+    for product_id, quantity in quantities.items():
+        guard |= Q(id=product_id, inventory__gte=quantity)
+
+    updated = Product.objects.filter(guard).update(
+        inventory=_inventory_case(quantities, -1)
+    )
+    if updated != len(quantities):
+        raise ValueError("Insufficient inventory for one or more items.")
+    catalog_cache.invalidate_products(quantities, listed=False)
+
+
+def release_inventory(quantities: Mapping[int, int]) -> None:
+    """Increment inventory for several products with a single UPDATE."""
+    quantities = {pid: qty for pid, qty in quantities.items() if qty}
+    if not quantities:
+        return
+    Product.objects.filter(id__in=list(quantities)).update(
+        inventory=_inventory_case(quantities, 1)
+    )
+    catalog_cache.invalidate_products(quantities, listed=False)
@@ -1,3 +1,15 @@
-from backend.tasks.products import send_low_stock_email, upload_product_image_to_s3
+from backend.tasks.products import (
+    index_category_in_search,
+    index_products_in_search,
+    send_low_stock_email,
+    sync_erp_inventory,
+    upload_product_image_to_s3,
+)
 
-__all__ = ["send_low_stock_email", "upload_product_image_to_s3"]
+__all__ = [
+    "index_category_in_search",
+    "index_products_in_search",
+    "send_low_stock_email",
+    "sync_erp_inventory",
+    "upload_product_image_to_s3",
+]
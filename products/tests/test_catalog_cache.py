@@ -0,0 +1,220 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from products import cache as catalog_cache
+from products.models import Category, Product
+from products.services import reserve_inventory
+from reviews.services import update_product_rating
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Prints")
+        self.product = Product.objects.create(
+            product_name="Harbor Print",
+            category=self.category,
+            price="40.00",
+            inventory=10,
+        )
+        self.list_url = reverse("product-list", kwargs={"version": "v1"})
+        self.detail_url = reverse(
+            "product-detail", kwargs={"version": "v1", "slug": self.product.slug}
+        )
+
+    def test_list_is_served_from_cache(self):
+        first = self.client.get(self.list_url, {"page_size": 10})
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.list_url, {"page_size": "10"})
+
+        self.assertEqual(second.json(), first.json())
+
+    def test_product_save_invalidates_list_and_detail(self):
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        self.product.price = "45.00"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+
+        self.assertEqual(
+            self.client.get(self.list_url).json()["results"][0]["price"], "45.00"
+        )
+        self.assertEqual(self.client.get(self.detail_url).json()["price"], "45.00")
+
+    def test_detail_is_invalidated_by_inventory_and_rating_updates(self):
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_inventory({self.product.id: 3})
+        self.assertEqual(self.client.get(self.detail_url).json()["inventory"], 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_product_rating(self.product.id)
+        with self.assertNumQueries(1):
+            self.client.get(self.detail_url)
+
+    def test_inventory_updates_keep_list_cached_with_live_stock(self):
+        self.client.get(self.list_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_inventory({self.product.id: 4})
+
+        with self.assertNumQueries(1):
+            payload = self.client.get(self.list_url).json()
+        self.assertEqual(payload["results"][0]["inventory"], 6)
+
+    def test_slug_change_invalidates_old_detail(self):
+        self.client.get(self.detail_url)
+        product = Product.objects.get(pk=self.product.pk)
+
+        product.slug = "harbor-print-large"
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+    def test_category_rename_invalidates_product_detail(self):
+        self.client.get(self.detail_url)
+
+        self.category.name = "Fine Art Prints"
+        self.category.save()
+
+        payload = self.client.get(self.detail_url).json()
+        self.assertEqual(payload["category"]["name"], "Fine Art Prints")
+
+    def test_list_entry_expires_at_the_next_scheduled_unpublish(self):
+        self.product.unpublish_at = timezone.now() + timedelta(seconds=30)
+        self.product.save()
+
+        backend = catalog_cache._cache()
+        with patch.object(backend, "set", wraps=backend.set) as store:
+            self.client.get(self.list_url)
+
+        (timeout,) = [
+            call.args[2]
+            for call in store.call_args_list
+            if call.args[0].startswith("catalog:list:")
+        ]
+        self.assertLessEqual(timeout, 30)
+
+    def test_mixed_case_category_is_not_served_another_page(self):
+        category = Category.objects.create(name="Fine Art")
+        Product.objects.create(
+            product_name="Gallery Print", category=category, price="60.00"
+        )
+
+        upper = self.client.get(self.list_url, {"category": category.slug.upper()})
+        lower = self.client.get(self.list_url, {"category": category.slug})
+
+        self.assertEqual(upper.json()["count"], 0)
+        self.assertEqual(lower.json()["count"], 1)
+
+    def test_search_queries_bypass_cache(self):
+        self.client.get(self.list_url, {"q": "harbor"})
+
+        with self.assertNumQueries(2):
+            self.client.get(self.list_url, {"q": "harbor"})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class PrewarmCachesCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Lamps")
+        self.old = Product.objects.create(
+            product_name="Old Lamp", category=self.category, price="10.00"
+        )
+        Product.objects.filter(pk=self.old.pk).update(
+            updated_at=timezone.now() - timedelta(days=10)
+        )
+        self.new = Product.objects.create(
+            product_name="New Lamp", category=self.category, price="12.00"
+        )
+
+    def _detail_url(self, product):
+        return reverse("product-detail", kwargs={"version": "v1", "slug": product.slug})
+
+    def test_warms_detail_and_list_payloads(self):
+        out = StringIO()
+        call_command(
+            "prewarm_caches", concurrency=1, base_url="http://testserver", stdout=out
+        )
+
+        self.assertIn("Warmed 4 payloads", out.getvalue())
+        with self.assertNumQueries(0):
+            self.client.get(self._detail_url(self.old))
+            self.client.get(reverse("product-list", kwargs={"version": "v1"}))
+            self.client.get(
+                reverse("product-list", kwargs={"version": "v1"}),
+                {"category": self.category.slug},
+            )
+
+        out = StringIO()
+        call_command(
+            "prewarm_caches", concurrency=1, base_url="http://testserver", stdout=out
+        )
+        self.assertIn("Warmed 2 payloads", out.getvalue())
+        self.assertIn("already cached 2", out.getvalue())
+
+    def test_since_and_only_stale_limit_products(self):
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        call_command(
+            "prewarm_caches",
+            concurrency=1,
+            since=since,
+            list_pages=0,
+            stdout=StringIO(),
+        )
+        with self.assertNumQueries(0):
+            self.client.get(self._detail_url(self.new))
+
+        out = StringIO()
+        call_command(
+            "prewarm_caches", concurrency=1, only_stale=True, list_pages=0, stdout=out
+        )
+        self.assertIn("Warmed 1 payloads", out.getvalue())
+        self.assertIn("skipped 1", out.getvalue())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class PrewarmCachesConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Rugs")
+        self.products = [
+            Product.objects.create(
+                product_name=f"Rug {index}", category=category, price="20.00"
+            )
+            for index in range(5)
+        ]
+
+    def test_workers_warm_every_payload(self):
+        out = StringIO()
+        call_command(
+            "prewarm_caches",
+            concurrency=3,
+            chunk_size=2,
+            base_url="http://testserver",
+            stdout=out,
+        )
+
+        self.assertIn("Warmed 7 payloads", out.getvalue())
+        self.assertIn("failed 0", out.getvalue())
+        for product in self.products:
+            self.assertTrue(catalog_cache.is_detail_fresh(product.slug))
@@ -0,0 +1,224 @@
+import json
+import threading
+from datetime import datetime, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from erp.client import CircuitBreaker, reset_client
+from products.models import Category, ERPSyncCheckpoint, Product
+from products.services import INVENTORY_SYNC_CHECKPOINT, sync_inventory_from_erp
+
+
+class StubERPServer:
+    """Local HTTP server implementing the ERP inventory endpoints.
+
+    ``levels`` backs ``POST /inventory/batch``; ``changes`` is a list of pages
+    served by ``GET /inventory?changed_since=`` using the page index as the
+    cursor. Setting ``status`` makes every request fail with that code.
+    """
+
+    def __init__(self, levels=None, changes=None, high_water_mark=None):
+        self.levels = levels or {}
+        self.changes = changes or []
+        self.high_water_mark = high_water_mark
+        self.status = None
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests.append(("POST", self.path, payload))
+                if stub.status:
+                    return self._send(stub.status, {})
+                items = [
+                    {"id": sku, "inventory": stub.levels[sku]}
+                    for sku in payload["ids"]
+                    if sku in stub.levels
+                ]
+                self._send(200, {"items": items})
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                stub.requests.append(("GET", url.path, params))
+                if stub.status:
+                    return self._send(stub.status, {})
+                page = int(params.get("cursor", 0))
+                has_next = page + 1 < len(stub.changes)
+                self._send(
+                    200,
+                    {
+                        "items": [
+                            {"id": sku, "inventory": level}
+                            for sku, level in stub.changes[page].items()
+                        ],
+                        "next_cursor": str(page + 1) if has_next else None,
+                        "high_water_mark": stub.high_water_mark,
+                    },
+                )
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(
+    ERP_API_KEY="",
+    ERP_MAX_RETRIES=0,
+    ERP_CIRCUIT_BREAKER_THRESHOLD=2,
+    ERP_SYNC_OVERLAP_SECONDS=0,
+)
+class InventorySyncTests(TestCase):
+    def setUp(self):
+        reset_client()
+        self.addCleanup(reset_client)
+        category = Category.objects.create(name="Mugs")
+        self.products = [
+            Product.objects.create(
+                product_name=f"Mug {index}",
+                category=category,
+                price="10.00",
+                inventory=5,
+                erp_id=f"SKU-{index}",
+            )
+            for index in range(6)
+        ]
+
+    def _sync(self, stub, **kwargs):
+        with stub, override_settings(ERP_API_URL=stub.url):
+            return sync_inventory_from_erp(**kwargs)
+
+    def _inventory(self):
+        return [p.inventory for p in Product.objects.order_by("pk")]
+
+    def test_full_sync_fetches_in_batches_and_bulk_updates(self):
+        stub = StubERPServer(levels={f"SKU-{index}": index for index in range(6)})
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = self._sync(stub, concurrency=2, batch_size=4)
+
+        self.assertEqual(self._inventory(), [0, 1, 2, 3, 4, 5])
+        self.assertEqual((stats.mode, stats.requests), ("full", 2))
+        self.assertEqual((stats.checked, stats.updated, stats.unchanged), (6, 5, 1))
+        self.assertEqual(sorted(len(r[2]["ids"]) for r in stub.requests), [2, 4])
+        updates = [q for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        # One bulk_update per batch plus the checkpoint.
+        self.assertEqual(len(updates), 3)
+        checkpoint = ERPSyncCheckpoint.objects.get(name=INVENTORY_SYNC_CHECKPOINT)
+        self.assertIsNotNone(checkpoint.high_water_mark)
+
+    def test_unknown_skus_are_unmatched_not_failed(self):
+        stub = StubERPServer(levels={f"SKU-{index}": 9 for index in range(1, 6)})
+
+        stats = self._sync(stub)
+
+        self.assertEqual((stats.unmatched, stats.failed, stats.updated), (1, 0, 5))
+        self.assertEqual(self._inventory(), [5, 9, 9, 9, 9, 9])
+
+    def test_delta_sync_only_touches_changed_skus(self):
+        since = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        ERPSyncCheckpoint.objects.create(
+            name=INVENTORY_SYNC_CHECKPOINT, high_water_mark=since
+        )
+        stub = StubERPServer(
+            changes=[{"SKU-1": 11}, {"SKU-4": 44, "SKU-404": 1}],
+            high_water_mark="2026-01-02T00:00:00+00:00",
+        )
+
+        stats = self._sync(stub)
+
+        self.assertEqual(self._inventory(), [5, 11, 5, 5, 44, 5])
+        self.assertEqual(stats.mode, "delta")
+        self.assertEqual((stats.requests, stats.updated, stats.unmatched), (2, 2, 1))
+        self.assertEqual(stub.requests[0][2], {"changed_since": since.isoformat()})
+        self.assertEqual(stub.requests[1][2]["cursor"], "1")
+        checkpoint = ERPSyncCheckpoint.objects.get(name=INVENTORY_SYNC_CHECKPOINT)
+        self.assertEqual(
+            checkpoint.high_water_mark,
+            datetime(2026, 1, 2, tzinfo=dt_timezone.utc),
+        )
+
+    def test_failed_delta_keeps_high_water_mark(self):
+        since = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        ERPSyncCheckpoint.objects.create(
+            name=INVENTORY_SYNC_CHECKPOINT, high_water_mark=since
+        )
+        stub = StubERPServer()
+        stub.status = 503
+
+        stats = self._sync(stub)
+
+        self.assertTrue(stats.aborted)
+        self.assertEqual(stats.errors, {"HTTPError": 1})
+        checkpoint = ERPSyncCheckpoint.objects.get(name=INVENTORY_SYNC_CHECKPOINT)
+        self.assertEqual(checkpoint.high_water_mark, since)
+
+    def test_open_circuit_aborts_full_run(self):
+        stub = StubERPServer()
+        stub.status = 503
+
+        stats = self._sync(stub, concurrency=1, batch_size=2)
+
+        self.assertTrue(stats.aborted)
+        self.assertEqual(len(stub.requests), 2)
+        self.assertEqual((stats.failed, stats.skipped), (4, 2))
+        self.assertFalse(
+            ERPSyncCheckpoint.objects.filter(high_water_mark__isnull=False).exists()
+        )
+
+    def test_command_reports_throughput(self):
+        stub = StubERPServer(levels={f"SKU-{index}": 1 for index in range(6)})
+        out = StringIO()
+
+        with stub, override_settings(ERP_API_URL=stub.url):
+            call_command("sync_inventory_from_erp", "--full", stdout=out)
+
+        self.assertIn("Full sync checked 6 products with 1 requests", out.getvalue())
+        self.assertIn("updated 6", out.getvalue())
+
+
+class CircuitBreakerTests(TestCase):
+    def test_half_open_trial_closes_or_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+        breaker.record_failure()
+        self.assertFalse(breaker.is_open)
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertFalse(breaker.is_open)
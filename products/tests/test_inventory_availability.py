@@ -1,8 +1,10 @@
+from django.db import transaction
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 
 from products.models import Category, Product
+from products.services import release_inventory, reserve_inventory
 
 
 @override_settings(SECURE_SSL_REDIRECT=False)
@@ -50,3 +52,42 @@ class ProductAvailabilityTest(TestCase):
         response = self.client.get(url, {"quantity": "nope"})
 
         self.assertEqual(response.status_code, 400)
+
+
+class InventoryReservationTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Bulk")
+        self.first = Product.objects.create(
+            product_name="First", price=5, inventory=5, category=self.category
+        )
+        self.second = Product.objects.create(
+            product_name="Second", price=5, inventory=2, category=self.category
+        )
+
+    def test_reserve_inventory_uses_single_update(self):
+        with self.assertNumQueries(1):
+            reserve_inventory({self.first.id: 3, self.second.id: 2})
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.inventory, 2)
+        self.assertEqual(self.second.inventory, 0)
+
+    def test_reserve_inventory_rejects_oversell(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                reserve_inventory({self.first.id: 1, self.second.id: 3})
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.inventory, 5)
+        self.assertEqual(self.second.inventory, 2)
+
+    def test_release_inventory_restores_stock(self):
+        with self.assertNumQueries(1):
+            release_inventory({self.first.id: 2, self.second.id: 1})
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.inventory, 7)
+        self.assertEqual(self.second.inventory, 3)
@@ -1,7 +1,10 @@
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APIClient
@@ -144,3 +147,136 @@ class ProductApiTests(TestCase):
         self.assertEqual(response.status_code, 400)
         error_fields = {error.get("field") for error in response.data.get("errors", [])}
         self.assertIn("unpublish_at", error_fields)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class ProductCursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        category = Category.objects.create(name="Posters")
+        prices = ["5.00", "7.00", "7.00", "7.00", "9.00"]
+        self.products = [
+            Product.objects.create(
+                product_name=f"Poster {index}", category=category, price=price
+            )
+            for index, price in enumerate(prices)
+        ]
+        self.url = reverse("product-list", kwargs={"version": "v1"})
+
+    def test_walks_pages_without_count_or_offset(self):
+        params = {"pagination": "cursor", "ordering": "price", "page_size": 2}
+        seen = []
+        next_url = None
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+            while True:
+                self.assertEqual(response.status_code, 200)
+                seen.extend(item["id"] for item in response.data["results"])
+                next_url = response.data["next"]
+                if not next_url:
+                    break
+                response = self.client.get(next_url)
+
+        expected = [
+            p.id for p in sorted(self.products, key=lambda p: (p.price, p.id))
+        ]
+        self.assertEqual(seen, expected)
+        self.assertNotIn("count", response.data)
+        for query in queries.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"].upper())
+            self.assertNotIn("OFFSET", query["sql"].upper())
+
+    def test_previous_link_returns_prior_page(self):
+        params = {"pagination": "cursor", "ordering": "-price", "page_size": 2}
+        first = self.client.get(self.url, params)
+        self.assertIsNone(first.data["previous"])
+        second = self.client.get(first.data["next"])
+
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(
+            [item["id"] for item in back.data["results"]],
+            [item["id"] for item in first.data["results"]],
+        )
+        self.assertIsNone(back.data["previous"])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name="Bath")
+        self.in_description = Product.objects.create(
+            product_name="Bath Bomb",
+            description="Fizzes with lavender oil",
+            category=category,
+            price="4.00",
+        )
+        self.in_name = Product.objects.create(
+            product_name="Lavender Soap",
+            description="Handmade soap",
+            category=category,
+            price="6.00",
+        )
+        Product.objects.create(
+            product_name="Loofah", description="Natural", category=category, price="3.00"
+        )
+        self.url = reverse("product-search", kwargs={"version": "v1"})
+
+    def test_search_is_ranked_and_paginated(self):
+        response = self.client.get(self.url, {"q": "lavender"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [self.in_name.id, self.in_description.id],
+        )
+
+    def test_search_matches_prefixes_and_follows_updates(self):
+        response = self.client.get(self.url, {"q": "lav"})
+        self.assertEqual(response.data["count"], 2)
+
+        self.in_name.product_name = "Rose Soap"
+        self.in_name.save()
+        self.in_description.delete()
+
+        self.assertEqual(self.client.get(self.url, {"q": "lav"}).data["count"], 0)
+        self.assertEqual(self.client.get(self.url, {"q": "rose"}).data["count"], 1)
+
+    def test_blank_query_returns_an_empty_page(self):
+        response = self.client.get(self.url, {"q": "  "})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 0)
+        self.assertEqual(response.data["results"], [])
+
+    def test_search_vector_is_not_loaded_with_products(self):
+        product = Product.objects.get(pk=self.in_name.pk)
+
+        self.assertIn("search_vector", product.get_deferred_fields())
+        self.assertIn("search_vector", self.in_name.category.products.first().get_deferred_fields())
+
+    def test_query_syntax_is_treated_as_text(self):
+        for query in ['"', "NEAR(", "lavender OR *", "-"]:
+            response = self.client.get(self.url, {"q": query})
+            self.assertEqual(response.status_code, 200, query)
+
+    def test_list_ordering_overrides_rank(self):
+        url = reverse("product-list", kwargs={"version": "v1"})
+        response = self.client.get(url, {"q": "lavender", "ordering": "price"})
+
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [self.in_description.id, self.in_name.id],
+        )
+
+    @override_settings(PRODUCT_SEARCH_BACKEND="database")
+    def test_database_backend_fallback(self):
+        response = self.client.get(self.url, {"q": "Lavender"})
+        self.assertEqual(response.data["count"], 2)
@@ -0,0 +1,198 @@
+import json
+import re
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from elastic_transport import ConnectionError as ESConnectionError
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from products.search import SEARCH_FIELDS
+from reviews.models import Review
+from reviews.services import update_product_rating
+
+
+class _Serializers:
+    def get_serializer(self, mimetype):
+        from elasticsearch.serializer import JsonSerializer
+
+        return JsonSerializer()
+
+
+class _Indices:
+    def __init__(self, es):
+        self.es = es
+
+    def exists(self, index):
+        return index in self.es.indices_created
+
+    def create(self, index, mappings=None):
+        self.es.indices_created[index] = mappings
+
+    def delete(self, index, ignore_unavailable=False):
+        self.es.indices_created.pop(index, None)
+        self.es.documents.clear()
+
+
+class FakeElasticsearch:
+    """In-process stand-in for the subset of the client the pipeline uses."""
+
+    def __init__(self):
+        self.documents = {}
+        self.indices_created = {}
+        self.bulk_calls = 0
+        self.indices = _Indices(self)
+        self.transport = type("Transport", (), {"serializers": _Serializers()})()
+
+    def options(self, **kwargs):
+        return self
+
+    def close(self):
+        pass
+
+    def bulk(self, operations, **kwargs):
+        self.bulk_calls += 1
+        lines = iter(json.loads(line) for line in operations)
+        items = []
+        for header in lines:
+            ((op_type, meta),) = header.items()
+            doc_id = str(meta["_id"])
+            if op_type == "delete":
+                status = 200 if self.documents.pop(doc_id, None) else 404
+            else:
+                self.documents[doc_id] = next(lines)
+                status = 201
+            items.append({op_type: {"_id": doc_id, "status": status}})
+        body = {"errors": False, "items": items}
+        return type("Response", (), {"body": body})()
+
+    def search(self, index, query, size=10, source=True):
+        terms = re.findall(r"\w+", query["multi_match"]["query"].lower())
+        hits = []
+        for doc_id, doc in self.documents.items():
+            score = 0.0
+            for field in SEARCH_FIELDS:
+                name, _, boost = field.partition("^")
+                words = re.findall(r"\w+", json.dumps(doc.get(name, "")).lower())
+                score += sum(words.count(term) for term in terms) * float(boost or 1)
+            if score:
+                hits.append({"_id": doc_id, "_score": score, "_source": doc})
+        hits.sort(key=lambda hit: -hit["_score"])
+        return {"hits": {"hits": hits[:size]}}
+
+
+class SearchIndexingTests(TestCase):
+    def setUp(self):
+        self.es = FakeElasticsearch()
+        patcher = patch("products.search.get_client", return_value=self.es)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.category = Category.objects.create(name="Candles")
+        self.product = Product.objects.create(
+            product_name="Cedar Candle", category=self.category, price="12.00"
+        )
+
+    def test_command_bulk_indexes_catalog_in_chunks(self):
+        for index in range(4):
+            Product.objects.create(
+                product_name=f"Candle {index}", category=self.category, price="5.00"
+            )
+        out = StringIO()
+
+        call_command("index_products", "--chunk-size", "2", stdout=out)
+
+        self.assertIn("products", self.es.indices_created)
+        self.assertEqual(len(self.es.documents), 5)
+        self.assertEqual(self.es.bulk_calls, 3)
+        self.assertIn("Indexed 5 products", out.getvalue())
+        document = self.es.documents[str(self.product.pk)]
+        self.assertEqual(document["category"], "Candles")
+
+    def test_auto_index_is_disabled_by_default(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.product_name = "Pine Candle"
+            self.product.save()
+        self.assertEqual(self.es.documents, {})
+
+    @override_settings(ELASTICSEARCH_AUTO_INDEX=True)
+    def test_product_category_and_review_changes_reindex(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.product_name = "Pine Candle"
+            self.product.save()
+        document = self.es.documents[str(self.product.pk)]
+        self.assertEqual(document["product_name"], "Pine Candle")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Home Fragrance"
+            self.category.save()
+        document = self.es.documents[str(self.product.pk)]
+        self.assertEqual(document["category"], "Home Fragrance")
+
+        user = get_user_model().objects.create_user(
+            username="reviewer", password="pass"
+        )  # nosec B106
+        Review.objects.create(
+            product=self.product, user=user, rating=4, status=Review.Status.APPROVED
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            update_product_rating(self.product.pk)
+        self.assertEqual(self.es.documents[str(self.product.pk)]["average_rating"], 4.0)
+
+        product_id = str(self.product.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.all().delete()
+            self.product.delete()
+        self.assertNotIn(product_id, self.es.documents)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class ElasticsearchSearchBackendTests(TestCase):
+    def setUp(self):
+        self.es = FakeElasticsearch()
+        patcher = patch("products.search.get_client", return_value=self.es)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        category = Category.objects.create(name="Teas")
+        self.weak = Product.objects.create(
+            product_name="Breakfast Blend",
+            description="A bold green and black tea",
+            category=category,
+            price="8.00",
+        )
+        self.strong = Product.objects.create(
+            product_name="Green Tea", category=category, price="9.00"
+        )
+        self.hidden = Product.objects.create(
+            product_name="Green Matcha",
+            category=category,
+            price="20.00",
+            is_active=False,
+        )
+        call_command("index_products", stdout=StringIO())
+        self.url = reverse("product-search", kwargs={"version": "v1"})
+
+    def test_es_backend_ranks_and_filters_through_database(self):
+        response = self.client.get(self.url, {"q": "green", "search_backend": "es"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [self.strong.id, self.weak.id],
+        )
+
+    def test_unknown_backend_is_rejected(self):
+        response = self.client.get(self.url, {"q": "green", "search_backend": "solr"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_falls_back_to_database_search_when_cluster_is_down(self):
+        with patch.object(self.es, "search", side_effect=ESConnectionError("down")):
+            response = self.client.get(self.url, {"q": "green", "search_backend": "es"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
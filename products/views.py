@@ -3,13 +3,34 @@ from decimal import Decimal, InvalidOperation
 from django.db.models import Q
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from backend.permissions import IsAdminOrReadOnly
+from products import cache as catalog_cache
 from products.models import Product
-from products.pagination import CustomProductPagination
+from products.pagination import CustomProductPagination, ProductCursorPagination
+from products.search_backends import get_search_backend
 from products.serializers import ProductSerializer, ProductWriteSerializer
 
+ALLOWED_ORDERING = {
+    "product_name",
+    "-product_name",
+    "price",
+    "-price",
+    "created_at",
+    "-created_at",
+}
+
+
+def _normalize_decimal(value: str | None) -> str | None:
+    if not value:
+        return None
+    try:
+        return str(Decimal(value).normalize())
+    except InvalidOperation:
+        return None
+
 
 class ProductViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminOrReadOnly]
@@ -21,7 +42,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         if not self.request.user.is_staff:
             queryset = queryset.published()
 
-        category = self.request.query_params.get("category")
+        category = (self.request.query_params.get("category") or "").strip()
         if category:
             if category.isdigit():
                 queryset = queryset.filter(category_id=category)
@@ -44,26 +65,93 @@ class ProductViewSet(viewsets.ModelViewSet):
             except InvalidOperation:
                 pass
 
-        query = self.request.query_params.get("q")
+        query = (self.request.query_params.get("q") or "").strip()
         if query:
-            queryset = queryset.filter(
-                Q(product_name__icontains=query) | Q(description__icontains=query)
-            )
+            # Results come back ranked by relevance unless ``ordering`` is given.
+            queryset = self._search_backend().search(queryset, query)
 
         ordering = self.request.query_params.get("ordering")
-        allowed_ordering = {
-            "product_name",
-            "-product_name",
-            "price",
-            "-price",
-            "created_at",
-            "-created_at",
-        }
-        if ordering in allowed_ordering:
+        if ordering in ALLOWED_ORDERING:
             queryset = queryset.order_by(ordering)
 
         return queryset
 
+    def _search_backend(self):
+        name = None
+        if self.action == "search":
+            name = self.request.query_params.get("search_backend") or None
+        try:
+            return get_search_backend(name)
+        except ValueError as exc:
+            raise ValidationError({"search_backend": str(exc)})
+
+    @property
+    def paginator(self):
+        """Use keyset pagination when the client opts in with ``?pagination=cursor``."""
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            if params.get("pagination") == "cursor" or params.get("cursor"):
+                self._paginator = ProductCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def _catalog_cache_params(self):
+        """Return the normalized parameters keying a cached list page.
+
+        Free-text searches are too diverse to be worth caching, so ``None`` is
+        returned for them and the request goes straight to the database.
+        """
+        params = self.request.query_params
+        if params.get("q"):
+            return None
+        paginator = self.paginator
+        if isinstance(paginator, ProductCursorPagination):
+            page = params.get(paginator.cursor_query_param) or None
+        else:
+            try:
+                page = max(int(params.get(paginator.page_query_param, 1)), 1)
+            except (TypeError, ValueError):
+                page = params.get(paginator.page_query_param)
+        ordering = params.get("ordering")
+        return {
+            "pagination": type(paginator).__name__,
+            "version": self.request.version,
+            "scheme": self.request.scheme,
+            "host": self.request.get_host(),
+            "staff": bool(self.request.user.is_staff),
+            # Slugs match case-sensitively, so the key must keep the case.
+            "category": (params.get("category") or "").strip() or None,
+            "min_price": _normalize_decimal(params.get("min_price")),
+            "max_price": _normalize_decimal(params.get("max_price")),
+            "ordering": ordering if ordering in ALLOWED_ORDERING else None,
+            "page": page,
+            "page_size": paginator.get_page_size(self.request),
+        }
+
+    def list(self, request, *args, **kwargs):
+        params = self._catalog_cache_params()
+        if params is None:
+            return super().list(request, *args, **kwargs)
+        cache_key, data = catalog_cache.get_list(params)
+        if data is not None:
+            return Response(catalog_cache.with_live_inventory(data))
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            catalog_cache.set_list(cache_key, response.data)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        slug = kwargs[self.lookup_field]
+        is_staff = bool(request.user.is_staff)
+        product_version, data = catalog_cache.get_detail(slug, is_staff)
+        if data is not None:
+            return Response(data)
+        instance = self.get_object()
+        data = self.get_serializer(instance).data
+        catalog_cache.set_detail(slug, is_staff, product_version, instance, data)
+        return Response(data)
+
     def get_serializer_class(self):
         if self.action in {"create", "update", "partial_update"}:
             return ProductWriteSerializer
@@ -72,13 +160,10 @@ class ProductViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], url_path="search")
     def search(self, request, *args, **kwargs):
         query = request.query_params.get("q", "").strip()
-        if not query:
-            return Response([])
-        queryset = self.get_queryset().filter(
-            Q(product_name__icontains=query) | Q(description__icontains=query)
-        )
-        serializer = ProductSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.get_queryset() if query else Product.objects.none()
+        page = self.paginate_queryset(queryset)
+        serializer = ProductSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=["get"], url_path="availability")
     def availability(self, request, *args, **kwargs):
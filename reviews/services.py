@@ -2,6 +2,8 @@ from decimal import Decimal, ROUND_HALF_UP
 
 from django.db.models import Avg, Count
 
+from products import cache as catalog_cache
+from products import search
 from products.models import Product
 from reviews.models import Review
 
@@ -18,3 +20,5 @@ def update_product_rating(product_id: int) -> None:
     Product.objects.filter(id=product_id).update(
         average_rating=average, rating_count=rating_count
     )
+    catalog_cache.invalidate_products([product_id])
+    search.queue_reindex([product_id])
@@ -1,7 +1,7 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from authentication.jwt import CachedJWTAuthentication
 from backend.permissions import IsOwnerOrAdmin
 from reviews.models import Review
 from reviews.serializers import ReviewSerializer, ReviewWriteSerializer
@@ -10,7 +10,7 @@ from reviews.throttles import ReviewCreateThrottle
 
 
 class ReviewViewSet(viewsets.ModelViewSet):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrAdmin]
     queryset = Review.objects.select_related("user", "product")
 
@@ -3,6 +3,8 @@ from .views import (
     RegisterUserView,
     UserProfileView,
     CustomGoogleLogin,
+    UserDataExportDownloadView,
+    UserDataExportStatusView,
     UserDataExportView,
     PauseUserView,
     ReactivateUserView,
@@ -15,6 +17,16 @@ urlpatterns = [
     path("auth/registration/", include("dj_rest_auth.registration.urls")),
     path("auth/google/", CustomGoogleLogin.as_view(), name="google_login"),
     path("export/", UserDataExportView.as_view(), name="user-data-export"),
+    path(
+        "export/<uuid:job_id>/",
+        UserDataExportStatusView.as_view(),
+        name="user-data-export-status",
+    ),
+    path(
+        "export/download/<str:token>/",
+        UserDataExportDownloadView.as_view(),
+        name="user-data-export-download",
+    ),
     path("<int:user_id>/pause/", PauseUserView.as_view(), name="pause-user"),
     path(
         "<int:user_id>/reactivate/",
@@ -1,6 +1,7 @@
 # users/models.py
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.sessions.base_session import AbstractBaseSession
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.db import models
@@ -35,6 +36,14 @@ class User(AbstractUser):
     marketing_opt_in_at = models.DateTimeField(null=True, blank=True)
     marketing_opt_out_at = models.DateTimeField(null=True, blank=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored hash so a password change can be detected on
+        # save without re-reading the row.
+        instance._loaded_password = instance.__dict__.get("password")
+        return instance
+
     def save(self, *args, **kwargs):
         if self.email:
             self.email = self.email.strip().lower()
@@ -51,3 +60,57 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class UserSession(AbstractBaseSession):
+    """Database session that records the signed-in user.
+
+    Written by :mod:`users.session_store`; the indexed ``user`` column lets a
+    user's sessions be revoked without decoding every session.
+    """
+
+    user = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="sessions",
+    )
+
+    class Meta(AbstractBaseSession.Meta):
+        db_table = "users_session"
+
+    @classmethod
+    def get_session_store_class(cls):
+        from users.session_store import SessionStore
+
+        return SessionStore
+
+
+class DataExportJob(models.Model):
+    """A GDPR export of one user's data, built in the background."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="data_export_jobs"
+    )
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    file = models.FileField(upload_to="exports/", blank=True)
+    records = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.status}"
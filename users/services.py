@@ -0,0 +1,252 @@
+"""GDPR data export jobs.
+
+An export is written by a Celery task as gzip-compressed JSON Lines: one
+``{"section": ..., "record": ...}`` object per line. Every section is read
+with ``iterator()`` and written straight to a temporary file, so memory use
+does not grow with the size of the account. The finished file is saved to
+default storage and handed out through a signed, expiring link.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from authentication.models import Address
+from giftcards.models import GiftCard
+from notifications.models import Notification
+from orders.models import Order
+from referrals.models import ReferralCode
+from reviews.models import Review
+
+from .models import DataExportJob
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_SALT = "users.data-export"
+
+USER_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "date_joined",
+    "last_login",
+    "marketing_opt_in",
+    "marketing_opt_in_at",
+    "marketing_opt_out_at",
+)
+
+
+def _chunk_size() -> int:
+    return getattr(settings, "DATA_EXPORT_CHUNK_SIZE", 500)
+
+
+def _orders(user):
+    orders = (
+        Order.all_objects.filter(user=user)
+        .order_by("id")
+        .prefetch_related("items")
+        .iterator(chunk_size=_chunk_size())
+    )
+    for order in orders:
+        yield {
+            "id": order.id,
+            "created_at": order.created_at,
+            "status": order.status,
+            "currency": order.currency,
+            "total_price": order.total_price,
+            "shipping_cost": order.shipping_cost,
+            "tax_amount": order.tax_amount,
+            "discount_code": order.discount_code,
+            "discount_amount": order.discount_amount,
+            "shipped_date": order.shipped_date,
+            "is_gift": order.is_gift,
+            "gift_message": order.gift_message,
+            "shipping_address_id": order.shipping_address_id,
+            "billing_address_id": order.billing_address_id,
+            "items": [
+                {
+                    "product_id": item.product_id,
+                    "product_name": item.product_name,
+                    "quantity": item.quantity,
+                    "unit_price": item.unit_price,
+                }
+                for item in order.items.all()
+            ],
+        }
+
+
+def _rows(queryset, *fields):
+    return queryset.order_by("pk").values(*fields).iterator(chunk_size=_chunk_size())
+
+
+def _sections(user):
+    yield "user", iter([{field: getattr(user, field) for field in USER_FIELDS}])
+    yield "addresses", _rows(
+        Address.objects.filter(user=user),
+        "id",
+        "street",
+        "city",
+        "state",
+        "country",
+        "zip_code",
+        "is_default_shipping",
+        "is_default_billing",
+        "created_at",
+        "updated_at",
+    )
+    yield "orders", _orders(user)
+    yield "reviews", _rows(
+        Review.objects.filter(user=user),
+        "id",
+        "product_id",
+        "rating",
+        "title",
+        "body",
+        "status",
+        "created_at",
+        "updated_at",
+    )
+    yield "notifications", _rows(
+        Notification.objects.filter(user=user), "id", "message", "created_at", "read_at"
+    )
+    yield "gift_cards", _rows(
+        GiftCard.objects.filter(Q(issued_by=user) | Q(redeemed_by=user)),
+        "id",
+        "code",
+        "amount",
+        "balance",
+        "is_active",
+        "created_at",
+        "issued_by_id",
+        "redeemed_at",
+        "redeemed_by_id",
+    )
+    yield "referrals", _rows(
+        ReferralCode.objects.filter(created_by=user),
+        "id",
+        "code",
+        "usage_count",
+        "created_at",
+    )
+
+
+def write_user_export(user, fileobj) -> int:
+    """Write ``user``'s data to ``fileobj`` as gzip'd JSON Lines.
+
+    Returns the number of records written.
+    """
+    records = 0
+    with gzip.GzipFile(fileobj=fileobj, mode="wb") as archive:
+        for section, rows in _sections(user):
+            for record in rows:
+                line = json.dumps(
+                    {"section": section, "record": record}, cls=DjangoJSONEncoder
+                )
+                archive.write(line.encode("utf-8") + b"\n")
+                records += 1
+    return records
+
+
+def _stale_before():
+    return timezone.now() - timedelta(
+        seconds=getattr(settings, "DATA_EXPORT_STALE_AFTER", 3600)
+    )
+
+
+def request_data_export(user) -> DataExportJob:
+    """Return the user's unfinished export job, or queue a new one.
+
+    Unfinished jobs older than ``DATA_EXPORT_STALE_AFTER`` seconds are
+    assumed lost with their worker; they are marked failed and replaced.
+    """
+    from .tasks import export_user_data
+
+    with transaction.atomic():
+        job = (
+            DataExportJob.objects.select_for_update()
+            .filter(
+                user=user,
+                status__in=[DataExportJob.Status.PENDING, DataExportJob.Status.RUNNING],
+            )
+            .first()
+        )
+        if job is not None and job.created_at < _stale_before():
+            logger.warning("Data export %s timed out; queueing a new one.", job.pk)
+            job.status = DataExportJob.Status.FAILED
+            job.error = "Timed out."
+            job.save(update_fields=["status", "error"])
+            job = None
+        if job is None:
+            job = DataExportJob.objects.create(user=user)
+            transaction.on_commit(lambda: export_user_data.delay(str(job.pk)))
+    return job
+
+
+def run_data_export(job_id) -> DataExportJob | None:
+    """Build the export for a pending job; other states are left untouched."""
+    claimed = DataExportJob.objects.filter(
+        pk=job_id, status=DataExportJob.Status.PENDING
+    ).update(status=DataExportJob.Status.RUNNING)
+    job = DataExportJob.objects.select_related("user").filter(pk=job_id).first()
+    if not claimed or job is None:
+        return job
+
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            job.records = write_user_export(job.user, tmp)
+            tmp.seek(0)
+            job.file.save(f"{job.user_id}/{job.pk}.jsonl.gz", File(tmp), save=False)
+    except Exception as exc:
+        logger.exception("Data export %s failed.", job_id)
+        job.status = DataExportJob.Status.FAILED
+        job.error = str(exc)
+        job.save(update_fields=["status", "error"])
+        return job
+
+    job.status = DataExportJob.Status.COMPLETED
+    job.completed_at = timezone.now()
+    finished = DataExportJob.objects.filter(
+        pk=job.pk, status=DataExportJob.Status.RUNNING
+    ).update(
+        status=job.status,
+        records=job.records,
+        file=job.file.name,
+        completed_at=job.completed_at,
+    )
+    if not finished:
+        # Timed out and replaced while running; don't leave the file behind.
+        job.file.delete(save=False)
+        job.refresh_from_db()
+    return job
+
+
+def download_token(job: DataExportJob) -> str:
+    return signing.TimestampSigner(salt=DOWNLOAD_SALT).sign(str(job.pk))
+
+
+def job_for_download_token(token: str) -> DataExportJob:
+    """Return the completed job ``token`` was issued for.
+
+    Raises ``signing.BadSignature`` (or its ``SignatureExpired`` subclass)
+    for tampered or expired links and ``DataExportJob.DoesNotExist`` when
+    the export is gone.
+    """
+    job_id = signing.TimestampSigner(salt=DOWNLOAD_SALT).unsign(
+        token, max_age=getattr(settings, "DATA_EXPORT_LINK_MAX_AGE", 86400)
+    )
+    return DataExportJob.objects.get(pk=job_id, status=DataExportJob.Status.COMPLETED)
@@ -0,0 +1,25 @@
+"""Database session engine that indexes sessions by user.
+
+Set ``SESSION_ENGINE = "users.session_store"`` to store sessions in
+:class:`users.models.UserSession`, which carries the authenticated user's id
+next to the encoded session data.
+"""
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+
+class SessionStore(DBStore):
+    @classmethod
+    def get_model_class(cls):
+        from users.models import UserSession
+
+        return UserSession
+
+    def create_model_instance(self, data):
+        obj = super().create_model_instance(data)
+        try:
+            obj.user_id = int(data.get(SESSION_KEY))
+        except (TypeError, ValueError):
+            obj.user_id = None
+        return obj
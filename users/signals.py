@@ -1,27 +1,42 @@
 """Signal handlers for the users app."""
 
 from django.contrib.auth import get_user_model
-from django.contrib.sessions.models import Session
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from .models import DataExportJob, UserSession
+
 
 User = get_user_model()
 
 
+def _password_changed(instance, update_fields) -> bool:
+    if update_fields is not None and "password" not in update_fields:
+        return False
+    # ``set_password`` keeps the raw password until the next save.
+    if getattr(instance, "_password", None) is not None:
+        return True
+    loaded = getattr(instance, "_loaded_password", None)
+    return loaded is not None and loaded != instance.password
+
+
 @receiver(pre_save, sender=User)
-def revoke_sessions_on_password_change(sender, instance, **kwargs):
+def revoke_sessions_on_password_change(sender, instance, update_fields=None, **kwargs):
     """Delete user sessions if the password has changed."""
     if not instance.pk:
         return
 
-    try:
-        old_password = sender.objects.get(pk=instance.pk).password
-    except sender.DoesNotExist:  # pragma: no cover - safety check
-        return
+    if _password_changed(instance, update_fields):
+        UserSession.objects.filter(user_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=User)
+def remember_saved_password(sender, instance, **kwargs):
+    instance._loaded_password = instance.password
+
 
-    if old_password != instance.password:
-        for session in Session.objects.all():
-            data = session.get_decoded()
-            if data.get("_auth_user_id") == str(instance.pk):
-                session.delete()
+@receiver(post_delete, sender=DataExportJob)
+def delete_data_export_file(sender, instance, **kwargs):
+    """Remove the export archive from storage along with its job."""
+    if instance.file:
+        instance.file.delete(save=False)
@@ -1,6 +1,7 @@
 from backend.tasks.users import (
     send_verification_email,
     cleanup_expired_sessions,
+    export_user_data,
     perform_user_purge,
     purge_inactive_users,
 )
@@ -8,6 +9,7 @@ from backend.tasks.users import (
 __all__ = [
     "send_verification_email",
     "cleanup_expired_sessions",
+    "export_user_data",
     "perform_user_purge",
     "purge_inactive_users",
 ]
@@ -1,5 +1,9 @@
 """Tests for the users app."""
 
+import gzip
+import json
+import shutil
+import tempfile
 from datetime import timedelta
 from uuid import uuid4
 
@@ -7,16 +11,24 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.sessions.models import Session
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.management import call_command
 from django.db import IntegrityError
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
-from io import BytesIO
+from io import BytesIO, StringIO
 from PIL import Image
 from rest_framework.test import APIClient
 
+from authentication.models import Address
+from backend.retention import apply_policy
+from giftcards.models import GiftCard
+from notifications.models import Notification
+from orders.models import Order, OrderItem
+from referrals.models import ReferralCode
+from users.models import DataExportJob, UserSession
 from users.tasks import cleanup_expired_sessions, purge_inactive_users
 
 User = get_user_model()
@@ -157,12 +169,43 @@ class RevokeSessionsOnPasswordChangeTest(TestCase):
         client = APIClient()
         self.assertTrue(client.login(username="u", password=old_password))
         session_key = client.session.session_key
-        self.assertTrue(Session.objects.filter(session_key=session_key).exists())
+        self.assertTrue(
+            UserSession.objects.filter(session_key=session_key, user=user).exists()
+        )
 
         user.set_password(new_password)
         user.save()
 
-        self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+        self.assertFalse(UserSession.objects.filter(session_key=session_key).exists())
+
+    def test_only_the_users_sessions_are_revoked_without_rereading(self):
+        password = uuid4().hex
+        user = User.objects.create_user(username="u", password=password)
+        other = User.objects.create_user(username="o", password=password)
+        for account in ("u", "o"):
+            self.assertTrue(APIClient().login(username=account, password=password))
+
+        user = User.objects.get(pk=user.pk)
+        user.password = "changed"  # nosec B105
+        # One DELETE for the user's sessions and the UPDATE itself.
+        with self.assertNumQueries(2):
+            user.save()
+
+        self.assertFalse(UserSession.objects.filter(user=user).exists())
+        self.assertTrue(UserSession.objects.filter(user=other).exists())
+
+    def test_saving_without_password_change_keeps_sessions(self):
+        password = uuid4().hex
+        user = User.objects.create_user(username="u", password=password)
+        self.assertTrue(APIClient().login(username="u", password=password))
+
+        user.first_name = "Ada"
+        with self.assertNumQueries(1):
+            user.save()
+        user.set_password(uuid4().hex)
+        user.save(update_fields=["first_name"])
+
+        self.assertTrue(UserSession.objects.filter(user=user).exists())
 
 
 class RemoveExpiredTokensCommandTest(TestCase):
@@ -223,6 +266,20 @@ class PurgeInactiveUsersTaskTest(TestCase):
         self.assertFalse(User.objects.filter(id=inactive_old.id).exists())
         self.assertTrue(User.objects.filter(id=inactive_recent.id).exists())
 
+    def test_command_reports_deleted_users(self):
+        user = User.objects.create_user(
+            username="purged", password="pass", is_active=False
+        )  # nosec B106
+        User.objects.filter(pk=user.pk).update(
+            last_login=timezone.now() - timedelta(days=400)
+        )
+        Notification.objects.create(user=user, message="Bye")
+        out = StringIO()
+
+        call_command("purge_inactive_users", stdout=out)
+
+        self.assertIn("Purged 1 inactive users.", out.getvalue())
+
 
 class UserAvatarValidationTest(TestCase):
     def test_rejects_invalid_format(self):
@@ -252,3 +309,114 @@ class UserAvatarValidationTest(TestCase):
             user.full_clean()
 
 
+@override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=["testserver"])
+class DataExportTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username="exporter", email="exporter@example.com", password="pass"
+        )  # nosec B106
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("user-data-export", kwargs={"version": "v1"})
+
+        for index in range(3):
+            order = Order.objects.create(
+                user=self.user, total_price=10, shipping_cost=0, tax_amount=0
+            )
+            OrderItem.objects.create(
+                order=order, product_name=f"Item {index}", quantity=1, unit_price=10
+            )
+        Address.objects.create(
+            user=self.user,
+            street="1 Main St",
+            city="Springfield",
+            country="US",
+            zip_code="12345",
+        )
+        Notification.objects.create(user=self.user, message="Welcome")
+        GiftCard.objects.create(amount=25, issued_by=self.user)
+        ReferralCode.objects.create(created_by=self.user)
+
+    def _export(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 202)
+        status_url = reverse(
+            "user-data-export-status",
+            kwargs={"version": "v1", "job_id": response.data["id"]},
+        )
+        return self.client.get(status_url)
+
+    def test_export_job_streams_every_section_to_a_signed_download(self):
+        response = self._export()
+
+        self.assertEqual(response.data["status"], DataExportJob.Status.COMPLETED)
+        self.assertEqual(response.data["records"], 8)
+        download = APIClient().get(response.data["download_url"])
+        self.assertEqual(download.status_code, 200)
+        lines = gzip.decompress(b"".join(download.streaming_content)).splitlines()
+        records = [json.loads(line) for line in lines]
+        sections = [record["section"] for record in records]
+        self.assertEqual(
+            sections,
+            ["user", "addresses"]
+            + ["orders"] * 3
+            + ["notifications", "gift_cards", "referrals"],
+        )
+        self.assertEqual(records[0]["record"]["email"], "exporter@example.com")
+        self.assertEqual(records[2]["record"]["items"][0]["product_name"], "Item 0")
+
+    def test_pending_job_is_reused(self):
+        first = self.client.post(self.url)
+        second = self.client.post(self.url)
+        self.assertEqual(first.data["id"], second.data["id"])
+        self.assertIsNone(first.data["download_url"])
+
+    def test_stale_running_job_is_failed_and_replaced(self):
+        stale = DataExportJob.objects.create(
+            user=self.user, status=DataExportJob.Status.RUNNING
+        )
+        DataExportJob.objects.filter(pk=stale.pk).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+
+        response = self._export()
+
+        self.assertNotEqual(response.data["id"], str(stale.pk))
+        self.assertEqual(response.data["status"], DataExportJob.Status.COMPLETED)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, DataExportJob.Status.FAILED)
+
+    def test_retention_deletes_old_exports_and_their_files(self):
+        job = DataExportJob.objects.get(pk=self._export().data["id"])
+        path = job.file.name
+        self.assertTrue(default_storage.exists(path))
+        DataExportJob.objects.filter(pk=job.pk).update(
+            created_at=timezone.now() - timedelta(days=8)
+        )
+
+        self.assertEqual(apply_policy("data_exports", sleep=0), 1)
+
+        self.assertFalse(DataExportJob.objects.filter(pk=job.pk).exists())
+        self.assertFalse(default_storage.exists(path))
+
+    def test_tampered_link_and_foreign_job_are_not_found(self):
+        response = self._export()
+        tampered = response.data["download_url"].rstrip("/") + "x/"
+        self.assertEqual(APIClient().get(tampered).status_code, 404)
+
+        other = User.objects.create_user(
+            username="other", password="pass"
+        )  # nosec B106
+        self.client.force_authenticate(other)
+        status_url = reverse(
+            "user-data-export-status",
+            kwargs={"version": "v1", "job_id": response.data["id"]},
+        )
+        self.assertEqual(self.client.get(status_url).status_code, 404)
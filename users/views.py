@@ -1,14 +1,24 @@
 from functools import partial
-from rest_framework import generics, permissions
-from rest_framework.serializers import ModelSerializer, CharField
+from rest_framework import generics, permissions, status
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.serializers import (
+    CharField,
+    ModelSerializer,
+    SerializerMethodField,
+)
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.core import signing
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
 from dj_rest_auth.registration.views import SocialLoginView
-from orders.models import Order
+
+from .models import DataExportJob
+from .services import download_token, job_for_download_token, request_data_export
 
 
 def get_user_model_ref():
@@ -87,44 +97,77 @@ class CustomGoogleLogin(SocialLoginView):
     callback_url = "https://art-bay.netlify.app"
 
 
+class DataExportJobSerializer(ModelSerializer):
+    download_url = SerializerMethodField()
+
+    class Meta:
+        model = DataExportJob
+        fields = [
+            "id",
+            "status",
+            "records",
+            "error",
+            "created_at",
+            "completed_at",
+            "download_url",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, job):
+        if job.status != DataExportJob.Status.COMPLETED:
+            return None
+        request = self.context["request"]
+        url = reverse(
+            "user-data-export-download",
+            kwargs={"version": request.version, "token": download_token(job)},
+        )
+        return request.build_absolute_uri(url)
+
+
 class UserDataExportView(APIView):
+    """Queue a GDPR export (``POST``) or list the user's recent exports."""
+
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        user = request.user
-        user_data = {
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "phone_number": user.phone_number,
-            "date_joined": user.date_joined.isoformat(),
-        }
-
-        orders = []
-        for order in Order.objects.filter(user=user).prefetch_related("items"):
-            orders.append(
-                {
-                    "id": order.id,
-                    "created_at": order.created_at.isoformat(),
-                    "total_price": str(order.total_price),
-                    "status": order.status,
-                    "items": [
-                        {
-                            "product_name": item.product_name,
-                            "quantity": item.quantity,
-                            "unit_price": str(item.unit_price),
-                        }
-                        for item in order.items.all()
-                    ],
-                }
-            )
-
-        data = {"user": user_data, "orders": orders, "reviews": []}
-        response = Response(data)
-        response["Content-Disposition"] = 'attachment; filename="user-data.json"'
-        return response
+        jobs = DataExportJob.objects.filter(user=request.user)[:10]
+        serializer = DataExportJobSerializer(
+            jobs, many=True, context={"request": request}
+        )
+        return Response(serializer.data)
+
+    def post(self, request, *args, **kwargs):
+        job = request_data_export(request.user)
+        serializer = DataExportJobSerializer(job, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class UserDataExportStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, job_id, *args, **kwargs):
+        job = get_object_or_404(DataExportJob, pk=job_id, user=request.user)
+        serializer = DataExportJobSerializer(job, context={"request": request})
+        return Response(serializer.data)
+
+
+class UserDataExportDownloadView(APIView):
+    """Serve a finished export to whoever holds its signed link."""
+
+    authentication_classes: list[type[BaseAuthentication]] = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, token, *args, **kwargs):
+        try:
+            job = job_for_download_token(token)
+        except (signing.BadSignature, DataExportJob.DoesNotExist):
+            raise Http404
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename="user-data.jsonl.gz",
+            content_type="application/gzip",
+        )
 
 
 class PauseUserView(APIView):